@@ -0,0 +1,53 @@
+"""
+bench_ensemble.py
+-----------------
+Scaling of the Monte Carlo ensemble (/scenario/ensemble) with the number of
+worker processes: the same K trajectories of N days from the loaded data,
+run on pools of 1, 2, 4, ... workers. Each pool is warmed up first, so its
+start-up (spawning, imports, model loading) is not timed. The bands must not
+depend on how the trajectories were split, so every run is checked against
+the single-worker one.
+
+    python bench_ensemble.py [--days 30] [--trajectories 64] [--workers 1 2 4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from services.simulation_service import simulation_service
+from services.ensemble import EnsembleRunner
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--trajectories', type=int, default=64)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, *[w for w in (2, 4, 8, 16) if w <= cores], cores}))
+    args = parser.parse_args()
+
+    print(f"\n{args.trajectories} trajectories x {args.days} days, {cores} cores")
+    print(f"\n{'workers':>7} {'seconds':>8} {'traj/s':>7} {'speedup':>8} {'efficiency':>10} {'same bands':>10}")
+    baseline = reference = None
+    for workers in args.workers:
+        runner = EnsembleRunner(simulation_service, workers=workers)
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.run(1, workers)
+            start = time.perf_counter()
+            result = runner.run(args.days, args.trajectories)
+            elapsed = time.perf_counter() - start
+        runner.close()
+        if baseline is None:
+            # Speedup and efficiency are relative to the first (smallest) pool
+            baseline, reference = elapsed, result["cities"]
+        speedup = baseline / elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {args.trajectories / elapsed:>7.1f} {speedup:>7.2f}x "
+              f"{speedup * args.workers[0] / workers:>10.0%} {str(result['cities'] == reference):>10}")
+
+
+if __name__ == '__main__':
+    main()
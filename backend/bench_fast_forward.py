@@ -0,0 +1,58 @@
+"""
+bench_fast_forward.py
+---------------------
+Time to advance the live simulation by N days: N single-day ticks against
+one /demo/simulate-tick?days=N fast-forward. Both runs start from freshly
+loaded outputs with the city lifecycles reset (each city's RNG is seeded
+from its name), and the served history they leave behind is checked to be
+identical.
+
+    python bench_fast_forward.py [--days 7 30 90 180] [--retention 365]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--days', type=int, nargs='+', default=[7, 30, 90, 180])
+parser.add_argument('--retention', type=int, default=365)
+args = parser.parse_args()
+# The service reads this when it is imported
+os.environ['SIM_RETENTION_DAYS'] = str(args.retention)
+
+from services.data_loader import data_loader
+from services.simulation_service import simulation_service
+
+
+def run(days, fast_forward):
+    """Reloads the outputs, resets the lifecycles and advances `days` days; returns (seconds, merged)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_loader.load_data()
+        simulation_service.city_states = {}
+        # Build the day state outside the timing, as a running server would have
+        simulation_service._day_state()
+        start = time.perf_counter()
+        if fast_forward:
+            simulation_service.simulate_tick(days)
+        else:
+            for _ in range(days):
+                simulation_service.simulate_tick()
+        elapsed = time.perf_counter() - start
+    return elapsed, data_loader.snapshot()['merged']
+
+
+def main():
+    print(f"\n{'days':>5} {'ticks (ms)':>11} {'days=N (ms)':>12} {'speedup':>8} {'identical':>10}")
+    for days in args.days:
+        ticks_s, ticks_merged = run(days, fast_forward=False)
+        ff_s, ff_merged = run(days, fast_forward=True)
+        identical = ticks_merged.reset_index(drop=True).equals(ff_merged.reset_index(drop=True))
+        print(f"{days:>5} {ticks_s * 1000:>11.1f} {ff_s * 1000:>12.1f} {ticks_s / ff_s:>7.1f}x {str(identical):>10}")
+    simulation_service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+bench_features.py
+-----------------
+Times STEP 1-3 of ml_engine.py (city resolution, merge, geo enrichment and
+feature engineering) with the previous row-wise/lambda implementation against
+the vectorized one in features.py, at 1x, 10x and 100x the source data.
+
+Data is scaled by cloning every hospital (and its city) under a new id, which
+is how growth in hospital count shows up in production.
+
+    python bench_features.py [--scales 1 10 100] [--repeat 3]
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from features import geo_mapping, resolve_cities, add_geo, engineer_features
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRS = [os.path.join(BASE, 'data'), os.path.join(BASE, 'Data set')]
+HOSPITAL_FILES = ['NEW HOSPITAL ALL.csv', 'NEW_HOSPITAL_ALL.csv', 'hospital_timeseries_6months_REAL.csv']
+WATER_FILES = ['NEW WATER ALL.csv', 'NEW_WATER_ALL.csv', 'water_quality_6months_REAL.csv']
+
+FEATURE_COLS = [
+    'lat', 'lng', 'rolling_cases_24h', 'rolling_cases_72h', 'delta_cases', 'case_growth_rate',
+    'water_contamination_index', 'humidity_index', 'rainfall_index', 'environmental_risk_index'
+]
+
+
+def _find(names):
+    for d in DATA_DIRS:
+        for name in names:
+            path = os.path.join(d, name)
+            if os.path.exists(path):
+                return path
+    raise FileNotFoundError(f"None of {names} found in {DATA_DIRS}")
+
+
+def load_sources():
+    hospital_df = pd.read_csv(_find(HOSPITAL_FILES))
+    water_df = pd.read_csv(_find(WATER_FILES))
+    hospital_df['date'] = pd.to_datetime(hospital_df['date'])
+    water_df['date'] = pd.to_datetime(water_df['date'])
+    return hospital_df, water_df
+
+
+def scale_sources(hospital_df, water_df, factor):
+    """Clones every hospital (and city) `factor` times under new ids."""
+    if factor == 1:
+        return hospital_df.copy(), water_df.copy()
+    out = []
+    for df in (hospital_df, water_df):
+        copies = []
+        for k in range(factor):
+            c = df.copy()
+            if k:
+                c['hospital_id'] = c['hospital_id'] + f"_{k}"
+                if 'city' in c.columns:
+                    c['city'] = c['city'] + f"_{k}"
+            copies.append(c)
+        out.append(pd.concat(copies, ignore_index=True))
+    return out[0], out[1]
+
+
+def legacy_features(hospital_df, water_df):
+    """STEP 1-3 as originally written: row-wise apply, map lambdas, transform lambdas."""
+    if 'city' in hospital_df.columns:
+        city_map = hospital_df.groupby('hospital_id')['city'].first().to_dict()
+    else:
+        city_map = {}
+    hospital_df['city'] = hospital_df['hospital_id'].map(city_map)
+    if 'city' in water_df.columns:
+        water_city_map = water_df.groupby('hospital_id')['city'].first().to_dict()
+        hospital_df['city'] = hospital_df.apply(lambda r: r['city'] if pd.notna(r['city']) and r['city'] != '' else water_city_map.get(r['hospital_id'], r['city']), axis=1)
+    else:
+        water_df['city'] = water_df['hospital_id'].map(city_map)
+    hospital_df['city'] = hospital_df['city'].replace({'New Delhi': 'Delhi'})
+    if 'city' in water_df.columns:
+        water_df['city'] = water_df['city'].replace({'New Delhi': 'Delhi'})
+
+    merged_df = pd.merge(hospital_df, water_df, on=['city', 'date', 'hospital_id'], how='inner', suffixes=('', '_water'))
+    merged_df['lat'] = merged_df['city'].map(lambda x: geo_mapping.get(x, [20.5937, 78.9629])[0])
+    merged_df['lng'] = merged_df['city'].map(lambda x: geo_mapping.get(x, [20.5937, 78.9629])[1])
+
+    merged_df = merged_df.sort_values(['city', 'date'], kind='mergesort')
+    merged_df['rolling_cases_24h'] = merged_df.groupby('city')['admissions'].transform(lambda x: x.rolling(window=1).mean())
+    merged_df['rolling_cases_72h'] = merged_df.groupby('city')['admissions'].transform(lambda x: x.rolling(window=3).mean())
+    merged_df['delta_cases'] = merged_df.groupby('city')['admissions'].diff().fillna(0)
+    merged_df['case_growth_rate'] = (merged_df['delta_cases'] / merged_df.groupby('city')['admissions'].shift(1).replace(0, 1)).fillna(0)
+    merged_df['water_contamination_index'] = (
+        0.4 * merged_df['turbidity_NTU'] +
+        0.4 * merged_df['fecal_coliform_cfu_100ml'] +
+        0.2 * (7 - merged_df['water_pH']).abs()
+    )
+    if 'water_temp_C' in merged_df.columns:
+        merged_df['humidity_index'] = (merged_df['water_temp_C'] / merged_df['water_temp_C'].max()).fillna(0.5)
+    else:
+        merged_df['humidity_index'] = 0.5
+    merged_df['rainfall_index'] = (merged_df['turbidity_NTU'] / merged_df['turbidity_NTU'].max()).fillna(0.1)
+    merged_df['environmental_risk_index'] = (merged_df['humidity_index'] * 0.5 + merged_df['rainfall_index'] * 0.5)
+    return merged_df.fillna(0)
+
+
+def vectorized_features(hospital_df, water_df):
+    """STEP 1-3 through features.py, as ml_engine.py runs them."""
+    hospital_df, water_df = resolve_cities(hospital_df, water_df)
+    merged_df = pd.merge(hospital_df, water_df, on=['city', 'date', 'hospital_id'], how='inner', suffixes=('', '_water'))
+    merged_df = add_geo(merged_df)
+    max_water_temp = merged_df['water_temp_C'].max() if 'water_temp_C' in merged_df.columns else None
+    return engineer_features(merged_df, max_water_temp, merged_df['turbidity_NTU'].max())
+
+
+def _time(fn, hospital_df, water_df, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        h, w = hospital_df.copy(), water_df.copy()
+        start = time.perf_counter()
+        result = fn(h, w)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    hospital_df, water_df = load_sources()
+    print(f"{'scale':>6} {'rows':>9} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for factor in args.scales:
+        h, w = scale_sources(hospital_df, water_df, factor)
+        legacy_s, legacy = _time(legacy_features, h, w, args.repeat)
+        fast_s, fast = _time(vectorized_features, h, w, args.repeat)
+
+        # Same rows in the same order, same values
+        assert len(legacy) == len(fast)
+        np.testing.assert_allclose(
+            legacy[FEATURE_COLS].to_numpy(float), fast[FEATURE_COLS].to_numpy(float), rtol=1e-9
+        )
+        print(f"{factor:>5}x {len(fast):>9} {legacy_s:>11.3f} {fast_s:>15.3f} {legacy_s / fast_s:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
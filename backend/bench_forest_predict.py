@@ -0,0 +1,66 @@
+"""
+bench_forest_predict.py
+-----------------------
+Checks that the flattened forecaster (models/flat_forest.py) predicts the
+same values as the scikit-learn forest it was built from, and times both at
+the batch sizes the backend uses: one row, one row per city (a simulation
+tick), a scenario upload, and a full re-score.
+
+Batches larger than the training data are drawn from its rows with a little
+noise added, so every row takes its own path through the trees.
+
+    python bench_forest_predict.py [--repeat 20]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from bench_model_load import train_forest
+from models.flat_forest import FlatForest, flatten_forest
+
+BATCH_SIZES = [1, 17, 1_000, 2_000, 5_000, 100_000]
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def make_batch(X, n, rng):
+    rows = X[rng.integers(0, len(X), n)]
+    return rows + rng.normal(0, 0.01, rows.shape) * (rng.random(rows.shape) < 0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rf, X = train_forest()
+    flat = FlatForest(*flatten_forest(rf))
+    rng = np.random.default_rng(0)
+    print(f"{rf.n_estimators} trees, max depth {flat.max_depth}, {len(flat.value)} nodes\n")
+
+    print(f"{'rows':>8} {'sklearn (ms)':>13} {'flat (ms)':>10} {'speedup':>8} {'max |diff|':>11} {'identical':>10}")
+    for n in BATCH_SIZES:
+        batch = pd.DataFrame(make_batch(X, n, rng), columns=rf.feature_names_in_)
+        expected = rf.predict(batch)
+        got = flat.predict(batch)
+        np.testing.assert_allclose(got, expected, rtol=1e-12, atol=1e-9)
+        identical = np.mean(got == expected)
+
+        repeat = max(1, args.repeat // 10) if n >= 100_000 else args.repeat
+        sk_s = best_time(lambda: rf.predict(batch), repeat)
+        flat_s = best_time(lambda: flat.predict(batch), repeat)
+        print(f"{n:>8} {sk_s * 1000:>13.2f} {flat_s * 1000:>10.2f} {sk_s / flat_s:>7.1f}x "
+              f"{np.max(np.abs(got - expected)):>11.2e} {identical:>9.1%}")
+
+
+if __name__ == '__main__':
+    main()
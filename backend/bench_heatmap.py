@@ -0,0 +1,85 @@
+"""
+bench_heatmap.py
+----------------
+Payload size and latency of /map/heatmap as the number of hospitals grows:
+the full list of points (no parameters) against a viewport request
+(bbox + zoom) answered from grid tiles, the first time after a data change
+(index and tiles built) and again (tiles cached).
+
+The served data is replaced by N synthetic hospitals spread over India and
+the endpoint is called through a TestClient on an app with just the map
+router (no response cache). The viewport is a typical 1280 x 800 px window
+over central India.
+
+    python bench_heatmap.py [--sizes 17 1000 50000 200000] [--zoom 6] [--repeat 5]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.data_loader import data_loader
+from services.heat_tiles import heat_tiles
+from routes import map
+
+
+def load_hospitals(n, rng):
+    """Replaces the served data with one day of n synthetic hospitals, each at its own location."""
+    date = pd.Timestamp('2026-03-01')
+    names = [f"Hospital {i}" for i in range(n)]
+    risk = rng.uniform(0, 100, n)
+    data_loader.publish({
+        'merged': pd.DataFrame({
+            'city': names, 'date': date, 'lat': rng.uniform(8, 35, n), 'lng': rng.uniform(68, 97, n),
+        }),
+        'risk_scores': pd.DataFrame({
+            'city': names, 'date': date, 'riskScore': risk,
+            'riskLevel': np.where(risk >= 85, 'Critical', np.where(risk >= 70, 'High', 'Moderate')),
+        }),
+    })
+
+
+def viewport(zoom, lat=21.0, lng=79.0, width_px=1280, height_px=800):
+    """bbox of a window centered on (lat, lng); 256 px tiles of 360 / 2**zoom degrees."""
+    degrees_per_px = 360.0 / 2 ** zoom / 256
+    half_w, half_h = width_px / 2 * degrees_per_px, height_px / 2 * degrees_per_px
+    return f"{lng - half_w},{lat - half_h},{lng + half_w},{lat + half_h}"
+
+
+def timed(c, url):
+    start = time.perf_counter()
+    response = c.get(url)
+    return time.perf_counter() - start, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[17, 1_000, 50_000, 200_000])
+    parser.add_argument('--zoom', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = FastAPI()
+    app.include_router(map.router, prefix='/map')
+    c = TestClient(app)
+    rng = np.random.default_rng(0)
+    full_url = '/map/heatmap'
+    view_url = f'/map/heatmap?bbox={viewport(args.zoom)}&zoom={args.zoom}'
+
+    print(f"viewport: {view_url}\n")
+    print(f"{'hospitals':>9} {'full (KB)':>10} {'full (ms)':>10} {'view (KB)':>10} {'cold (ms)':>10} {'warm (ms)':>10}")
+    for n in args.sizes:
+        load_hospitals(n, rng)
+        full_s, full_bytes = min(timed(c, full_url) for _ in range(args.repeat))
+        cold_s, view_bytes = timed(c, view_url)
+        warm_s, _ = min(timed(c, view_url) for _ in range(args.repeat))
+        print(f"{n:>9} {full_bytes / 1024:>10.1f} {full_s * 1000:>10.2f} {view_bytes / 1024:>10.1f} "
+              f"{cold_s * 1000:>10.2f} {warm_s * 1000:>10.2f}")
+    print(f"\ntile cache: {len(heat_tiles.tiles)} tiles, {heat_tiles.hits} hits, {heat_tiles.misses} misses")
+
+
+if __name__ == '__main__':
+    main()
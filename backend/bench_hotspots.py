@@ -0,0 +1,90 @@
+"""
+bench_hotspots.py
+-----------------
+Times hotspot clustering as the number of hospitals grows. Synthetic
+hospitals are scattered around the dataset's city coordinates (about 15 km
+spread, the way hospitals crowd into cities) and compared across:
+
+  sklearn   the previous approach: DBSCAN(eps=0.5) on raw degrees, rerun in full
+  cluster   models.hotspot_model.build_zones: haversine grid DBSCAN from scratch
+  tick      HotspotTracker.update with new risk and unchanged locations, which
+            is what every simulation tick pays
+
+sklearn's DBSCAN holds every neighbour list in memory, several GB at 50k
+hospitals, so it is only timed up to --sklearn-max points.
+
+    python bench_hotspots.py [--sizes 17 1000 10000 50000] [--sklearn-max 10000]
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from sklearn.cluster import DBSCAN
+
+from models.hotspot_model import HotspotTracker, build_zones
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+
+
+def city_coordinates():
+    """(lat, lng) of every city in the pipeline's output."""
+    path = os.path.join(BASE, 'ml_outputs', 'merged_features.csv')
+    if not os.path.exists(path):
+        raise SystemExit("ml_outputs/merged_features.csv not found. Run ml_engine.py first.")
+    return pd.read_csv(path, usecols=['lat', 'lng']).drop_duplicates().to_numpy(np.float64)
+
+
+def make_hospitals(centers, n, rng):
+    if n <= len(centers):
+        points = centers[:n]
+    else:
+        points = centers[rng.integers(0, len(centers), n)] + rng.normal(0, 0.15, (n, 2))
+    return pd.DataFrame({
+        'city': [f"H{i}" for i in range(n)],
+        'lat': points[:, 0],
+        'lng': points[:, 1],
+        'riskScore': rng.uniform(0, 100, n),
+    })
+
+
+def best_time(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[17, 1_000, 10_000, 50_000])
+    parser.add_argument('--sklearn-max', type=int, default=10_000)
+    args = parser.parse_args()
+
+    centers = city_coordinates()
+    rng = np.random.default_rng(0)
+    print(f"{'hospitals':>10} {'sklearn (ms)':>13} {'cluster (ms)':>13} {'tick (ms)':>10} {'zones':>6}")
+    for n in args.sizes:
+        snapshot = make_hospitals(centers, n, rng)
+        if n <= args.sklearn_max:
+            dbscan = DBSCAN(eps=0.5, min_samples=3)
+            sklearn_ms = f"{best_time(lambda: dbscan.fit_predict(snapshot[['lat', 'lng']])) * 1000:.1f}"
+        else:
+            sklearn_ms = "skipped"
+        cluster_s = best_time(lambda: build_zones(snapshot))
+
+        tracker = HotspotTracker()
+        tracker.update(snapshot)
+
+        def tick():
+            snapshot['riskScore'] = rng.uniform(0, 100, n)
+            return tracker.update(snapshot)
+        tick_s = best_time(tick, repeat=10)
+        print(f"{n:>10} {sklearn_ms:>13} {cluster_s * 1000:>13.1f} {tick_s * 1000:>10.2f} {len(tick()):>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+bench_model_load.py
+-------------------
+Compares loading the 48h forecaster from a pickle (the previous format) with
+loading the flattened, memory-mapped artifact from models/artifacts.py, and
+checks that both give the same predictions.
+
+A forest is trained on the pipeline's own features, saved in both formats to
+a scratch directory, then each format is loaded in a fresh interpreter so
+import and page-cache effects don't leak between them. Reported per format:
+load time, resident memory added by the load, and resident memory after
+predicting one row per city (17 rows), which pages in the nodes visited.
+
+    python bench_model_load.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import pickle
+import numpy as np
+import pandas as pd
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a child interpreter: argv = models_dir, format
+PROBE = r'''
+import json, os, pickle, sys, time
+import numpy as np
+import sklearn.ensemble  # imported up front so it isn't billed to the pickle load
+sys.path.insert(0, {base!r})
+from models.artifacts import load_model
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+models_dir, fmt = sys.argv[1], sys.argv[2]
+X = np.load(os.path.join(models_dir, 'X.npy'))
+before = rss()
+start = time.perf_counter()
+if fmt == 'pickle':
+    with open(os.path.join(models_dir, 'rf_pickle.pkl'), 'rb') as f:
+        model = pickle.load(f)
+else:
+    model = load_model(models_dir, 'rf')
+load_s = time.perf_counter() - start
+loaded = rss()
+pred = model.predict(X[:17])
+print(json.dumps({{'load_s': load_s, 'load_rss': loaded - before, 'predict_rss': rss() - before, 'pred': pred.tolist()}}))
+'''
+
+
+def train_forest():
+    import ml_engine
+    from models.outbreak_model import X_cols, train_forecaster
+    merged_df, _ = ml_engine.load_sources()
+    _, normalized = ml_engine.fit_scaler(ml_engine.build_features(merged_df))
+    train_df = normalized.dropna(subset=['future_cases_48h'])
+    rf, _ = train_forecaster(train_df[X_cols], train_df['future_cases_48h'])
+    return rf, normalized[X_cols].to_numpy(np.float64)
+
+
+def probe(models_dir, fmt):
+    code = PROBE.format(base=BASE)
+    out = subprocess.run([sys.executable, '-c', code, models_dir, fmt], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from models.artifacts import save_model, model_registry
+    rf, X = train_forest()
+    with tempfile.TemporaryDirectory(prefix='vectorshield_models_') as models_dir:
+        np.save(os.path.join(models_dir, 'X.npy'), X)
+        with open(os.path.join(models_dir, 'rf_pickle.pkl'), 'wb') as f:
+            pickle.dump(rf, f)
+        save_model(models_dir, 'rf', rf)
+
+        forest_dir = os.path.join(models_dir, 'rf.forest')
+        with open(os.path.join(forest_dir, 'CURRENT')) as f:
+            version_dir = os.path.join(forest_dir, f.read().strip())
+        # The flat arrays; the pickled estimator next to them is only read for large batches
+        forest_bytes = sum(os.path.getsize(os.path.join(version_dir, f))
+                           for f in os.listdir(version_dir) if f != 'estimator.pkl')
+        print(f"{rf.n_estimators} trees, {sum(e.tree_.node_count for e in rf.estimators_)} nodes")
+        print(f"on disk: pickle {os.path.getsize(os.path.join(models_dir, 'rf_pickle.pkl')) / 1e6:.1f} MB, "
+              f"flat {forest_bytes / 1e6:.1f} MB\n")
+
+        expected = rf.predict(pd.DataFrame(X[:17], columns=rf.feature_names_in_))
+        print(f"{'format':<8} {'load (ms)':>10} {'RSS after load (MB)':>20} {'RSS after predict (MB)':>23}")
+        for fmt in ('pickle', 'flat'):
+            runs = [probe(models_dir, fmt) for _ in range(args.repeat)]
+            for run in runs:
+                np.testing.assert_allclose(run['pred'], expected, rtol=1e-12)
+            load_ms = min(r['load_s'] for r in runs) * 1000
+            load_mb = np.median([r['load_rss'] for r in runs]) / 1e6
+            predict_mb = np.median([r['predict_rss'] for r in runs]) / 1e6
+            print(f"{fmt:<8} {load_ms:>10.2f} {load_mb:>20.1f} {predict_mb:>23.1f}")
+
+        # Registry: first call loads, later calls only re-stat the artifact
+        model_registry.get(models_dir, ['rf'])
+        start = time.perf_counter()
+        for _ in range(1000):
+            model_registry.get(models_dir, ['rf'])
+        print(f"\nmodel_registry.get() when unchanged: {(time.perf_counter() - start) * 1000:.1f} us per call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+bench_serialization.py
+----------------------
+Per-endpoint latency of /map/zones, /prediction/48h and /alerts/live with the
+previous iterrows + response_model serialization against the column-based
+path in utils/fast_json.py, at 17, 1,000 and 50,000 zones.
+
+The latest day is replaced by N synthetic cities (risk scores, predictions,
+anomalies and coordinates), then each endpoint is called through a
+TestClient on an app with just the routers (no response cache), and both
+versions are checked to return the same JSON.
+
+    python bench_serialization.py [--sizes 17 1000 50000] [--repeat 5]
+"""
+
+import argparse
+import time
+from typing import List
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, APIRouter
+from fastapi.testclient import TestClient
+
+from services.data_loader import data_loader
+from routes import map, prediction, alerts
+from schemas import RiskZone, Prediction, Alert
+from utils.fast_json import HAS_ORJSON
+
+ENDPOINTS = ['/map/zones', '/prediction/48h', '/alerts/live']
+
+
+def legacy_router():
+    """The three handlers as originally written."""
+    router = APIRouter()
+
+    @router.get("/map/zones", response_model=List[RiskZone])
+    def get_map_zones():
+        risk_df = data_loader.get_latest_risk_scores()
+        merged_df = data_loader.get_merged(['city', 'lat', 'lng'])
+        geo_data = merged_df[['city', 'lat', 'lng']].drop_duplicates()
+        result_df = risk_df.merge(geo_data, on='city', how='inner')
+        zones = []
+        for _, row in result_df.iterrows():
+            zones.append({
+                "location": row['city'],
+                "lat": float(row['lat']),
+                "lng": float(row['lng']),
+                "riskScore": float(row['riskScore']),
+                "riskLevel": str(row['riskLevel'])
+            })
+        return zones
+
+    @router.get("/prediction/48h", response_model=List[Prediction])
+    def get_prediction_48h():
+        preds_df = data_loader.get_latest_predictions()
+        predictions = []
+        for _, row in preds_df.iterrows():
+            predictions.append({
+                "location": row['city'],
+                "predicted_cases_48h": row['predicted_cases_48h']
+            })
+        return predictions
+
+    @router.get("/alerts/live", response_model=List[Alert])
+    def get_alerts_live():
+        risk_df = data_loader.get_latest_risk_scores()
+        anomaly_df = data_loader.get_latest_anomalies()
+        merged = risk_df.merge(anomaly_df, on=['city', 'date'], how='inner')
+        out = []
+        for _, row in merged.iterrows():
+            risk_score = row.get('riskScore', 0)
+            is_anomaly = row.get('is_anomaly', False)
+            if risk_score > 70 or is_anomaly:
+                severity = "Low"
+                message = ""
+                if risk_score >= 85:
+                    severity = "Critical"
+                    message = f"Critical risk detected in {row['city']}. Immediate action required."
+                elif risk_score >= 70:
+                    severity = "High"
+                    message = f"High risk alert for {row['city']}. Monitor status closely."
+                elif is_anomaly:
+                    severity = "Moderate"
+                    message = f"Statistical anomaly detected in {row['city']} admissions data."
+                out.append({
+                    "location": row['city'],
+                    "severity": severity,
+                    "message": message,
+                    "timestamp": row['date'].strftime("%Y-%m-%d")
+                })
+        return out
+
+    return router
+
+
+def client(*routers):
+    app = FastAPI()
+    for prefix, router in routers:
+        app.include_router(router, prefix=prefix)
+    return TestClient(app)
+
+
+def load_zones(n, rng):
+    """Replaces the served data with one day of n synthetic cities."""
+    date = pd.Timestamp('2026-03-01')
+    cities = [f"City {i}" for i in range(n)]
+    risk = rng.uniform(0, 100, n)
+    data_loader.publish({
+        'merged': pd.DataFrame({
+            'city': cities, 'date': date, 'lat': rng.uniform(8, 35, n), 'lng': rng.uniform(68, 97, n),
+        }),
+        'risk_scores': pd.DataFrame({
+            'city': cities, 'date': date, 'riskScore': risk,
+            'riskLevel': np.where(risk >= 85, 'Critical', np.where(risk >= 70, 'High', 'Moderate')),
+        }),
+        'predictions': pd.DataFrame({
+            'city': cities, 'date': date, 'predicted_cases_48h': rng.uniform(0, 200, n),
+        }),
+        'anomalies': pd.DataFrame({
+            'city': cities, 'date': date, 'is_anomaly': rng.random(n) < 0.1, 'anomaly_score': rng.normal(0, 0.1, n),
+        }),
+    })
+
+
+def best_time(c, url, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        c.get(url)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[17, 1_000, 50_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    legacy = client(('', legacy_router()))
+    fast = client(('/map', map.router), ('/prediction', prediction.router), ('/alerts', alerts.router))
+    rng = np.random.default_rng(0)
+
+    print(f"encoder: {'orjson' if HAS_ORJSON else 'json (orjson not installed)'}\n")
+    print(f"{'zones':>7} {'endpoint':<16} {'legacy (ms)':>12} {'fast (ms)':>10} {'speedup':>8}")
+    for n in args.sizes:
+        load_zones(n, rng)
+        for url in ENDPOINTS:
+            assert legacy.get(url).json() == fast.get(url).json(), url
+            legacy_s = best_time(legacy, url, args.repeat)
+            fast_s = best_time(fast, url, args.repeat)
+            print(f"{n:>7} {url:<16} {legacy_s * 1000:>12.2f} {fast_s * 1000:>10.2f} {legacy_s / fast_s:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
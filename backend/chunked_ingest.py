@@ -0,0 +1,96 @@
+"""
+chunked_ingest.py
+-----------------
+Out-of-core ingestion for `ml_engine.py --chunked`.
+
+Each source CSV is streamed in fixed-size row chunks and spilled to a scratch
+directory partitioned by date window. Later passes load one date partition of
+both sources at a time, so peak memory is bounded by the row chunk size and
+the rows in one partition, not by the size of the input files.
+"""
+
+import os
+import glob
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+
+class PartitionedSources:
+    def __init__(self, partition_days=30, spill_dir=None):
+        self.partition_days = partition_days
+        self.spill_dir = tempfile.mkdtemp(prefix='vectorshield_spill_', dir=spill_dir)
+        self.partitions = set()
+        # source key -> {hospital_id: city}, first non-empty city seen per hospital
+        self.city_maps = {}
+        # source key -> (raw columns, first raw date), for FeatureStore.record_source
+        self.layouts = {}
+        self._chunk_counter = 0
+
+    def ingest(self, key, path, chunksize=200_000):
+        """Streams `path` and spills its rows into date partitions under `key`."""
+        city_map = self.city_maps.setdefault(key, {})
+        date_format = None
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            if key not in self.layouts:
+                first = chunk['date'].iloc[0] if not chunk.empty else None
+                self.layouts[key] = (list(chunk.columns), first)
+                # Parse every chunk the same way so day-first dates stay day-first
+                date_format = guess_datetime_format(str(first)) if first is not None else None
+            chunk['date'] = pd.to_datetime(chunk['date'], format=date_format)
+
+            if 'city' in chunk.columns:
+                known = chunk.dropna(subset=['city'])
+                known = known[known['city'] != ''].drop_duplicates('hospital_id')
+                for hospital_id, city in zip(known['hospital_id'], known['city']):
+                    city_map.setdefault(hospital_id, city)
+
+            days = chunk['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+            for part, rows in chunk.groupby(days // self.partition_days, sort=False):
+                self.spill(key, int(part), rows, suffix=f"_{self._chunk_counter:06d}")
+                self.partitions.add(int(part))
+            self._chunk_counter += 1
+
+    def spill(self, key, part, df, suffix=''):
+        """Writes (or, without a suffix, replaces) a partition file for `key`."""
+        part_dir = os.path.join(self.spill_dir, key)
+        os.makedirs(part_dir, exist_ok=True)
+        df.to_pickle(os.path.join(part_dir, f"part_{part:08d}{suffix}.pkl"))
+
+    def load(self, key, part):
+        """All rows of `key` in date partition `part`, or an empty frame."""
+        files = sorted(glob.glob(os.path.join(self.spill_dir, key, f"part_{part:08d}*.pkl")))
+        if not files:
+            return pd.DataFrame()
+        return pd.concat([pd.read_pickle(f) for f in files], ignore_index=True)
+
+    def has(self, key, part):
+        return bool(glob.glob(os.path.join(self.spill_dir, key, f"part_{part:08d}*.pkl")))
+
+    def cleanup(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+class ReservoirSample:
+    """
+    Uniform fixed-size sample over a stream of DataFrame chunks (bottom-k
+    random keys), used to fit the models without holding every row.
+    """
+    def __init__(self, capacity, seed=42):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.rows = None
+
+    def add(self, df):
+        df = df.assign(_key=self.rng.random(len(df)))
+        rows = df if self.rows is None else pd.concat([self.rows, df], ignore_index=True)
+        if len(rows) > self.capacity:
+            rows = rows.nsmallest(self.capacity, '_key')
+        self.rows = rows
+
+    def frame(self):
+        if self.rows is None:
+            return pd.DataFrame()
+        return self.rows.drop(columns='_key').reset_index(drop=True)
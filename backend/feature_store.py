@@ -0,0 +1,182 @@
+"""
+feature_store.py
+----------------
+Persistent rolling state for incremental runs of ml_engine.py.
+
+A full pipeline run snapshots everything the feature stage needs to continue
+from where it stopped: the last few admissions per city (enough to seed the
+72h rolling window, delta and growth features), the running maxima behind the
+humidity/rainfall proxies, the latest risk per hospital for hotspot
+clustering, and how far into each source CSV we have already read.
+An incremental run then only parses and scores the rows appended since.
+"""
+
+import json
+import os
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+# Longest look-back used by the temporal features (rolling_cases_72h)
+ROLLING_WINDOW = 3
+
+
+class FeatureStore:
+    def __init__(self, path):
+        self.path = path
+        # city -> {"last_date": "YYYY-MM-DD", "recent": [[date, admissions], ...]}
+        self.cities = {}
+        # hospital_id -> {"city", "lat", "lng", "riskScore"}
+        self.hospitals = {}
+        # hospital_id -> city, for source rows that carry no city column
+        self.city_map = {}
+        # source key -> {"path", "size", "columns", "date_format"}
+        self.sources = {}
+        self.max_water_temp = None
+        self.max_turbidity = None
+        self.merged_columns = []
+        # Formats written by the last full run, which incremental runs append to
+        self.output_formats = ['csv']
+
+    @classmethod
+    def load(cls, path):
+        """Returns the stored state, or None if no full run has written one yet."""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            raw = json.load(f)
+        store = cls(path)
+        for key, value in raw.items():
+            setattr(store, key, value)
+        return store
+
+    def save(self):
+        state = {
+            "cities": self.cities,
+            "hospitals": self.hospitals,
+            "city_map": self.city_map,
+            "sources": self.sources,
+            "max_water_temp": self.max_water_temp,
+            "max_turbidity": self.max_turbidity,
+            "merged_columns": self.merged_columns,
+            "output_formats": self.output_formats,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    # ── Source tracking ────────────────────────────────────────────────────
+    def record_source(self, key, path, columns, raw_first_date=None):
+        """Remembers how much of `path` has been consumed and how to parse its dates."""
+        previous = self.sources.get(key, {})
+        date_format = previous.get("date_format") if previous.get("path") == path else None
+        if raw_first_date is not None:
+            date_format = guess_datetime_format(str(raw_first_date)) or date_format
+        self.sources[key] = {
+            "path": path,
+            "size": os.path.getsize(path),
+            "columns": list(columns),
+            "date_format": date_format,
+        }
+
+    def read_new_rows(self, key, path):
+        """
+        Reads only the bytes appended to `path` since the last run.
+        Falls back to a full read when the file was replaced or truncated;
+        `filter_new` then drops anything already processed.
+        """
+        src = self.sources.get(key)
+        size = os.path.getsize(path)
+        tail_ok = src is not None and src.get("path") == path and src["size"] <= size
+        if tail_ok and src["size"] > 0:
+            with open(path, 'rb') as f:
+                f.seek(src["size"] - 1)
+                # Appended rows must start on a fresh line to be parsed on their own
+                tail_ok = f.read(1) == b'\n'
+
+        if tail_ok:
+            if src["size"] == size:
+                df = pd.DataFrame(columns=src["columns"])
+            else:
+                with open(path, 'rb') as f:
+                    f.seek(src["size"])
+                    df = pd.read_csv(f, header=None, names=src["columns"])
+            raw_first_date = None
+        else:
+            df = pd.read_csv(path)
+            raw_first_date = df['date'].iloc[0] if not df.empty else None
+
+        date_format = src.get("date_format") if tail_ok else None
+        self.record_source(key, path, df.columns, raw_first_date)
+        df['date'] = pd.to_datetime(df['date'], format=date_format)
+        return df
+
+    # ── Rolling state ──────────────────────────────────────────────────────
+    def filter_new(self, merged_df):
+        """Keeps only rows dated after the last processed day of their city."""
+        last_dates = pd.to_datetime(merged_df['city'].map(
+            {city: st["last_date"] for city, st in self.cities.items()}
+        ))
+        keep = last_dates.isna() | (merged_df['date'] > last_dates)
+        return merged_df[keep].copy()
+
+    def context_frame(self):
+        """
+        The last ROLLING_WINDOW rows per city, flagged with `_context`, to be
+        prepended to new rows so rolling/diff/shift see the previous days.
+        """
+        rows = [
+            {"city": city, "date": date, "admissions": admissions, "_context": True}
+            for city, st in self.cities.items()
+            for date, admissions in st["recent"]
+        ]
+        if not rows:
+            return pd.DataFrame({
+                "city": pd.Series(dtype=object),
+                "date": pd.Series(dtype='datetime64[ns]'),
+                "admissions": pd.Series(dtype='int64'),
+                "_context": pd.Series(dtype=bool),
+            })
+        ctx = pd.DataFrame(rows)
+        ctx['date'] = pd.to_datetime(ctx['date'])
+        return ctx
+
+    def update_maxima(self, df):
+        """Folds new rows into the running maxima and returns (max_water_temp, max_turbidity)."""
+        if 'water_temp_C' in df.columns and not df['water_temp_C'].dropna().empty:
+            new_max = float(df['water_temp_C'].max())
+            self.max_water_temp = new_max if self.max_water_temp is None else max(self.max_water_temp, new_max)
+        if not df['turbidity_NTU'].dropna().empty:
+            new_max = float(df['turbidity_NTU'].max())
+            self.max_turbidity = new_max if self.max_turbidity is None else max(self.max_turbidity, new_max)
+        return self.max_water_temp, self.max_turbidity
+
+    def update(self, frame, latest_snapshot=None):
+        """
+        Records the tail of `frame` (sorted by city, date, context rows included)
+        as the new per-city rolling state, and the latest risk per hospital.
+        """
+        tail = frame.groupby('city').tail(ROLLING_WINDOW)
+        for city, group in tail.groupby('city'):
+            self.cities[city] = {
+                "last_date": group['date'].max().strftime('%Y-%m-%d'),
+                "recent": [
+                    [d.strftime('%Y-%m-%d'), a.item() if hasattr(a, 'item') else a]
+                    for d, a in zip(group['date'], group['admissions'])
+                ],
+            }
+        if latest_snapshot is None:
+            return
+        for _, row in latest_snapshot.iterrows():
+            self.hospitals[str(row['hospital_id'])] = {
+                "city": row['city'],
+                "lat": float(row['lat']),
+                "lng": float(row['lng']),
+                "riskScore": float(row['riskScore']),
+            }
+
+    def latest_snapshot(self):
+        """Latest known row per hospital, shaped like ml_engine's STEP 8 input."""
+        return pd.DataFrame([
+            {"hospital_id": hid, **st} for hid, st in self.hospitals.items()
+        ])
@@ -1,5 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import sys
 import os
 import logging
@@ -16,8 +17,13 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 IS_PRODUCTION = ENVIRONMENT == "production"
 
 try:
-    from routes import ingest, dashboard, map, alerts, prediction, system, demo, scenario
+    from routes import ingest, dashboard, map, alerts, prediction, risk, live, system, demo, scenario
     from database import engine, Base
+    from services.data_loader import data_loader
+    from services.response_cache import ResponseCacheMiddleware
+    from services.simulation_service import simulation_service, MAX_FAST_FORWARD_DAYS
+    from services.sim_scheduler import sim_scheduler
+    from services.ensemble import ensemble_runner
     logger.info("Routes imported successfully")
 except Exception as e:
     logger.error(f"Error importing routes: {e}", exc_info=True)
@@ -30,12 +36,40 @@ try:
 except Exception as e:
     logger.error(f"Error initializing database: {e}", exc_info=True)
 
+@asynccontextmanager
+async def lifespan(app):
+    # The simulation clock runs on the app's event loop; SIM_AUTOSTART=1 starts it with the server
+    if os.getenv("SIM_AUTOSTART", "").lower() in ("1", "true", "yes"):
+        await sim_scheduler.start()
+        logger.info(f"Simulation scheduler started, one tick every {sim_scheduler.interval} s")
+    yield
+    await sim_scheduler.stop()
+    simulation_service.close()
+    ensemble_runner.close()
+
 app = FastAPI(
     title="VectorShield API",
     description="Intelligent Outbreak Prediction & Geographic Risk Management System",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Versioning Prefix /api/v1/
+API_PREFIX = "/api/v1"
+
+# Polled read endpoints, answered from cache until the data version changes.
+# Added before CORS so cached answers still get CORS headers.
+CACHED_PATHS = [
+    f"{API_PREFIX}/dashboard/summary",
+    f"{API_PREFIX}/map/zones",
+    f"{API_PREFIX}/map/heatmap",
+    f"{API_PREFIX}/alerts/live",
+    f"{API_PREFIX}/prediction/48h",
+    f"{API_PREFIX}/prediction/history",
+    f"{API_PREFIX}/risk/history",
+]
+app.add_middleware(ResponseCacheMiddleware, paths=CACHED_PATHS, version=lambda: data_loader.version)
+
 # Enable CORS with proper headers
 app.add_middleware(
     CORSMiddleware,
@@ -55,14 +89,13 @@ def read_root():
         "environment": ENVIRONMENT
     }
 
-# Versioning Prefix /api/v1/
-API_PREFIX = "/api/v1"
-
 try:
     app.include_router(dashboard.router, prefix=f"{API_PREFIX}/dashboard", tags=["Dashboard"])
     app.include_router(map.router, prefix=f"{API_PREFIX}/map", tags=["Geospatial"])
     app.include_router(alerts.router, prefix=f"{API_PREFIX}/alerts", tags=["Alerts"])
     app.include_router(prediction.router, prefix=f"{API_PREFIX}/prediction", tags=["ML Predictions"])
+    app.include_router(risk.router, prefix=f"{API_PREFIX}/risk", tags=["Risk History"])
+    app.include_router(live.router, prefix=f"{API_PREFIX}/live", tags=["Live Updates"])
     app.include_router(ingest.router, prefix=f"{API_PREFIX}/ingest", tags=["Data Ingestion"])
     app.include_router(system.router, prefix=f"{API_PREFIX}/system", tags=["System Maintenance"])
     app.include_router(demo.router, prefix=f"{API_PREFIX}/demo", tags=["Demo Mode"])
@@ -72,10 +105,9 @@ except Exception as e:
     logger.error(f"Error including routers: {e}", exc_info=True)
 
 @app.post(f"{API_PREFIX}/simulate-tick")
-def simulate_tick():
+def simulate_tick(days: int = Query(1, ge=1, le=MAX_FAST_FORWARD_DAYS, description="Days to fast-forward")):
     try:
-        from services.simulation_service import simulation_service
-        return simulation_service.simulate_tick()
+        return simulation_service.simulate_tick(days)
     except Exception as e:
         logger.error(f"Error in simulate_tick: {e}", exc_info=True)
         return {"error": str(e)}, 500
@@ -1,10 +1,37 @@
+"""
+ml_engine.py
+------------
+VectorShield ML pipeline.
+
+Importing this module has no side effects: it only resolves default paths.
+The pipeline is exposed as functions that the API server and benchmarks can
+call directly:
+
+    merged_df, _ = load_sources()            # STEP 1: read and merge the CSVs
+    features_df = build_features(merged_df)  # STEP 2-3: geo + engineered features
+    models = train(features_df)              # STEP 4-7: fit scalers and models
+    scored_df = score(features_df, models)   # forecast, risk score/level, anomalies
+    zones_df = cluster(scored_df)            # STEP 8: hotspot zones
+
+Run as a script for the full pipeline (see parse_args() for the flags).
+"""
+
 import pandas as pd
-import numpy as np
 import os
+import argparse
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestRegressor, IsolationForest
-from sklearn.cluster import DBSCAN
-from datetime import timedelta
+from feature_store import FeatureStore
+from features import resolve_cities, add_geo, engineer_features, add_temporal_features, add_environment_features
+from chunked_ingest import PartitionedSources, ReservoirSample
+from stage_graph import Stage, cores_per_stage, run_stages, report_timings
+from stage_cache import StageCache, stage_key
+from models.outbreak_model import X_cols, RF_PARAMS, train_forecaster
+from models.flat_forest import FORMAT_VERSION as FLAT_FORMAT_VERSION
+from models.anomaly_model import anomaly_features, ISO_PARAMS, train_anomaly_detector
+from models.risk_engine import raw_risk_score, classify_risk
+from models.hotspot_model import build_zones
+from models.artifacts import ARTIFACT_FORMAT, save_model, load_model as load_artifact, has_model, model_registry
+from utils.arrow_io import HAS_ARROW, ARROW_EXT, write_table, append_table, TableWriter
 
 # Set paths
 base_path = os.path.dirname(os.path.abspath(__file__))
@@ -20,12 +47,10 @@ if data_path is None:
     # fallback to base data path even if missing, to keep previous behavior
     data_path = os.path.join(base_path, 'data')
 output_path = os.path.join(base_path, 'ml_outputs')
+models_path = os.path.join(base_path, 'models')
+feature_store_path = os.path.join(output_path, 'feature_store.json')
+stage_cache_path = os.path.join(output_path, 'stage_cache.json')
 
-if not os.path.exists(output_path):
-    os.makedirs(output_path)
-
-# --- STEP 1: DATA LOADING ---
-print("Loading datasets...")
 hospital_candidates = [
     os.path.join(data_path, 'NEW HOSPITAL ALL.csv'),
     os.path.join(data_path, 'NEW_HOSPITAL_ALL.csv'),
@@ -46,249 +71,709 @@ def _pick_existing(path_list):
 hospital_path = _pick_existing(hospital_candidates)
 water_path = _pick_existing(water_candidates)
 
-print(f"Using hospital file: {os.path.basename(hospital_path)}")
-print(f"Using water file: {os.path.basename(water_path)}")
-
-hospital_df = pd.read_csv(hospital_path)
-water_df = pd.read_csv(water_path)
-
-# Parse timestamps
-hospital_df['date'] = pd.to_datetime(hospital_df['date'])
-water_df['date'] = pd.to_datetime(water_df['date'])
-
-# Normalize city names and get a mapping for hospital_id to city
-# New dataset layout: hospital file contains `city`, water file may not.
-# Prefer hospital_df for hospital_id -> city mapping.
-city_map = hospital_df.groupby('hospital_id')['city'].first().to_dict()
-hospital_df['city'] = hospital_df['hospital_id'].map(city_map)
-# If some hospital rows lacked city, fall back to water file if available
-if 'city' in water_df.columns:
-    water_city_map = water_df.groupby('hospital_id')['city'].first().to_dict()
-    # fill missing from water mapping
-    hospital_df['city'] = hospital_df.apply(lambda r: r['city'] if pd.notna(r['city']) and r['city'] != '' else water_city_map.get(r['hospital_id'], r['city']), axis=1)
-else:
-    # If water_df doesn't have city, populate it from hospital mapping so merge works
-    water_df['city'] = water_df['hospital_id'].map(city_map)
-
-# Handle "New Delhi" -> "Delhi" to match user's geo mapping
-hospital_df['city'] = hospital_df['city'].replace({'New Delhi': 'Delhi'})
-if 'city' in water_df.columns:
-    water_df['city'] = water_df['city'].replace({'New Delhi': 'Delhi'})
-
-# Merge on city + date
-print("Merging datasets...")
-merged_df = pd.merge(hospital_df, water_df, on=['city', 'date', 'hospital_id'], how='inner', suffixes=('', '_water'))
-
-# --- STEP 2: GEO ENRICHMENT ---
-print("Applying geo enrichment...")
-geo_mapping = {
-    'Delhi': [28.6139, 77.2090],
-    'Mumbai': [19.0760, 72.8777],
-    'Chennai': [13.0827, 80.2707],
-    'Kolkata': [22.5726, 88.3639],
-    'Bengaluru': [12.9716, 77.5946],
-    'Bangalore': [12.9716, 77.5946],
-    'Hyderabad': [17.3850, 78.4867],
-    'Pune': [18.5204, 73.8567],
-    'Jaipur': [26.9124, 75.7873],
-    'Lucknow': [26.8467, 80.9462],
-    'Nagpur': [21.1458, 79.0882],
-    'Kochi': [9.9312, 76.2673],
-    'Varanasi': [25.3176, 82.9739],
-    'Vellore': [12.9165, 79.1325],
-    'Puducherry': [11.9416, 79.8083],
-    'Gurugram': [28.4595, 77.0266],
-    'Chandigarh': [30.7333, 76.7794]
-}
-
-merged_df['lat'] = merged_df['city'].map(lambda x: geo_mapping.get(x, [20.5937, 78.9629])[0])
-merged_df['lng'] = merged_df['city'].map(lambda x: geo_mapping.get(x, [20.5937, 78.9629])[1])
-
-# --- STEP 3: FEATURE ENGINEERING ---
-print("Engineering features...")
-
-# Normalize possible temperature column names
-for df in (hospital_df, water_df):
-    if 'water_temperature_C' in df.columns and 'water_temp_C' not in df.columns:
-        df.rename(columns={'water_temperature_C': 'water_temp_C'}, inplace=True)
-
-# Sort by city and date for rolling calculations
-merged_df = merged_df.sort_values(['city', 'date'])
-
-# Temporal Features
-merged_df['rolling_cases_24h'] = merged_df.groupby('city')['admissions'].transform(lambda x: x.rolling(window=1).mean())
-merged_df['rolling_cases_72h'] = merged_df.groupby('city')['admissions'].transform(lambda x: x.rolling(window=3).mean())
-merged_df['delta_cases'] = merged_df.groupby('city')['admissions'].diff().fillna(0)
-merged_df['case_growth_rate'] = (merged_df['delta_cases'] / merged_df.groupby('city')['admissions'].shift(1).replace(0, 1)).fillna(0)
-
-# Water Features
-# water_contamination_index = (0.4 * turbidity) + (0.4 * fecal_coliform) + (0.2 * abs(7 - ph))
-merged_df['water_contamination_index'] = (
-    0.4 * merged_df['turbidity_NTU'] + 
-    0.4 * merged_df['fecal_coliform_cfu_100ml'] + 
-    0.2 * (7 - merged_df['water_pH']).abs()
-)
-
-# Environmental Proxy Features (Simulated)
-# humidity_index (simulated from water temp and DO)
-# rainfall_index (simulated from turbidity peaks)
-if 'water_temp_C' in merged_df.columns:
-    merged_df['humidity_index'] = (merged_df['water_temp_C'] / merged_df['water_temp_C'].max()).fillna(0.5)
-else:
-    merged_df['humidity_index'] = 0.5
-merged_df['rainfall_index'] = (merged_df['turbidity_NTU'] / merged_df['turbidity_NTU'].max()).fillna(0.1)
-merged_df['environmental_risk_index'] = (merged_df['humidity_index'] * 0.5 + merged_df['rainfall_index'] * 0.5)
-
-# Fill NaNs from rolling results
-merged_df = merged_df.fillna(0)
-
-# Normalize Final Feature Vector 0-1
 features_to_normalize = [
     'rolling_cases_24h', 'rolling_cases_72h', 'delta_cases', 'case_growth_rate',
     'water_contamination_index', 'humidity_index', 'rainfall_index', 'environmental_risk_index',
     'bed_occupancy_rate'
 ]
-scaler = MinMaxScaler()
-merged_df[features_to_normalize] = scaler.fit_transform(merged_df[features_to_normalize])
-
-# --- STEP 4: 48-HOUR OUTBREAK FORECASTING ---
-print("Training forecasting model...")
-
-# Target: future_cases_48h (Shift admissions forward 2 days)
-merged_df['future_cases_48h'] = merged_df.groupby('city')['admissions'].shift(-2)
-
-# Drop rows where we don't have target (last 2 days)
-train_df = merged_df.dropna(subset=['future_cases_48h'])
-
-# Model setup
-rf = RandomForestRegressor(n_estimators=200, max_depth=12, random_state=42)
-X_cols = ['rolling_cases_72h', 'water_contamination_index', 'humidity_index', 'rainfall_index', 'bed_occupancy_rate']
-rf.fit(train_df[X_cols], train_df['future_cases_48h'])
-
-# Generate predictions for all rows (even where target is missing, using features)
-merged_df['predicted_cases_48h'] = rf.predict(merged_df[X_cols])
-
-# Fill any final NaNs just in case
-merged_df = merged_df.fillna(0)
-
-# Export predictions
-merged_df[['city', 'date', 'predicted_cases_48h']].to_csv(os.path.join(output_path, 'predictions.csv'), index=False)
-
-# --- STEP 5: RISK SCORE ENGINE ---
-print("Calculating risk scores...")
-
-# riskScore = 0.4 * predicted_cases + 0.3 * water_contamination_index + 0.2 * humidity_index + 0.1 * rainfall_index
-# Note: predicted_cases is raw case count, we should probably normalize it for the formula or use the trend.
-# The user formula: 0.4 * predicted_cases + ...
-# Let's use the predicted cases scaled to a reasonable range for the score if it's too high,
-# but the user said "Scale result to 0-100".
-merged_df['raw_risk_score'] = (
-    0.4 * merged_df['predicted_cases_48h'] +
-    0.3 * (merged_df['water_contamination_index'] * 100) + # multiplier because water_contamination_index is normalized [0,1]
-    0.2 * (merged_df['humidity_index'] * 100) +
-    0.1 * (merged_df['rainfall_index'] * 100)
-)
-
-# Final Scaling to 0-100
-risk_scaler = MinMaxScaler(feature_range=(0, 100))
-merged_df['riskScore'] = risk_scaler.fit_transform(merged_df[['raw_risk_score']])
-
-# --- STEP 6: RISK CLASSIFICATION ---
-print("Classifying risk levels...")
-
-def classify_risk(score):
-    if score >= 85: return 'Critical'
-    if score >= 70: return 'High'
-    if score >= 60: return 'High-Mod'
-    if score >= 45: return 'Moderate'
-    if score >= 30: return 'Low-Mod'
-    if score >= 15: return 'Low'
-    return 'Very Low'
-
-merged_df['riskLevel'] = merged_df['riskScore'].apply(classify_risk)
-
-# Export Risk Scores
-merged_df[['city', 'date', 'riskScore', 'riskLevel']].to_csv(os.path.join(output_path, 'riskScores.csv'), index=False)
-
-# --- STEP 7: ANOMALY DETECTION ---
-print("Detecting anomalies...")
-iso_forest = IsolationForest(contamination=0.1, random_state=42)
-anomaly_features = ['admissions', 'water_contamination_index', 'case_growth_rate']
-merged_df['anomaly_val'] = iso_forest.fit_predict(merged_df[anomaly_features])
-merged_df['is_anomaly'] = merged_df['anomaly_val'] == -1
-merged_df['anomaly_score'] = iso_forest.decision_function(merged_df[anomaly_features])
-
-# Export Anomalies
-merged_df[['city', 'date', 'is_anomaly', 'anomaly_score']].to_csv(os.path.join(output_path, 'anomalies.csv'), index=False)
-
-import pickle
-models_path = os.path.join(base_path, 'models')
-if not os.path.exists(models_path):
-    os.makedirs(models_path)
-
-with open(os.path.join(models_path, 'outbreak_rf.pkl'), 'wb') as f:
-    pickle.dump(rf, f)
-with open(os.path.join(models_path, 'anomaly_iso.pkl'), 'wb') as f:
-    pickle.dump(iso_forest, f)
-with open(os.path.join(models_path, 'scaler.pkl'), 'wb') as f:
-    pickle.dump(scaler, f)
-with open(os.path.join(models_path, 'risk_scaler.pkl'), 'wb') as f:
-    pickle.dump(risk_scaler, f)
-
-# --- STEP 8: HOTSPOT DETECTION ---
-print("Clustering hotspots...")
-# Latest snapshot per city/hospital
-latest_snapshot = merged_df.groupby(['city', 'hospital_id']).tail(1).copy()
-
-dbscan = DBSCAN(eps=0.5, min_samples=3)
-# Input: lat, lng, riskScore. 
-# We use raw lat/lng so eps=0.5 is degrees (~55km). 
-# We only scale riskScore if needed, but let's keep it simple as requested.
-cluster_data = latest_snapshot[['lat', 'lng', 'riskScore']]
-latest_snapshot['cluster'] = dbscan.fit_predict(cluster_data[['lat', 'lng']]) # Cluster on geo only
-
-# Aggregate cluster info
-hotspots = []
-for cluster_id in latest_snapshot['cluster'].unique():
-    if cluster_id == -1: continue # Noise
-    cluster_points = latest_snapshot[latest_snapshot['cluster'] == cluster_id]
-    hotspots.append({
-        'zone_id': f"ZONE_{cluster_id}",
-        'cluster_center_lat': cluster_points['lat'].mean(),
-        'cluster_center_lng': cluster_points['lng'].mean(),
-        'avg_risk': cluster_points['riskScore'].mean(),
-        'cluster_size': len(cluster_points)
-    })
-
-zones_df = pd.DataFrame(hotspots)
-# Fallback if no clusters
-if zones_df.empty:
-    print("No DBSCAN clusters found with eps=0.5 (cities too far apart). Creating fallback zones from high-risk cities.")
-    high_risk = latest_snapshot[latest_snapshot['riskScore'] > 60]
-    if high_risk.empty: high_risk = latest_snapshot.nlargest(5, 'riskScore')
-    zones_df = high_risk[['city', 'lat', 'lng', 'riskScore']].rename(columns={
-        'city': 'zone_id',
-        'lat': 'cluster_center_lat',
-        'lng': 'cluster_center_lng',
-        'riskScore': 'avg_risk'
-    })
-    zones_df['cluster_size'] = 1
-
-zones_df.to_csv(os.path.join(output_path, 'zones.csv'), index=False)
-
-# Export final merged features for backend
-merged_df.to_csv(os.path.join(output_path, 'merged_features.csv'), index=False)
-
-# --- STEP 9: QUALITY CHECKS ---
-print("\n--- QUALITY CHECKS ---")
-print(f"NaN Count: {merged_df.isna().sum().sum()}")
-print(f"Risk Score Range: {merged_df['riskScore'].min():.2f} - {merged_df['riskScore'].max():.2f}")
-print(f"Total Rows: {len(merged_df)}")
-print(f"Cities Processed: {merged_df['city'].unique()}")
-print(f"Files exported to {output_path}")
-
-print("\nSummary Stats:")
-print(merged_df[['predicted_cases_48h', 'riskScore']].describe())
-
-
+MODEL_NAMES = ['outbreak_rf', 'anomaly_iso', 'scaler', 'risk_scaler']
+OUTPUT_NAMES = ['merged_features', 'predictions', 'riskScores', 'anomalies', 'zones']
+# Training stages the stage cache can skip -> the model artifact they reuse instead
+CACHED_ARTIFACTS = {'forecast': 'outbreak_rf', 'anomaly': 'anomaly_iso'}
+# Per-row ml_outputs dataset -> columns it carries (None = every column)
+EXPORTS = {
+    'predictions': ['city', 'date', 'predicted_cases_48h'],
+    'riskScores': ['city', 'date', 'riskScore', 'riskLevel'],
+    'anomalies': ['city', 'date', 'is_anomaly', 'anomaly_score'],
+    'merged_features': None,
+}
 
+# ── Pipeline API ──────────────────────────────────────────────────────────────
+
+def load_sources(hospital_file=None, water_file=None):
+    """
+    STEP 1: reads the hospital and water CSVs and merges them on
+    city/date/hospital_id. Returns (merged_df, raw_sources), where raw_sources
+    keeps each file's raw columns and first raw date for the feature store.
+    """
+    hospital_file = hospital_file or hospital_path
+    water_file = water_file or water_path
+    print("Loading datasets...")
+    print(f"Using hospital file: {os.path.basename(hospital_file)}")
+    print(f"Using water file: {os.path.basename(water_file)}")
+
+    hospital_df = pd.read_csv(hospital_file)
+    water_df = pd.read_csv(water_file)
+    # Kept so incremental runs can parse appended rows with the same layout and date format
+    raw_sources = {
+        'hospital': (list(hospital_df.columns), hospital_df['date'].iloc[0] if not hospital_df.empty else None),
+        'water': (list(water_df.columns), water_df['date'].iloc[0] if not water_df.empty else None),
+    }
+
+    # Parse timestamps
+    hospital_df['date'] = pd.to_datetime(hospital_df['date'])
+    water_df['date'] = pd.to_datetime(water_df['date'])
+
+    # Normalize city names and get a mapping for hospital_id to city
+    hospital_df, water_df = resolve_cities(hospital_df, water_df)
+
+    # Merge on city + date
+    print("Merging datasets...")
+    merged_df = pd.merge(hospital_df, water_df, on=['city', 'date', 'hospital_id'], how='inner', suffixes=('', '_water'))
+
+    # Normalize possible temperature column names
+    for df in (hospital_df, water_df):
+        if 'water_temperature_C' in df.columns and 'water_temp_C' not in df.columns:
+            df.rename(columns={'water_temperature_C': 'water_temp_C'}, inplace=True)
+
+    return merged_df, raw_sources
+
+def build_features(merged_df):
+    """
+    STEP 2-3: geo enrichment and the engineered feature vector (not yet
+    normalized), plus the future_cases_48h training target.
+    """
+    # --- STEP 2: GEO ENRICHMENT ---
+    print("Applying geo enrichment...")
+    merged_df = add_geo(merged_df)
+
+    # --- STEP 3: FEATURE ENGINEERING ---
+    print("Engineering features...")
+    max_water_temp = merged_df['water_temp_C'].max() if 'water_temp_C' in merged_df.columns else None
+    max_turbidity = merged_df['turbidity_NTU'].max()
+    merged_df = engineer_features(merged_df, max_water_temp, max_turbidity)
+
+    # Target: future_cases_48h (Shift admissions forward 2 days)
+    merged_df['future_cases_48h'] = merged_df.groupby('city')['admissions'].shift(-2)
+    return merged_df
+
+def fit_scaler(features_df):
+    """Fits the 0-1 feature scaler; returns it with a normalized copy of features_df."""
+    # Normalize Final Feature Vector 0-1
+    scaler = MinMaxScaler()
+    normalized = features_df.copy()
+    normalized[features_to_normalize] = scaler.fit_transform(features_df[features_to_normalize])
+    return scaler, normalized
+
+def fit_risk_scaler(scored_df):
+    """Fits the 0-100 risk scaler on the raw risk scores of scored_df."""
+    # Final Scaling to 0-100
+    risk_scaler = MinMaxScaler(feature_range=(0, 100))
+    risk_scaler.fit(scored_df[['raw_risk_score']])
+    return risk_scaler
+
+def train(features_df, n_jobs=-1):
+    """
+    STEP 4-7: fits the feature scaler, the 48h forecaster, the anomaly
+    detector and the risk scaler on the output of build_features(). Returns
+    the models keyed by name (see MODEL_NAMES).
+    """
+    print("Training forecasting and anomaly models...")
+    scaler, normalized = fit_scaler(features_df)
+    # Drop rows where we don't have target (last 2 days)
+    train_df = normalized.dropna(subset=['future_cases_48h'])
+    rf, predictions = train_forecaster(train_df[X_cols], train_df['future_cases_48h'], normalized[X_cols], n_jobs)
+    iso_forest, _, _ = train_anomaly_detector(normalized[anomaly_features], n_jobs)
+
+    normalized['predicted_cases_48h'] = predictions
+    normalized = normalized.fillna(0)
+    normalized['raw_risk_score'] = raw_risk_score(normalized)
+    return {
+        'outbreak_rf': rf,
+        'anomaly_iso': iso_forest,
+        'scaler': scaler,
+        'risk_scaler': fit_risk_scaler(normalized),
+    }
+
+def score(features_df, models, partial_fit=False, classify=classify_risk):
+    """
+    Normalizes features_df with the trained scaler, then adds the 48h
+    forecast, the raw and 0-100 risk scores, the risk level and the anomaly
+    columns. With partial_fit, both scalers are first extended to cover these
+    rows, as incremental runs do. Returns a new frame.
+    """
+    scaler = models['scaler']
+    risk_scaler = models['risk_scaler']
+    scored_df = features_df.copy()
+    if partial_fit:
+        scaler.partial_fit(scored_df[features_to_normalize])
+    scored_df[features_to_normalize] = scaler.transform(scored_df[features_to_normalize])
+
+    scored_df['predicted_cases_48h'] = models['outbreak_rf'].predict(scored_df[X_cols])
+    # Fill any final NaNs just in case
+    scored_df = scored_df.fillna(0)
+
+    scored_df['raw_risk_score'] = raw_risk_score(scored_df)
+    if partial_fit:
+        risk_scaler.partial_fit(scored_df[['raw_risk_score']])
+    scored_df['riskScore'] = risk_scaler.transform(scored_df[['raw_risk_score']])
+    scored_df['riskLevel'] = scored_df['riskScore'].apply(classify)
+
+    iso_forest = models['anomaly_iso']
+    scored_df['anomaly_val'] = iso_forest.predict(scored_df[anomaly_features])
+    scored_df['is_anomaly'] = scored_df['anomaly_val'] == -1
+    scored_df['anomaly_score'] = iso_forest.decision_function(scored_df[anomaly_features])
+    return scored_df
+
+def latest_snapshot(scored_df):
+    """Latest row per city/hospital."""
+    return scored_df.groupby(['city', 'hospital_id']).tail(1).copy()
+
+def cluster(scored_df):
+    """STEP 8: hotspot zones over the latest snapshot per city/hospital."""
+    print("Clustering hotspots...")
+    return build_zones(latest_snapshot(scored_df))
+
+def save_models(models):
+    """Writes each model's artifact to models/ (see models/artifacts.py)."""
+    for name, model in models.items():
+        save_model(models_path, name, model)
+
+def load_model(name):
+    return load_artifact(models_path, name)
+
+def load_models(shared=False):
+    """
+    The trained models keyed by name, as written by the last run. With
+    shared, the process-wide read-only copy from model_registry is returned;
+    otherwise a private copy the caller may modify (e.g. partial_fit).
+    """
+    if shared:
+        return model_registry.get(models_path, MODEL_NAMES)
+    return {name: load_model(name) for name in MODEL_NAMES}
+
+def missing_models():
+    return [name for name in MODEL_NAMES if not has_model(models_path, name)]
+
+# ── Output files ──────────────────────────────────────────────────────────────
+
+def write_output(df, name, formats):
+    """Writes one ml_outputs dataset in each requested format."""
+    if 'arrow' in formats:
+        write_table(df, os.path.join(output_path, name + ARROW_EXT))
+    if 'csv' in formats:
+        df.to_csv(os.path.join(output_path, name + '.csv'), index=False)
+
+def append_output(df, name, formats):
+    """Appends rows to one ml_outputs dataset in each format the last full run wrote."""
+    if 'arrow' in formats:
+        append_table(df, os.path.join(output_path, name + ARROW_EXT))
+    if 'csv' in formats:
+        df.to_csv(os.path.join(output_path, name + '.csv'), mode='a', header=False, index=False)
+
+def remove_stale_arrow_outputs(formats):
+    """A CSV-only run must not leave older Arrow outputs behind; the API prefers them."""
+    if 'arrow' in formats:
+        return
+    for name in OUTPUT_NAMES:
+        stale = os.path.join(output_path, name + ARROW_EXT)
+        if os.path.exists(stale):
+            os.remove(stale)
+
+def outputs_exist(formats):
+    exts = [ARROW_EXT if fmt == 'arrow' else '.csv' for fmt in formats]
+    return (all(os.path.exists(os.path.join(output_path, n + e)) for n in OUTPUT_NAMES for e in exts)
+            and not missing_models())
+
+def export_scored(scored_df, formats):
+    """Writes the per-row ml_outputs datasets for a scored frame."""
+    for name, cols in EXPORTS.items():
+        write_output(scored_df[cols] if cols else scored_df, name, formats)
+
+def snapshot_store(scored_df, snapshot, raw_sources, hospital_file, water_file, formats):
+    """Snapshots rolling state so the next run can be incremental."""
+    max_water_temp = scored_df['water_temp_C'].max() if 'water_temp_C' in scored_df.columns else None
+    store = FeatureStore(feature_store_path)
+    store.record_source('hospital', hospital_file, *raw_sources['hospital'])
+    store.record_source('water', water_file, *raw_sources['water'])
+    store.city_map = scored_df.groupby('hospital_id')['city'].first().to_dict()
+    store.max_water_temp = float(max_water_temp) if max_water_temp is not None else None
+    store.max_turbidity = float(scored_df['turbidity_NTU'].max())
+    store.merged_columns = list(scored_df.columns)
+    store.output_formats = formats
+    store.update(scored_df, snapshot)
+    store.save()
+
+# ── Incremental mode ──────────────────────────────────────────────────────────
+
+def run_incremental(store, hospital_file, water_file):
+    """
+    Scores only the rows appended to the source CSVs since the last run.
+    The trained models are reused as-is; the feature and risk scalers are
+    extended with partial_fit so their running min/max cover the new rows.
+    Output CSVs are appended to rather than rewritten.
+    """
+    print("Incremental run: reading new rows...")
+    new_hospital = store.read_new_rows('hospital', hospital_file)
+    new_water = store.read_new_rows('water', water_file)
+    if new_hospital.empty or new_water.empty:
+        print("No new rows since the last run.")
+        store.save()
+        return
+    new_hospital, new_water = resolve_cities(new_hospital, new_water, store.city_map)
+    new_df = pd.merge(new_hospital, new_water, on=['city', 'date', 'hospital_id'], how='inner', suffixes=('', '_water'))
+    new_df = store.filter_new(new_df)
+
+    if new_df.empty:
+        print("No new rows since the last run.")
+        store.save()
+        return
+
+    print(f"Engineering features for {len(new_df)} new rows...")
+    new_df = add_geo(new_df)
+    max_water_temp, max_turbidity = store.update_maxima(new_df)
+
+    # Prepend the stored tail of each city so rolling/diff/shift see the previous days
+    new_df['_context'] = False
+    frame = pd.concat([store.context_frame(), new_df], ignore_index=True)
+    frame = engineer_features(frame, max_water_temp, max_turbidity)
+    new_df = frame[~frame['_context'].astype(bool)].drop(columns='_context').copy()
+
+    print("Scoring new rows...")
+    models = load_models()
+    # The 48h target is unknown until two more days arrive; only full runs train on it
+    new_df['future_cases_48h'] = 0.0
+    new_df = score(new_df, models, partial_fit=True)
+
+    print("Appending outputs...")
+    for name, cols in EXPORTS.items():
+        append_output(new_df.reindex(columns=cols or store.merged_columns), name, store.output_formats)
+
+    save_models({'scaler': models['scaler'], 'risk_scaler': models['risk_scaler']})
+
+    print("Clustering hotspots...")
+    store.city_map.update(new_df.groupby('hospital_id')['city'].first().to_dict())
+    store.update(frame, new_df.groupby(['city', 'hospital_id']).tail(1))
+    write_output(build_zones(store.latest_snapshot()), 'zones', store.output_formats)
+    store.save()
+
+    print(f"\nIncremental run complete: {len(new_df)} new rows "
+          f"({new_df['date'].min().date()} - {new_df['date'].max().date()}) appended to {output_path}")
+
+# ── Chunked mode ──────────────────────────────────────────────────────────────
+
+class ChunkedOutput:
+    """Streams one ml_outputs dataset to disk chunk by chunk in each requested format."""
+    def __init__(self, name, formats):
+        self.csv_path = os.path.join(output_path, name + '.csv') if 'csv' in formats else None
+        self.arrow = TableWriter(os.path.join(output_path, name + ARROW_EXT)) if 'arrow' in formats else None
+        self.header_written = False
+
+    def write(self, df):
+        if self.arrow is not None:
+            self.arrow.write(df)
+        if self.csv_path is not None:
+            df.to_csv(self.csv_path, mode='a' if self.header_written else 'w', header=not self.header_written, index=False)
+            self.header_written = True
+
+    def close(self):
+        if self.arrow is not None:
+            self.arrow.close()
+
+def run_chunked(args, formats):
+    """
+    Full pipeline over date-partitioned chunks of the sources.
+    Only one row chunk or one date partition (plus a few rows of per-city
+    state) is in memory at a time; the models are fitted on a bounded uniform
+    sample of rows, which is every row for inputs below --max-train-rows.
+    """
+    sources = PartitionedSources(args.partition_days, args.spill_dir)
+    try:
+        print("Partitioning datasets by date...")
+        sources.ingest('hospital', args.hospital, args.chunksize)
+        sources.ingest('water', args.water, args.chunksize)
+        parts = sorted(sources.partitions)
+        print(f"{len(parts)} partitions of {args.partition_days} days")
+
+        # Pass 1: merge each partition and add temporal features, carrying per-city rolling state
+        print("Merging and engineering temporal features...")
+        store = FeatureStore(feature_store_path)
+        for part in parts:
+            hospital_part = sources.load('hospital', part)
+            water_part = sources.load('water', part)
+            if hospital_part.empty or water_part.empty:
+                continue
+            hospital_part, water_part = resolve_cities(
+                hospital_part, water_part, sources.city_maps.get('hospital'), sources.city_maps.get('water')
+            )
+            merged = pd.merge(hospital_part, water_part, on=['city', 'date', 'hospital_id'], how='inner', suffixes=('', '_water'))
+            if merged.empty:
+                continue
+            merged = add_geo(merged)
+            merged['_context'] = False
+            frame = pd.concat([store.context_frame(), merged], ignore_index=True)[merged.columns]
+            frame = add_temporal_features(frame.sort_values(['city', 'date'], kind='mergesort'))
+            store.update(frame)
+            merged = frame[~frame['_context'].astype(bool)].drop(columns='_context')
+            store.update_maxima(merged)
+            sources.spill('merged', part, merged.reset_index(drop=True))
+        parts = [p for p in parts if sources.has('merged', p)]
+
+        # Pass 2: environmental features, 48h target (looking into the next partition), scaler and training sample
+        print("Engineering environmental features...")
+        scaler = MinMaxScaler()
+        sample = ReservoirSample(args.max_train_rows)
+        upcoming = sources.load('merged', parts[0]) if parts else None
+        for i, part in enumerate(parts):
+            merged = upcoming
+            upcoming = sources.load('merged', parts[i + 1]) if i + 1 < len(parts) else None
+            merged = add_environment_features(merged, store.max_water_temp, store.max_turbidity).fillna(0)
+
+            # Target: future_cases_48h (Shift admissions forward 2 days), across the partition boundary
+            ahead = upcoming.groupby('city').head(2)[['city', 'date', 'admissions']] if upcoming is not None else merged.iloc[:0][['city', 'date', 'admissions']]
+            ahead.index = range(len(merged), len(merged) + len(ahead))
+            combo = pd.concat([merged[['city', 'date', 'admissions']], ahead]).sort_values(['city', 'date'], kind='mergesort')
+            merged['future_cases_48h'] = combo.groupby('city')['admissions'].shift(-2)
+
+            scaler.partial_fit(merged[features_to_normalize])
+            sample.add(merged[list(dict.fromkeys(features_to_normalize + anomaly_features)) + ['future_cases_48h']])
+            sources.spill('merged', part, merged)
+
+        print("Training forecasting and anomaly models...")
+        train_sample = sample.frame()
+        train_sample[features_to_normalize] = scaler.transform(train_sample[features_to_normalize])
+        train_df = train_sample.dropna(subset=['future_cases_48h'])
+        rf, _ = train_forecaster(train_df[X_cols], train_df['future_cases_48h'])
+        iso_forest, _, _ = train_anomaly_detector(train_sample[anomaly_features])
+        del sample, train_sample, train_df
+
+        # Pass 3: normalize, forecast, detect anomalies, and fit the risk scaler
+        print("Scoring partitions...")
+        risk_scaler = MinMaxScaler(feature_range=(0, 100))
+        for part in parts:
+            merged = sources.load('merged', part)
+            merged[features_to_normalize] = scaler.transform(merged[features_to_normalize])
+            merged['predicted_cases_48h'] = rf.predict(merged[X_cols])
+            merged = merged.fillna(0)
+            merged['raw_risk_score'] = raw_risk_score(merged)
+            risk_scaler.partial_fit(merged[['raw_risk_score']])
+            merged['anomaly_val'] = iso_forest.predict(merged[anomaly_features])
+            merged['is_anomaly'] = merged['anomaly_val'] == -1
+            merged['anomaly_score'] = iso_forest.decision_function(merged[anomaly_features])
+            sources.spill('merged', part, merged)
+
+        # Pass 4: final risk scores, streamed straight to ml_outputs
+        print("Writing outputs...")
+        writers = {name: ChunkedOutput(name, formats) for name in EXPORTS}
+        snapshot = None
+        total_rows = 0
+        merged_columns = None
+        for part in parts:
+            merged = sources.load('merged', part)
+            merged['riskScore'] = risk_scaler.transform(merged[['raw_risk_score']])
+            merged['riskLevel'] = merged['riskScore'].apply(classify_risk)
+            # Same column order as a full run: risk columns before the anomaly ones
+            anomaly_cols = ['anomaly_val', 'is_anomaly', 'anomaly_score']
+            merged = merged[[c for c in merged.columns if c not in anomaly_cols] + anomaly_cols]
+            merged_columns = merged_columns or list(merged.columns)
+            for name, cols in EXPORTS.items():
+                writers[name].write(merged[cols] if cols else merged)
+            latest = merged.groupby(['city', 'hospital_id']).tail(1)
+            snapshot = latest if snapshot is None else pd.concat([snapshot, latest])
+            snapshot = snapshot.groupby(['city', 'hospital_id']).tail(1)
+            total_rows += len(merged)
+        for writer in writers.values():
+            writer.close()
+
+        save_models({'outbreak_rf': rf, 'anomaly_iso': iso_forest, 'scaler': scaler, 'risk_scaler': risk_scaler})
+
+        print("Clustering hotspots...")
+        write_output(build_zones(snapshot), 'zones', formats)
+        remove_stale_arrow_outputs(formats)
+
+        for key, path in (('hospital', args.hospital), ('water', args.water)):
+            store.record_source(key, path, *sources.layouts[key])
+        store.city_map = {h: c for h, c in zip(snapshot['hospital_id'], snapshot['city'])}
+        store.merged_columns = merged_columns
+        store.output_formats = formats
+        store.update(pd.DataFrame(columns=['city', 'date', 'admissions']), snapshot)
+        store.save()
+
+        print(f"\nChunked run complete: {total_rows} rows in {len(parts)} partitions exported to {output_path}")
+    finally:
+        sources.cleanup()
+
+# ── Full run as a stage graph ─────────────────────────────────────────────────
+# Each stage below is one node of the graph built in run_full(). The forecaster
+# and the anomaly detector only need the engineered features, so they train in
+# parallel worker processes while the parent goes on to the stages after them.
+
+def features_stage(hospital_file, water_file):
+    merged_df, raw_sources = load_sources(hospital_file, water_file)
+    scaler, merged_df = fit_scaler(build_features(merged_df))
+    return {'merged': merged_df, 'scaler': scaler, 'raw_sources': raw_sources}
+
+def forecast_inputs(results):
+    """Only the forecaster's columns are shipped to its worker process."""
+    merged_df = results['features']['merged']
+    # Drop rows where we don't have target (last 2 days)
+    train_df = merged_df.dropna(subset=['future_cases_48h'])
+    # Predictions cover all rows (even where target is missing, using features)
+    return train_df[X_cols], train_df['future_cases_48h'], merged_df[X_cols]
+
+def anomaly_inputs(results):
+    return (results['features']['merged'][anomaly_features],)
+
+def cached_forecast(X_all):
+    """Forecast stage on a cache hit: the stored forecaster, no training."""
+    rf = load_model('outbreak_rf')
+    return rf, rf.predict(X_all)
+
+def cached_anomalies(X):
+    """Anomaly stage on a cache hit: the stored detector, no training."""
+    iso_forest = load_model('anomaly_iso')
+    return iso_forest, iso_forest.predict(X), iso_forest.decision_function(X)
+
+def risk_stage(features, forecast):
+    """STEP 5-6: risk score from the forecast, scaled to 0-100, and its risk level."""
+    merged_df = features['merged']
+    _, predictions = forecast
+    merged_df['predicted_cases_48h'] = predictions
+
+    # Fill any final NaNs just in case
+    merged_df = merged_df.fillna(0)
+
+    # --- STEP 5: RISK SCORE ENGINE ---
+    print("Calculating risk scores...")
+    merged_df['raw_risk_score'] = raw_risk_score(merged_df)
+    risk_scaler = fit_risk_scaler(merged_df)
+    merged_df['riskScore'] = risk_scaler.transform(merged_df[['raw_risk_score']])
+
+    # --- STEP 6: RISK CLASSIFICATION ---
+    print("Classifying risk levels...")
+    merged_df['riskLevel'] = merged_df['riskScore'].apply(classify_risk)
+
+    features['merged'] = merged_df
+    return risk_scaler
+
+def hotspot_stage(merged_df):
+    snapshot = latest_snapshot(merged_df)
+    return snapshot, cluster(snapshot)
+
+def export_stage(features, forecast, anomaly, risk_scaler, hotspots, hospital_file, water_file, formats, reused=()):
+    """
+    Writes ml_outputs and the models, and snapshots the feature store. The
+    models of the stages in `reused` came from the stage cache and are
+    already on disk as they are, so they are not written again.
+    """
+    merged_df = features['merged']
+    rf, _ = forecast
+    iso_forest, labels, scores = anomaly
+    snapshot, zones_df = hotspots
+
+    # --- STEP 7: ANOMALY DETECTION ---
+    merged_df['anomaly_val'] = labels
+    merged_df['is_anomaly'] = merged_df['anomaly_val'] == -1
+    merged_df['anomaly_score'] = scores
+
+    print("Exporting outputs...")
+    export_scored(merged_df, formats)
+    models = {'outbreak_rf': rf, 'anomaly_iso': iso_forest, 'scaler': features['scaler'], 'risk_scaler': risk_scaler}
+    save_models({name: model for name, model in models.items() if name not in {CACHED_ARTIFACTS[stage] for stage in reused}})
+    write_output(zones_df, 'zones', formats)
+    remove_stale_arrow_outputs(formats)
+    snapshot_store(merged_df, snapshot, features['raw_sources'], hospital_file, water_file, formats)
+    return merged_df
+
+def stage_keys(cache, hospital_file, water_file, formats):
+    """
+    Cache key per stage: the source CSV contents, the code and column lists
+    that shape each stage's result, the model hyperparameters, and the keys of
+    upstream stages. The forecast key also covers how the forecaster is
+    written and read (artifacts.py, flat_forest.py and their format versions).
+    """
+    code = lambda name: cache.file_digest(os.path.join(base_path, name))
+    features = stage_key(
+        cache.file_digest(hospital_file), cache.file_digest(water_file),
+        code('ml_engine.py'), code('features.py'), features_to_normalize,
+    )
+    forecast = stage_key(
+        features, X_cols, RF_PARAMS, code('models/outbreak_model.py'),
+        code('models/artifacts.py'), code('models/flat_forest.py'), ARTIFACT_FORMAT, FLAT_FORMAT_VERSION,
+    )
+    anomaly = stage_key(features, anomaly_features, ISO_PARAMS, code('models/anomaly_model.py'))
+    export = stage_key(
+        features, forecast, anomaly, code('models/risk_engine.py'), code('models/hotspot_model.py'),
+        sorted(formats),
+    )
+    return {'features': features, 'forecast': forecast, 'anomaly': anomaly, 'export': export}
+
+def print_quality_checks(merged_df):
+    # --- STEP 9: QUALITY CHECKS ---
+    print("\n--- QUALITY CHECKS ---")
+    print(f"NaN Count: {merged_df.isna().sum().sum()}")
+    print(f"Risk Score Range: {merged_df['riskScore'].min():.2f} - {merged_df['riskScore'].max():.2f}")
+    print(f"Total Rows: {len(merged_df)}")
+    print(f"Cities Processed: {merged_df['city'].unique()}")
+    print(f"Files exported to {output_path}")
+
+    print("\nSummary Stats:")
+    print(merged_df[['predicted_cases_48h', 'riskScore']].describe())
+
+def run_full(hospital_file, water_file, formats, workers=None, force=False):
+    """
+    Full pipeline as a stage graph: features -> {forecast, anomaly} -> risk ->
+    hotspots -> export. Forecast and anomaly training run concurrently in
+    worker processes, fitting their trees on an even share of the cores.
+    Stages whose cache key matches the last run reuse its artifacts; when
+    nothing changed at all, the existing outputs are left as they are.
+    """
+    cache = StageCache(stage_cache_path)
+    keys = stage_keys(cache, hospital_file, water_file, formats)
+    if not force and cache.hit('export', keys['export']) and outputs_exist(formats):
+        cache.save()
+        print(f"Inputs, parameters and code unchanged since the last run; outputs in {output_path} are up to date.")
+        print("Pass --force to retrain anyway.")
+        return
+
+    reuse = {
+        name: not force and cache.hit(name, keys[name]) and has_model(models_path, artifact)
+        for name, artifact in CACHED_ARTIFACTS.items()
+    }
+    # The stages training at once share the cores instead of each taking all of them
+    n_jobs = cores_per_stage(sum(not hit for hit in reuse.values()), workers)
+    if reuse['forecast']:
+        forecast = Stage('forecast', cached_forecast, deps=['features'], inputs=lambda r: (r['features']['merged'][X_cols],))
+    else:
+        forecast = Stage('forecast', train_forecaster, deps=['features'],
+                         inputs=lambda r: forecast_inputs(r) + (n_jobs,), process=True)
+    if reuse['anomaly']:
+        anomaly = Stage('anomaly', cached_anomalies, deps=['features'], inputs=anomaly_inputs)
+    else:
+        anomaly = Stage('anomaly', train_anomaly_detector, deps=['features'],
+                        inputs=lambda r: anomaly_inputs(r) + (n_jobs,), process=True)
+
+    stages = [
+        Stage('features', features_stage, inputs=lambda r: (hospital_file, water_file)),
+        forecast,
+        anomaly,
+        Stage('risk', risk_stage, deps=['features', 'forecast']),
+        Stage('hotspots', hotspot_stage, deps=['risk'], inputs=lambda r: (r['features']['merged'],)),
+        Stage('export', export_stage, deps=['features', 'forecast', 'anomaly', 'risk', 'hotspots'],
+              inputs=lambda r: (r['features'], r['forecast'], r['anomaly'], r['risk'], r['hotspots'],
+                                hospital_file, water_file, formats, [name for name, hit in reuse.items() if hit])),
+    ]
+    for name, hit in reuse.items():
+        if hit:
+            print(f"Stage '{name}' unchanged since the last run; reusing its trained model.")
+    if not all(reuse.values()):
+        print("Training forecasting and anomaly models in parallel...")
+    results, timings = run_stages(stages, max_workers=workers)
+    merged_df = results['export']
+    cache.record(keys)
+    cache.save()
+
+    print_quality_checks(merged_df)
+    report_timings(timings)
+
+def run_selected(stages, hospital_file, water_file, formats):
+    """
+    Runs only the chosen stages, in-process through the API above. A stage
+    left out keeps what the last run wrote: `score cluster` re-scores with
+    the stored models, `train` only refits and saves them.
+    """
+    merged_df, raw_sources = load_sources(hospital_file, water_file)
+    features_df = build_features(merged_df)
+    if 'train' in stages:
+        models = train(features_df)
+        save_models(models)
+    if not {'score', 'cluster'} & stages:
+        return
+    if 'train' not in stages:
+        if missing_models():
+            raise SystemExit(f"Model files missing: {missing_models()}. Run the train stage first.")
+        models = load_models()
+
+    print("Scoring...")
+    scored_df = score(features_df, models)
+    snapshot = latest_snapshot(scored_df)
+    if 'score' in stages:
+        export_scored(scored_df, formats)
+        snapshot_store(scored_df, snapshot, raw_sources, hospital_file, water_file, formats)
+    if 'cluster' in stages:
+        write_output(cluster(snapshot), 'zones', formats)
+    remove_stale_arrow_outputs(formats)
+    print_quality_checks(scored_df)
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+STAGES = ['train', 'score', 'cluster']
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="VectorShield ML pipeline")
+    parser.add_argument('--hospital', default=hospital_path, help="Hospital time-series CSV (default: auto-detected in data/).")
+    parser.add_argument('--water', default=water_path, help="Water quality CSV (default: auto-detected in data/).")
+    parser.add_argument(
+        '--stages', nargs='+', choices=STAGES, default=STAGES,
+        help="Stages to run; features are always built. Left-out stages keep what the last run "
+             "wrote: `--stages score cluster` re-scores with the stored models, `--stages train` "
+             "only refits them."
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="Only process rows appended to the source CSVs since the last run, "
+             "reusing the trained models and the stored per-city rolling state."
+    )
+    parser.add_argument(
+        '--chunked', action='store_true',
+        help="Stream the source CSVs in date-partitioned chunks so peak memory stays "
+             "bounded regardless of input size."
+    )
+    parser.add_argument('--partition-days', type=int, default=30, help="Days per date partition in --chunked mode.")
+    parser.add_argument('--chunksize', type=int, default=200_000, help="CSV rows read at a time in --chunked mode.")
+    parser.add_argument(
+        '--max-train-rows', type=int, default=1_000_000,
+        help="Size of the uniform row sample the models are fitted on in --chunked mode."
+    )
+    parser.add_argument('--spill-dir', default=None, help="Scratch directory for --chunked partitions (default: system temp).")
+    parser.add_argument(
+        '--output-format', choices=['arrow', 'csv', 'both'], default='arrow',
+        help="On-disk format for ml_outputs. Arrow IPC files are memory-mapped by the "
+             "API's DataLoader; CSV is kept for export and for installs without pyarrow."
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="Worker processes for independent pipeline stages (default: one per CPU)."
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help="Ignore the stage cache and retrain every stage of a full run."
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = set(args.stages)
+
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    output_formats = {'arrow': ['arrow'], 'csv': ['csv'], 'both': ['arrow', 'csv']}[args.output_format]
+    if 'arrow' in output_formats and not HAS_ARROW:
+        print("pyarrow is not installed; writing CSV outputs only.")
+        output_formats = ['csv']
+
+    if args.incremental or args.chunked or stages != set(STAGES):
+        # These rewrite models and outputs outside the stage graph
+        StageCache(stage_cache_path).invalidate()
+
+    if args.incremental:
+        store = FeatureStore.load(feature_store_path)
+        if store is None or missing_models():
+            print("No feature store or trained models found; running the full pipeline instead.")
+        else:
+            run_incremental(store, args.hospital, args.water)
+            return
+
+    if args.chunked:
+        run_chunked(args, output_formats)
+        return
+
+    if stages != set(STAGES):
+        run_selected(stages, args.hospital, args.water, output_formats)
+        return
+
+    run_full(args.hospital, args.water, output_formats, args.workers, args.force)
+
+if __name__ == '__main__':
+    main()
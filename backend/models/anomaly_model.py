@@ -1 +1,17 @@
-# Anomaly detection model placeholder
+"""
+Anomaly detection model: an isolation forest flagging unusual combinations of
+admissions, water contamination and case growth.
+"""
+
+from sklearn.ensemble import IsolationForest
+
+# Features the detector is fitted on, in column order
+anomaly_features = ['admissions', 'water_contamination_index', 'case_growth_rate']
+ISO_PARAMS = {'contamination': 0.1, 'random_state': 42}
+
+
+def train_anomaly_detector(X, n_jobs=-1):
+    """Fits the detector on X and returns it with the labels (-1 = anomaly) and scores for X."""
+    iso_forest = IsolationForest(**ISO_PARAMS, n_jobs=n_jobs)
+    labels = iso_forest.fit_predict(X)
+    return iso_forest, labels, iso_forest.decision_function(X)
@@ -0,0 +1,191 @@
+"""
+On-disk model artifacts and the shared, read-only model loader.
+
+The 48h random forest, by far the largest model, is stored flattened (see
+flat_forest.py) as .npy arrays that are memory-mapped on load: nothing is
+parsed or copied, the OS pages node data in as trees are walked, and every
+process serving the API shares those pages. The sklearn forest is pickled
+alongside (`estimator.pkl`) and only read for the large batches FlatForest
+hands back to it. The small models (scalers, isolation forest) stay pickled.
+
+A `<name>.forest/` directory holds one subdirectory per saved version and a
+CURRENT file naming the published one. A save writes a new version next to
+the others and then replaces CURRENT, so files a running server has mapped
+or open are never renamed or overwritten (Windows refuses to). Versions
+older than the one just replaced are deleted on later saves, as far as the
+OS allows.
+
+`model_registry` hands every caller in a process the same loaded models and
+only reloads a model when its artifact changes on disk.
+"""
+
+import functools
+import json
+import os
+import pickle
+import shutil
+import threading
+from datetime import datetime
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from .flat_forest import FIELDS, FORMAT_VERSION, FlatForest, flatten_forest
+
+# Bumped whenever the on-disk layout of the artifacts changes, so cached
+# pipeline stages are retrained into the new one (3: versioned forests with estimator.pkl)
+ARTIFACT_FORMAT = 3
+
+FOREST_EXT = '.forest'
+PICKLE_EXT = '.pkl'
+# The original estimator inside a forest version
+ESTIMATOR_FILE = 'estimator' + PICKLE_EXT
+# Names the published version of a forest
+CURRENT_FILE = 'CURRENT'
+
+
+def _forest_dir(models_path, name):
+    return os.path.join(models_path, name + FOREST_EXT)
+
+
+def _pickle_path(models_path, name):
+    return os.path.join(models_path, name + PICKLE_EXT)
+
+
+def save_model(models_path, name, model):
+    """Writes `model` in its artifact format, replacing any older artifact of that name."""
+    os.makedirs(models_path, exist_ok=True)
+    if isinstance(model, RandomForestRegressor) and model.n_outputs_ == 1:
+        _save_forest(_forest_dir(models_path, name), model)
+        stale = _pickle_path(models_path, name)
+    else:
+        tmp_path = _pickle_path(models_path, name) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(model, f)
+        os.replace(tmp_path, _pickle_path(models_path, name))
+        stale = _forest_dir(models_path, name)
+    if os.path.isdir(stale):
+        shutil.rmtree(stale, ignore_errors=True)
+    elif os.path.exists(stale):
+        os.remove(stale)
+
+
+def _current_version(forest_dir):
+    """Name of the published version of a forest directory, or None."""
+    try:
+        with open(os.path.join(forest_dir, CURRENT_FILE), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _save_forest(path, forest):
+    arrays, meta = flatten_forest(forest)
+    os.makedirs(path, exist_ok=True)
+    previous = _current_version(path)
+    version = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    tmp_path = os.path.join(path, version + '.tmp')
+    os.makedirs(tmp_path)
+    for field in FIELDS:
+        np.save(os.path.join(tmp_path, field + '.npy'), arrays[field])
+    with open(os.path.join(tmp_path, ESTIMATOR_FILE), 'wb') as f:
+        pickle.dump(forest, f)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    os.rename(tmp_path, os.path.join(path, version))
+    # Publish: readers follow CURRENT, which is replaced in one step
+    pointer_tmp = os.path.join(path, CURRENT_FILE + '.tmp')
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(path, CURRENT_FILE))
+    # The version just replaced may still be in use; anything older goes
+    _prune(path, keep={CURRENT_FILE, version, previous})
+
+
+def _prune(path, keep):
+    """Deletes the entries of a forest directory not in `keep`; what the OS keeps open stays for a later save."""
+    for entry in os.listdir(path):
+        if entry in keep:
+            continue
+        entry_path = os.path.join(path, entry)
+        if os.path.isdir(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+
+def load_model(models_path, name):
+    """Loads one model: a memory-mapped FlatForest if flattened, else the pickle."""
+    forest_dir = _forest_dir(models_path, name)
+    if os.path.isdir(forest_dir):
+        version = _current_version(forest_dir)
+        if version is None:
+            raise FileNotFoundError(f"Forest '{name}' in {models_path} has no published version; retrain it")
+        version_dir = os.path.join(forest_dir, version)
+        with open(os.path.join(version_dir, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        arrays = {field: np.load(os.path.join(version_dir, field + '.npy'), mmap_mode='r') for field in FIELDS}
+        # Opened only when a large batch first needs it
+        load_estimator = functools.partial(_load_pickle, os.path.join(version_dir, ESTIMATOR_FILE))
+        return FlatForest(arrays, meta, load_estimator)
+    return _load_pickle(_pickle_path(models_path, name))
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def model_version(models_path, name):
+    """Version of a model's artifact (a forest's published version, a pickle's mtime), or None if it has none."""
+    version = _current_version(_forest_dir(models_path, name))
+    if version is not None:
+        return version
+    try:
+        return os.stat(_pickle_path(models_path, name)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def has_model(models_path, name):
+    """True if `name` has an artifact this code can load (a forest in an older layout doesn't count)."""
+    forest_dir = _forest_dir(models_path, name)
+    version = _current_version(forest_dir)
+    if version is not None:
+        with open(os.path.join(forest_dir, version, 'meta.json'), 'r') as f:
+            return json.load(f).get('format') == FORMAT_VERSION
+    return os.path.exists(_pickle_path(models_path, name))
+
+
+class ModelRegistry:
+    """
+    One shared copy of the trained models per process. get() re-stats the
+    artifacts (cheap) and reloads only the models whose files changed, so a
+    retrain is picked up without restarting the server. Callers must treat
+    the returned models as read-only.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (models_path, name) -> (version, model)
+        self._models = {}
+
+    def get(self, models_path, names):
+        """Returns {name: model}; raises FileNotFoundError if any artifact is missing."""
+        models = {}
+        with self._lock:
+            for name in names:
+                version = model_version(models_path, name)
+                if version is None:
+                    raise FileNotFoundError(f"No artifact for model '{name}' in {models_path}")
+                cached = self._models.get((models_path, name))
+                if cached is None or cached[0] != version:
+                    cached = (version, load_model(models_path, name))
+                    self._models[(models_path, name)] = cached
+                models[name] = cached[1]
+        return models
+
+
+# Global singleton instance
+model_registry = ModelRegistry()
@@ -0,0 +1,158 @@
+"""
+Flattened form of a trained RandomForestRegressor: the nodes of every tree
+stored back to back in plain NumPy arrays, one array per node field.
+
+Nodes are renumbered so the two children of a node sit next to each other:
+only the left child is stored and the right one is left + 1. Child indices
+are global (offsets into the shared arrays) and every leaf points to itself,
+so a row can be walked down any tree for a fixed number of steps without
+checking for leaves. Arrays are saved as separate .npy files and opened
+memory-mapped, which makes loading a matter of mapping the files.
+
+predict() walks every (tree, row) pair at once: one index array holds the
+current node of each pair and is advanced a level per step with gathers, so
+a batch costs max-depth NumPy operations whatever the number of trees. That
+removes sklearn's per-call overhead, which is what dominates the small
+batches the API predicts on (one row per city, one scenario upload).
+
+On large batches the gathers lose to sklearn's compiled tree walk: they
+break even around 2,000 rows and sklearn is about twice as fast from 5,000
+rows on (bench_forest_predict.py, one core). Batches of SKLEARN_MIN_ROWS or
+more (full-history scoring, the cached forecast) are therefore handed to the
+original estimator when one is available, loaded on first use.
+"""
+
+import threading
+import numpy as np
+
+# Bumped whenever the node layout changes; older artifacts must be re-saved
+FORMAT_VERSION = 2
+
+# .npy file per node field
+FIELDS = ('left', 'feature', 'threshold', 'value')
+
+# Rows walked per pass; bounds the (trees x rows) working arrays to a few MB
+CHUNK_ROWS = 2048
+
+# Batches at least this large are predicted by the sklearn estimator, if any
+SKLEARN_MIN_ROWS = 2048
+
+
+def _flatten_tree(tree, offset):
+    """Node arrays of one sklearn tree with sibling children adjacent, ids shifted by offset."""
+    children_left, children_right = tree.children_left, tree.children_right
+    is_leaf = children_left == -1
+    internal = np.flatnonzero(~is_leaf)
+
+    # Root stays 0; the children of the k-th internal node become 2k+1 and 2k+2
+    new_id = np.zeros(tree.node_count, dtype=np.int32)
+    pair = 2 * np.arange(len(internal), dtype=np.int32)
+    new_id[children_left[internal]] = pair + 1
+    new_id[children_right[internal]] = pair + 2
+
+    left = np.empty(tree.node_count, dtype=np.int32)
+    left[new_id] = np.where(is_leaf, new_id, new_id[children_left]) + offset
+    feature = np.empty(tree.node_count, dtype=np.int32)
+    feature[new_id] = np.where(is_leaf, 0, tree.feature)
+    # Nothing exceeds inf, so leaves always take the "left" (self) pointer
+    threshold = np.empty(tree.node_count)
+    threshold[new_id] = np.where(is_leaf, np.inf, tree.threshold)
+    value = np.empty(tree.node_count)
+    value[new_id] = tree.value[:, 0, 0]
+    return {'left': left, 'feature': feature, 'threshold': threshold, 'value': value}
+
+
+def flatten_forest(forest):
+    """Returns ({field: array}, meta) for a fitted single-output RandomForestRegressor."""
+    if forest.n_outputs_ != 1:
+        raise ValueError("Only single-output forests can be flattened")
+    parts = {field: [] for field in FIELDS}
+    roots, depths = [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        for field, array in _flatten_tree(tree, offset).items():
+            parts[field].append(array)
+        roots.append(offset)
+        depths.append(int(tree.max_depth))
+        offset += tree.node_count
+
+    arrays = {field: np.concatenate(chunks) for field, chunks in parts.items()}
+    feature_names = getattr(forest, 'feature_names_in_', None)
+    meta = {
+        'format': FORMAT_VERSION,
+        'roots': roots,
+        'depths': depths,
+        'n_features': int(forest.n_features_in_),
+        'feature_names': list(feature_names) if feature_names is not None else None,
+    }
+    return arrays, meta
+
+
+class FlatForest:
+    """
+    Read-only RandomForestRegressor replacement with the same predict().
+    `load_estimator`, if given, returns the forest it was flattened from,
+    used for batches of SKLEARN_MIN_ROWS rows or more.
+    """
+    def __init__(self, arrays, meta, load_estimator=None):
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Flat forest format {meta.get('format')} is outdated (expected {FORMAT_VERSION})")
+        # Plain ndarray views of the maps: memmap's subclass hooks slow every gather
+        self.left = np.asarray(arrays['left'])
+        self.feature = np.asarray(arrays['feature'])
+        self.threshold = np.asarray(arrays['threshold'])
+        self.value = np.asarray(arrays['value'])
+        self.roots = np.asarray(meta['roots'], dtype=np.int32)
+        self.max_depth = max(meta['depths'])
+        self.n_features_in_ = meta['n_features']
+        self.feature_names_in_ = meta['feature_names']
+        self._load_estimator = load_estimator
+        self._estimator = None
+        self._lock = threading.Lock()
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def _as_matrix(self, X):
+        if self.feature_names_in_ is not None and hasattr(X, 'columns'):
+            X = X[self.feature_names_in_]
+        # Trees compare float32 features to float64 thresholds, as sklearn does
+        return np.asarray(X, dtype=np.float32)
+
+    def _sklearn(self):
+        """The original estimator, loaded on first use; None if there is none."""
+        with self._lock:
+            if self._estimator is None and self._load_estimator is not None:
+                try:
+                    self._estimator = self._load_estimator()
+                except OSError:
+                    # Gone (an older version pruned by later retrains): the flat arrays still work
+                    self._load_estimator = None
+            return self._estimator
+
+    def predict(self, X):
+        if self._load_estimator is not None and len(X) >= SKLEARN_MIN_ROWS:
+            estimator = self._sklearn()
+            if estimator is not None:
+                return estimator.predict(X)
+        X = self._as_matrix(X)
+        out = np.empty(len(X))
+        for start in range(0, len(X), CHUNK_ROWS):
+            out[start:start + CHUNK_ROWS] = self._predict_chunk(X[start:start + CHUNK_ROWS])
+        return out
+
+    def _predict_chunk(self, X):
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        X_flat = np.ascontiguousarray(X).ravel()
+        # Walker k is tree k // n_rows on row k % n_rows
+        idx = np.repeat(self.roots, n_rows)
+        row_offset = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        for _ in range(self.max_depth):
+            # sklearn goes left on x <= threshold; the right child is left + 1
+            go_right = X_flat[row_offset + self.feature[idx]] > self.threshold[idx]
+            idx = self.left[idx] + go_right
+        # Summed tree by tree like sklearn's accumulation, then averaged
+        return self.value[idx].reshape(n_trees, n_rows).sum(axis=0) / n_trees
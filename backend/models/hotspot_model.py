@@ -1 +1,188 @@
-# Hotspot identification model placeholder
+"""
+Hotspot identification model: DBSCAN over the latest row per hospital, with
+high-risk cities as fallback zones when nothing clusters.
+
+Points are clustered on great-circle (haversine) distance through a ball
+tree, so eps is a real radius in km instead of degrees. Hospitals at the
+same location (every hospital of a city shares its coordinates) are
+clustered once, weighted by how many there are. Dense areas are resolved a
+grid cell at a time rather than a neighbour list per point, so time and
+memory stay modest with tens of thousands of hospitals packed into a few
+cities, where sklearn's DBSCAN would hold every neighbour list at once.
+
+Clusters depend only on where the hospitals are, not on their risk, so
+HotspotTracker keeps the labels between simulation ticks and each update
+only re-averages risk over them.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0
+# The old eps of 0.5 degrees, taken as km of latitude
+EPS_KM = 55.0
+MIN_SAMPLES = 3
+# Distance pairs evaluated at once when testing whether two cells touch
+CHUNK_PAIRS = 2_000_000
+# Cells close enough to hold points within eps of each other (one of each +/- pair)
+NEIGHBOUR_CELLS = [(dx, dy, dz) for dx in range(-2, 3) for dy in range(-2, 3) for dz in range(-2, 3)
+                   if (dx, dy, dz) > (0, 0, 0)]
+
+
+def _unit_vectors(locations):
+    lat, lng = locations[:, 0], locations[:, 1]
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+
+def _reach(a, b, radius):
+    """True if any location in `a` is within `radius` (great-circle, radians) of one in `b`."""
+    limit = np.sin(radius / 2) ** 2
+    step = max(1, CHUNK_PAIRS // len(b))
+    for start in range(0, len(a), step):
+        lat, lng = a[start:start + step, :1], a[start:start + step, 1:]
+        h = np.sin((b[:, 0] - lat) / 2) ** 2 + np.cos(lat) * np.cos(b[:, 0]) * np.sin((b[:, 1] - lng) / 2) ** 2
+        if (h <= limit).any():
+            return True
+    return False
+
+
+def _dbscan(locations, weights, radius, min_samples):
+    """
+    DBSCAN labels for distinct locations on haversine distance, same result
+    as sklearn's with sample_weight (a border point joins the lowest-numbered
+    neighbouring cluster, clusters numbered by their first core point).
+
+    Locations are binned into cubes on the unit sphere whose diagonal is the
+    eps chord, so everything sharing a cube is within reach: a cube holding
+    min_samples points is all core and needs no neighbour search, and the
+    clusters are found by joining neighbouring cubes instead of points.
+    """
+    side = 2 * np.sin(radius / 2) / np.sqrt(3) * (1 - 1e-9)
+    cells, cell_of = np.unique(np.floor(_unit_vectors(locations) / side).astype(np.int64), axis=0, return_inverse=True)
+    cell_of = cell_of.ravel()
+    is_core = np.bincount(cell_of, weights=weights)[cell_of] >= min_samples
+    rest = np.flatnonzero(~is_core)
+    if len(rest):
+        # Weighted neighbour count = plain count over the points with duplicates
+        expanded = BallTree(np.repeat(locations, weights, axis=0), metric='haversine')
+        is_core[rest] = expanded.query_radius(locations[rest], radius, count_only=True) >= min_samples
+    labels = np.full(len(locations), -1, dtype=np.int64)
+    core = np.flatnonzero(is_core)
+    if len(core) == 0:
+        return labels
+
+    # Join cubes holding core points that reach each other (union-find over cubes)
+    core_cells, core_cell_of = np.unique(cell_of[core], return_inverse=True)
+    members = np.split(core[np.argsort(core_cell_of, kind='stable')], np.cumsum(np.bincount(core_cell_of))[:-1])
+    keys = [tuple(key) for key in cells[core_cells].tolist()]
+    index = {key: i for i, key in enumerate(keys)}
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (x, y, z) in enumerate(keys):
+        for dx, dy, dz in NEIGHBOUR_CELLS:
+            j = index.get((x + dx, y + dy, z + dz))
+            if j is None:
+                continue
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j and _reach(locations[members[i]], locations[members[j]], radius):
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # Cluster ids in order of each cluster's first core point
+    component = np.array([find(i) for i in range(len(keys))])[core_cell_of]
+    first = np.full(len(keys), len(locations))
+    np.minimum.at(first, component, core)
+    _, core_labels = np.unique(first[component], return_inverse=True)
+    labels[core] = core_labels
+
+    # Border points take the lowest cluster among their core neighbours
+    border = np.flatnonzero(~is_core)
+    if len(border):
+        core_tree = BallTree(locations[core], metric='haversine')
+        for point, neighbours in zip(border, core_tree.query_radius(locations[border], radius)):
+            if len(neighbours):
+                labels[point] = core_labels[neighbours].min()
+    return labels
+
+
+def cluster_labels(lat, lng, eps_km=EPS_KM, min_samples=MIN_SAMPLES):
+    """DBSCAN label per point (-1 = noise), clusters numbered in order of first appearance."""
+    coords = np.radians(np.column_stack([lat, lng]).astype(np.float64))
+    if len(coords) == 0:
+        return np.empty(0, dtype=np.int64)
+    locations, inverse, counts = np.unique(coords, axis=0, return_inverse=True, return_counts=True)
+    labels = _dbscan(locations, counts, eps_km / EARTH_RADIUS_KM, min_samples)[inverse.ravel()]
+
+    # Renumber so ZONE_0 is the cluster met first in row order, as before
+    clustered = labels >= 0
+    ids, first = np.unique(labels[clustered], return_index=True)
+    renumber = np.full(ids.max() + 1 if len(ids) else 0, -1, dtype=np.int64)
+    renumber[ids[np.argsort(first)]] = np.arange(len(ids))
+    labels[clustered] = renumber[labels[clustered]]
+    return labels
+
+
+def zones_from_labels(snapshot, labels):
+    """Zone table for a snapshot whose rows carry the given cluster labels."""
+    clustered = labels >= 0
+    if not clustered.any():
+        return _fallback_zones(snapshot)
+    members = labels[clustered]
+    sizes = np.bincount(members)
+
+    def cluster_mean(column):
+        return np.bincount(members, weights=snapshot[column].to_numpy(np.float64)[clustered]) / sizes
+
+    return pd.DataFrame({
+        'zone_id': [f"ZONE_{cluster_id}" for cluster_id in range(len(sizes))],
+        'cluster_center_lat': cluster_mean('lat'),
+        'cluster_center_lng': cluster_mean('lng'),
+        'avg_risk': cluster_mean('riskScore'),
+        'cluster_size': sizes,
+    })
+
+
+def _fallback_zones(snapshot):
+    high_risk = snapshot[snapshot['riskScore'] > 60]
+    if high_risk.empty: high_risk = snapshot.nlargest(5, 'riskScore')
+    zones_df = high_risk[['city', 'lat', 'lng', 'riskScore']].rename(columns={
+        'city': 'zone_id',
+        'lat': 'cluster_center_lat',
+        'lng': 'cluster_center_lng',
+        'riskScore': 'avg_risk'
+    })
+    zones_df['cluster_size'] = 1
+    return zones_df
+
+
+def build_zones(latest_snapshot):
+    labels = cluster_labels(latest_snapshot['lat'], latest_snapshot['lng'])
+    if not (labels >= 0).any():
+        print(f"No DBSCAN clusters found within {EPS_KM:g} km (cities too far apart). Creating fallback zones from high-risk cities.")
+    return zones_from_labels(latest_snapshot, labels)
+
+
+class HotspotTracker:
+    """
+    Live hotspot zones for a stream of snapshots (one per simulated day).
+    Labels are recomputed only when the hospital locations change; otherwise
+    update() is a pass over the points to re-average their risk.
+    """
+    def __init__(self, eps_km=EPS_KM, min_samples=MIN_SAMPLES):
+        self.eps_km = eps_km
+        self.min_samples = min_samples
+        self._coords = None
+        self._labels = None
+
+    def update(self, snapshot):
+        coords = snapshot[['lat', 'lng']].to_numpy(np.float64)
+        if self._coords is None or not np.array_equal(coords, self._coords):
+            self._labels = cluster_labels(coords[:, 0], coords[:, 1], self.eps_km, self.min_samples)
+            self._coords = coords
+        return zones_from_labels(snapshot, self._labels)
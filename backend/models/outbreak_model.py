@@ -1 +1,22 @@
-# Outbreak prediction model placeholder
+"""
+Outbreak forecasting model: a random forest regressor predicting hospital
+admissions 48 hours ahead from the normalized feature vector.
+"""
+
+from sklearn.ensemble import RandomForestRegressor
+
+# Features the forecaster is trained on, in column order
+X_cols = ['rolling_cases_72h', 'water_contamination_index', 'humidity_index', 'rainfall_index', 'bed_occupancy_rate']
+RF_PARAMS = {'n_estimators': 200, 'max_depth': 12, 'random_state': 42}
+
+
+def train_forecaster(X_train, y_train, X_all=None, n_jobs=-1):
+    """
+    Fits the forecaster and returns it with predictions for every row of X_all
+    (None when X_all is not given).
+    Trees are built on n_jobs cores (all by default); with a fixed
+    random_state the result is the same whatever n_jobs is.
+    """
+    rf = RandomForestRegressor(**RF_PARAMS, n_jobs=n_jobs)
+    rf.fit(X_train, y_train)
+    return rf, rf.predict(X_all) if X_all is not None else None
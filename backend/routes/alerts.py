@@ -2,9 +2,10 @@ from fastapi import APIRouter
 from typing import List
 from services.alert_engine import alert_engine
 from schemas import Alert
+from utils.fast_json import records_response
 
 router = APIRouter()
 
 @router.get("/live", response_model=List[Alert])
 def get_alerts_live():
-    return alert_engine.generate_alerts()
+    return records_response(alert_engine.alert_columns())
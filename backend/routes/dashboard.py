@@ -1,5 +1,7 @@
-from fastapi import APIRouter
-from services.data_loader import data_loader
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from datetime import date
+from services.data_loader import data_loader, summarize
 from schemas import DashboardSummary
 import pandas as pd
 import os
@@ -11,37 +13,12 @@ LIVE_POD_PATH = os.path.join(_BACKEND_DIR, "data", "live_pod.csv")
 router = APIRouter()
 
 @router.get("/summary", response_model=DashboardSummary)
-def get_dashboard_summary():
-    risk_df = data_loader.get_latest_risk_scores()
-    zones_df = data_loader.get_zones()
-    anomaly_df = data_loader.get_latest_anomalies()
-    preds_df = data_loader.get_latest_predictions()
-
-    if risk_df.empty:
-        return {
-            "totalZones": 0,
-            "criticalZones": 0,
-            "highZones": 0,
-            "avgRisk": 0.0,
-            "totalAnomalies": 0,
-            "totalPredictedCases": 0.0
-        }
-
-    total_zones = len(risk_df['city'].unique())
-    critical_zones = len(risk_df[risk_df['riskLevel'] == 'Critical'])
-    high_zones = len(risk_df[risk_df['riskLevel'] == 'High'])
-    avg_risk = float(risk_df['riskScore'].mean())
-    total_anomalies = int(anomaly_df[anomaly_df['is_anomaly'] == True].shape[0]) if not anomaly_df.empty else 0
-    total_preds = float(preds_df['predicted_cases_48h'].sum()) if not preds_df.empty else 0.0
-
-    return {
-        "totalZones": total_zones,
-        "criticalZones": critical_zones,
-        "highZones": high_zones,
-        "avgRisk": round(avg_risk, 2),
-        "totalAnomalies": total_anomalies,
-        "totalPredictedCases": round(total_preds, 2)
-    }
+def get_dashboard_summary(day: Optional[date] = Query(None, alias="date", description="Summary of this past day instead of the latest")):
+    # One snapshot for all four datasets, so they are from the same day
+    summary = summarize(data_loader.snapshot(), day)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"No data for {day}")
+    return summary
 
 
 @router.get("/live-pod-data")
@@ -1,23 +1,42 @@
-from fastapi import APIRouter
-from services.simulation_service import simulation_service
+from fastapi import APIRouter, Query
+from services.simulation_service import simulation_service, MAX_FAST_FORWARD_DAYS
+from services.sim_scheduler import sim_scheduler
 from schemas import RiskExplanation, CorrelationData
 import random
 
 router = APIRouter()
 
 @router.post("/start")
-async def start_demo():
-    await simulation_service.start()
-    return {"status": "Demo simulation started", "city": simulation_service.target_city}
+async def start_demo(
+    interval: float = Query(None, gt=0, description="Seconds between ticks (SIM_TICK_SECONDS by default)"),
+    days: int = Query(None, ge=1, le=MAX_FAST_FORWARD_DAYS, description="Days each tick advances"),
+):
+    await sim_scheduler.start(interval, days)
+    return {"status": "Demo simulation started", "city": simulation_service.target_city, **sim_scheduler.stats()}
+
+@router.post("/pause")
+async def pause_demo():
+    sim_scheduler.pause()
+    return {"status": "Demo simulation paused", **sim_scheduler.stats()}
+
+@router.post("/resume")
+async def resume_demo():
+    sim_scheduler.resume()
+    return {"status": "Demo simulation resumed", **sim_scheduler.stats()}
 
 @router.post("/stop")
 async def stop_demo():
-    await simulation_service.stop()
-    return {"status": "Demo simulation stopped"}
+    await sim_scheduler.stop()
+    return {"status": "Demo simulation stopped", **sim_scheduler.stats()}
+
+@router.get("/status")
+def demo_status():
+    # Scheduler state and the latency of recent ticks
+    return sim_scheduler.stats()
 
 @router.post("/simulate-tick")
-def simulate_tick():
-    result = simulation_service.simulate_tick()
+def simulate_tick(days: int = Query(1, ge=1, le=MAX_FAST_FORWARD_DAYS, description="Days to fast-forward")):
+    result = simulation_service.simulate_tick(days)
     return result
 
 @router.get("/explanation/{location}", response_model=RiskExplanation)
@@ -0,0 +1,48 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+import os
+from services.data_loader import data_loader
+from services.alert_engine import alert_engine
+from services.live_feed import live_feed
+from routes.map import zone_columns
+from routes.prediction import prediction_columns
+from routes.dashboard import summarize, get_live_pod_data, LIVE_POD_PATH
+from utils.fast_json import records
+
+router = APIRouter()
+
+
+def live_state():
+    """What the dashboard pages show, in the same shape as the REST endpoints that serve it."""
+    snapshot = data_loader.snapshot()
+    zones_df = snapshot.get_risk_zones()
+    preds_df = snapshot.get_latest_predictions()
+    return {
+        "zones": records(zone_columns(zones_df)) if not zones_df.empty else [],
+        "predictions": records(prediction_columns(preds_df)) if not preds_df.empty else [],
+        "alerts": alert_engine.generate_alerts(snapshot),
+        "summary": summarize(snapshot),
+        "pod": get_live_pod_data(),
+    }
+
+
+def live_token():
+    """Changes whenever live_state() may have: new data or a new sensor reading."""
+    try:
+        pod_mtime = os.stat(LIVE_POD_PATH).st_mtime_ns
+    except OSError:
+        pod_mtime = None
+    return data_loader.version, pod_mtime
+
+
+live_feed.state = live_state
+live_feed.token = live_token
+
+@router.get("/stream")
+async def live_stream():
+    return StreamingResponse(
+        live_feed.stream(),
+        media_type="text/event-stream",
+        # Not cached, and not buffered by nginx-style proxies
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,40 +1,33 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
 from services.data_loader import data_loader
+from services.heat_tiles import heat_tiles, fitting_zoom, MAX_ZOOM
 from schemas import RiskZone
+from utils.fast_json import records_response, FastJSONResponse
 
 router = APIRouter()
 
+
+def zone_columns(result_df):
+    """/map/zones fields of data_loader.get_risk_zones() as {field: column}."""
+    return {
+        "location": result_df['city'].astype(str),
+        "lat": result_df['lat'].astype(float),
+        "lng": result_df['lng'].astype(float),
+        "riskScore": result_df['riskScore'].astype(float),
+        "riskLevel": result_df['riskLevel'].astype(str),
+    }
+
 @router.get("/zones", response_model=List[RiskZone])
 def get_map_zones():
     try:
-        risk_df = data_loader.get_latest_risk_scores()
-        merged_df = data_loader.get_merged()
+        result_df = data_loader.get_risk_zones()
         
-        if risk_df.empty or merged_df.empty:
-            print("Empty dataframes in get_map_zones")
-            return []
-
-        # Get geo data from merged features
-        if 'lat' not in merged_df.columns or 'lng' not in merged_df.columns:
-            print("Lat/Lng missing in merged_df")
+        if result_df.empty:
+            print("No risk scores with coordinates in get_map_zones")
             return []
 
-        geo_data = merged_df[['city', 'lat', 'lng']].drop_duplicates()
-        
-        # Merge with latest risk scores
-        result_df = risk_df.merge(geo_data, on='city', how='inner')
-        
-        zones = []
-        for _, row in result_df.iterrows():
-            zones.append({
-                "location": row['city'],
-                "lat": float(row['lat']),
-                "lng": float(row['lng']),
-                "riskScore": float(row['riskScore']),
-                "riskLevel": str(row['riskLevel'])
-            })
-        return zones
+        return records_response(zone_columns(result_df))
     except Exception as e:
         print(f"Error in get_map_zones: {e}")
         import traceback
@@ -42,22 +35,47 @@ def get_map_zones():
         return []
 
 @router.get("/heatmap")
-def get_map_heatmap():
+def get_map_heatmap(
+    bbox: Optional[str] = Query(None, description="Viewport as west,south,east,north in degrees"),
+    zoom: Optional[int] = Query(None, ge=0, le=MAX_ZOOM, description="Map zoom level; aggregates points into a grid"),
+):
+    """
+    Without parameters, [lat, lng, riskScore] of every hospital. With a zoom
+    level (and optionally a bbox, default the whole map), one
+    [lat, lng, riskScore, count] point per occupied grid cell in view: the
+    cell's hospitals' centroid, highest risk score and number. A box too
+    wide for the zoom is aggregated at a lower one; the X-Heatmap-Zoom
+    header gives the zoom used.
+    """
+    if zoom is not None or bbox is not None:
+        if zoom is None:
+            raise HTTPException(status_code=400, detail="bbox needs a zoom level")
+        bounds = _parse_bbox(bbox) if bbox is not None else (-180.0, -90.0, 180.0, 90.0)
+        zoom = fitting_zoom(zoom, *bounds)
+        cells = heat_tiles.cells(data_loader.snapshot(), zoom, *bounds)
+        return FastJSONResponse(
+            [[lat, lng, risk, int(count)] for lat, lng, risk, count in cells.tolist()],
+            headers={"X-Heatmap-Zoom": str(zoom)},
+        )
+
     try:
-        risk_df = data_loader.get_latest_risk_scores()
-        merged_df = data_loader.get_merged()
+        result_df = data_loader.get_risk_zones()
         
-        if risk_df.empty or merged_df.empty:
+        if result_df.empty:
             return []
 
-        if 'lat' not in merged_df.columns or 'lng' not in merged_df.columns:
-            return []
-
-        geo_data = merged_df[['city', 'lat', 'lng']].drop_duplicates()
-        result_df = risk_df.merge(geo_data, on='city', how='inner')
-        
         heatmap_data = result_df[['lat', 'lng', 'riskScore']].fillna(0).values.tolist()
         return heatmap_data
     except Exception as e:
         print(f"Error in get_map_heatmap: {e}")
         return []
+
+
+def _parse_bbox(bbox):
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north")
+    if not (west <= east and south <= north):
+        raise HTTPException(status_code=400, detail="bbox must have west <= east and south <= north")
+    return west, south, east, north
@@ -1,10 +1,21 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from datetime import date
+import numpy as np
 from services.data_loader import data_loader
-from schemas import Prediction
+from schemas import Prediction, PredictionPoint
+from utils.fast_json import records_response
 
 router = APIRouter()
 
+
+def prediction_columns(preds_df):
+    """/prediction/48h fields of the latest predictions as {field: column}."""
+    return {
+        "location": preds_df['city'].astype(str),
+        "predicted_cases_48h": preds_df['predicted_cases_48h'].astype(float),
+    }
+
 @router.get("/48h", response_model=List[Prediction])
 def get_prediction_48h():
     preds_df = data_loader.get_latest_predictions()
@@ -12,10 +23,21 @@ def get_prediction_48h():
     if preds_df.empty:
         return []
 
-    predictions = []
-    for _, row in preds_df.iterrows():
-        predictions.append({
-            "location": row['city'],
-            "predicted_cases_48h": row['predicted_cases_48h']
-        })
-    return predictions
+    return records_response(prediction_columns(preds_df))
+
+@router.get("/history", response_model=List[PredictionPoint])
+def get_prediction_history(
+    city: str,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    points: Optional[int] = Query(None, ge=1, description="Thin to at most this many days, keeping each stretch's peak"),
+):
+    history = data_loader.get_prediction_history(city, from_, to, points)
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"Unknown city: {city}")
+
+    dates, values = history
+    return records_response({
+        "date": np.datetime_as_string(dates, unit='D'),
+        "predicted_cases_48h": values,
+    })
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from datetime import date
+import numpy as np
+from services.data_loader import data_loader
+from models.risk_engine import classify_risk_levels
+from schemas import RiskPoint
+from utils.fast_json import records_response
+
+router = APIRouter()
+
+@router.get("/history", response_model=List[RiskPoint])
+def get_risk_history(
+    city: str,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = None,
+    points: Optional[int] = Query(None, ge=1, description="Thin to at most this many days, keeping each stretch's peak"),
+):
+    history = data_loader.get_risk_history(city, from_, to, points)
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"Unknown city: {city}")
+
+    dates, scores = history
+    return records_response({
+        "date": np.datetime_as_string(dates, unit='D'),
+        "riskScore": scores,
+        "riskLevel": classify_risk_levels(scores),
+    })
@@ -1,32 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 import pandas as pd
 import io
-import os
-import pickle
+import ml_engine
+from services.ensemble import ensemble_runner, MAX_DAYS, MAX_TRAJECTORIES
 
 router = APIRouter()
 
-# Geo mapping (same as ml_engine.py)
-GEO_MAPPING = {
-    'Delhi': [28.6139, 77.2090],
-    'Mumbai': [19.0760, 72.8777],
-    'Chennai': [13.0827, 80.2707],
-    'Kolkata': [22.5726, 88.3639],
-    'Bengaluru': [12.9716, 77.5946],
-    'Bangalore': [12.9716, 77.5946],
-    'Hyderabad': [17.3850, 78.4867],
-    'Pune': [18.5204, 73.8567],
-    'Jaipur': [26.9124, 75.7873],
-    'Lucknow': [26.8467, 80.9462],
-    'Nagpur': [21.1458, 79.0882],
-    'Kochi': [9.9312, 76.2673],
-    'Varanasi': [25.3176, 82.9739],
-    'Vellore': [12.9165, 79.1325],
-    'Puducherry': [11.9416, 79.8083],
-    'Gurugram': [28.4595, 77.0266],
-    'Chandigarh': [30.7333, 76.7794]
-}
-
 # --- Actual column names from the real CSVs ---
 # Hospital CSV:  date, hospital_id, admissions, bed_occupancy_rate, water_pH,
 #                turbidity_NTU, fecal_coliform_cfu_100ml, water_temp_C, ...
@@ -37,6 +16,17 @@ REQUIRED_HOSPITAL_COLS = ['date', 'hospital_id', 'admissions', 'bed_occupancy_ra
 REQUIRED_WATER_COLS    = ['date', 'hospital_id', 'water_pH', 'turbidity_NTU', 'fecal_coliform_cfu_100ml']
 
 
+def classify_risk(score):
+    # Scenario uploads use lower thresholds than the pipeline's classify_risk
+    if score >= 85: return 'Critical'
+    if score >= 70: return 'High'
+    if score >= 55: return 'High-Mod'
+    if score >= 40: return 'Moderate'
+    if score >= 25: return 'Low-Mod'
+    if score >= 10: return 'Low'
+    return 'Very Low'
+
+
 @router.post("/scenario-upload")
 async def scenario_upload(
     hospital_file: UploadFile = File(...),
@@ -98,111 +88,22 @@ async def scenario_upload(
 
         merged_df['city'] = merged_df['city'].replace({'New Delhi': 'Delhi'})
 
-        # ── 7. Geo enrichment ─────────────────────────────────────────────
-        merged_df['lat'] = merged_df['city'].map(lambda x: GEO_MAPPING.get(x, [20.5937, 78.9629])[0])
-        merged_df['lng'] = merged_df['city'].map(lambda x: GEO_MAPPING.get(x, [20.5937, 78.9629])[1])
-
-        # ── 8. Feature engineering ────────────────────────────────────────
-        merged_df = merged_df.sort_values(['city', 'date'])
-
-        merged_df['rolling_cases_24h'] = (
-            merged_df.groupby('city')['admissions']
-            .transform(lambda x: x.rolling(window=1).mean())
-        )
-        merged_df['rolling_cases_72h'] = (
-            merged_df.groupby('city')['admissions']
-            .transform(lambda x: x.rolling(window=3).mean())
-        )
-        merged_df['delta_cases'] = (
-            merged_df.groupby('city')['admissions'].diff().fillna(0)
-        )
-        prev = merged_df.groupby('city')['admissions'].shift(1).replace(0, 1)
-        merged_df['case_growth_rate'] = (merged_df['delta_cases'] / prev).fillna(0)
-
-        # Water contamination index
-        merged_df['water_contamination_index'] = (
-            0.4 * merged_df['turbidity_NTU'] +
-            0.4 * merged_df['fecal_coliform_cfu_100ml'] +
-            0.2 * (7 - merged_df['water_pH']).abs()
-        )
-
-        # Environmental proxies
-        # Use water_temp_C — may come from hospital OR water CSV after rename
-        temp_col = 'water_temp_C' if 'water_temp_C' in merged_df.columns else None
-        if temp_col:
-            max_temp = merged_df[temp_col].max()
-            merged_df['humidity_index'] = (merged_df[temp_col] / max_temp).fillna(0.5)
-        else:
-            merged_df['humidity_index'] = 0.5
-
-        max_turb = merged_df['turbidity_NTU'].max()
-        merged_df['rainfall_index'] = (merged_df['turbidity_NTU'] / max_turb).fillna(0.1)
-        merged_df['environmental_risk_index'] = (
-            merged_df['humidity_index'] * 0.5 + merged_df['rainfall_index'] * 0.5
-        )
-
-        merged_df = merged_df.fillna(0)
+        # ── 7. Geo enrichment + feature engineering (shared with ml_engine.py) ──
+        merged_df = ml_engine.build_features(merged_df)
 
-        # ── 9. Load production models ─────────────────────────────────────
-        base_path   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        models_path = os.path.join(base_path, 'models')
-
-        model_files = ['scaler.pkl', 'outbreak_rf.pkl', 'anomaly_iso.pkl', 'risk_scaler.pkl']
-        missing_models = [f for f in model_files if not os.path.exists(os.path.join(models_path, f))]
+        # ── 8. Load production models ─────────────────────────────────────
+        missing_models = ml_engine.missing_models()
         if missing_models:
             raise HTTPException(
                 status_code=500,
                 detail=f"Model files missing: {missing_models}. Run ml_engine.py first."
             )
+        models = ml_engine.load_models(shared=True)
 
-        with open(os.path.join(models_path, 'scaler.pkl'), 'rb') as f:
-            scaler = pickle.load(f)
-        with open(os.path.join(models_path, 'outbreak_rf.pkl'), 'rb') as f:
-            rf = pickle.load(f)
-        with open(os.path.join(models_path, 'anomaly_iso.pkl'), 'rb') as f:
-            iso_forest = pickle.load(f)
-        with open(os.path.join(models_path, 'risk_scaler.pkl'), 'rb') as f:
-            risk_scaler = pickle.load(f)
-
-        # ── 10. Normalize features ────────────────────────────────────────
-        features_to_normalize = [
-            'rolling_cases_24h', 'rolling_cases_72h', 'delta_cases', 'case_growth_rate',
-            'water_contamination_index', 'humidity_index', 'rainfall_index',
-            'environmental_risk_index', 'bed_occupancy_rate'
-        ]
-        # Clamp to scaler range to avoid transform errors
-        merged_df[features_to_normalize] = scaler.transform(merged_df[features_to_normalize])
-
-        # ── 11. ML Inference ──────────────────────────────────────────────
-        rf_cols = ['rolling_cases_72h', 'water_contamination_index',
-                   'humidity_index', 'rainfall_index', 'bed_occupancy_rate']
-        merged_df['predicted_cases_48h'] = rf.predict(merged_df[rf_cols])
-
-        iso_cols = ['admissions', 'water_contamination_index', 'case_growth_rate']
-        merged_df['anomaly_flag'] = iso_forest.predict(merged_df[iso_cols])
-        merged_df['is_anomaly']   = merged_df['anomaly_flag'] == -1
-
-        # ── 12. Risk scoring ──────────────────────────────────────────────
-        merged_df['raw_risk_score'] = (
-            0.4 * merged_df['predicted_cases_48h'] +
-            0.3 * (merged_df['water_contamination_index'] * 100) +
-            0.2 * (merged_df['humidity_index'] * 100) +
-            0.1 * (merged_df['rainfall_index'] * 100)
-        )
-        merged_df['riskScore'] = risk_scaler.transform(merged_df[['raw_risk_score']])
+        # ── 9. Normalize, forecast, score risk and flag anomalies ─────────
+        merged_df = ml_engine.score(merged_df, models, classify=classify_risk)
 
-        def classify_risk(score):
-            if score >= 85: return 'Critical'
-            if score >= 70: return 'High'
-            if score >= 55: return 'High-Mod'
-            if score >= 40: return 'Moderate'
-            if score >= 25: return 'Low-Mod'
-            if score >= 10: return 'Low'
-            return 'Very Low'
-
-        merged_df['riskLevel'] = merged_df['riskScore'].apply(classify_risk)
-
-        # ── 13. Build response from latest row ────────────────────────────
+        # ── 10. Build response from latest row ────────────────────────────
         latest = merged_df.iloc[-1]
 
         history_5d = merged_df.tail(5)
@@ -247,3 +148,13 @@ async def scenario_upload(
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+
+@router.post("/ensemble")
+def scenario_ensemble(
+    days: int = Query(30, ge=1, le=MAX_DAYS, description="Days ahead of the current simulated day"),
+    trajectories: int = Query(32, ge=1, le=MAX_TRAJECTORIES, description="Independently seeded runs"),
+    seed: int = Query(0, ge=0, description="Seed of the first run; run k uses seed + k"),
+):
+    # p10/p50/p90 per city and day of predicted cases and risk score, over the runs
+    return ensemble_runner.run(days, trajectories, seed)
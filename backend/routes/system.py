@@ -1,13 +1,15 @@
 from fastapi import APIRouter
 from services.data_loader import data_loader
 from services.simulation_service import simulation_service
+from services.live_feed import live_feed
 from schemas import SystemStatus
 
 router = APIRouter()
 
 @router.post("/reload", response_model=SystemStatus)
 def reload_data():
-    data_loader.load_data()
+    data_loader.reload()
+    live_feed.notify()
     return {
         "status": "Success: Data reloaded from ml_outputs",
         "last_load": data_loader.last_loaded.strftime("%Y-%m-%d %H:%M:%S")
@@ -24,3 +26,11 @@ def sim_state():
             'duration': st.get('duration')
         }
     return states
+
+@router.get("/memory")
+def memory_report():
+    # Bytes saved per dataset by compact storage (COMPACT_DATA=1); empty otherwise
+    return {
+        "compact": data_loader.compact,
+        "datasets": data_loader.memory_report,
+    }
@@ -12,6 +12,15 @@ class Prediction(BaseModel):
     location: str
     predicted_cases_48h: float
 
+class PredictionPoint(BaseModel):
+    date: str
+    predicted_cases_48h: float
+
+class RiskPoint(BaseModel):
+    date: str
+    riskScore: float
+    riskLevel: str
+
 class Alert(BaseModel):
     location: str
     severity: str
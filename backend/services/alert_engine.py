@@ -1,43 +1,47 @@
-from datetime import datetime
+import numpy as np
 from .data_loader import data_loader
+from utils.fast_json import records
 
 class AlertEngine:
-    def generate_alerts(self):
-        risk_df = data_loader.get_latest_risk_scores()
-        anomaly_df = data_loader.get_latest_anomalies()
+    def alert_columns(self, snapshot=None):
+        """Alerts for the latest day as {field: column}, one entry per alerting city."""
+        snapshot = snapshot or data_loader.snapshot()
+        risk_df = snapshot.get_latest_risk_scores()
+        anomaly_df = snapshot.get_latest_anomalies()
         
         if risk_df.empty or anomaly_df.empty:
-            return []
+            return {"location": [], "severity": [], "message": [], "timestamp": []}
 
         # Merge risk and anomalies to check both conditions easily
         merged = risk_df.merge(anomaly_df, on=['city', 'date'], how='inner')
-        
-        alerts = []
-        for _, row in merged.iterrows():
-            risk_score = row.get('riskScore', 0)
-            is_anomaly = row.get('is_anomaly', False)
-            
-            if risk_score > 70 or is_anomaly:
-                severity = "Low"
-                message = ""
-                
-                if risk_score >= 85:
-                    severity = "Critical"
-                    message = f"Critical risk detected in {row['city']}. Immediate action required."
-                elif risk_score >= 70:
-                    severity = "High"
-                    message = f"High risk alert for {row['city']}. Monitor status closely."
-                elif is_anomaly:
-                    severity = "Moderate"
-                    message = f"Statistical anomaly detected in {row['city']} admissions data."
-                
-                alerts.append({
-                    "location": row['city'],
-                    "severity": severity,
-                    "message": message,
-                    "timestamp": row['date'].strftime("%Y-%m-%d")
-                })
-        
-        return alerts
+
+        risk_score = merged['riskScore'].to_numpy(dtype=float) if 'riskScore' in merged else np.zeros(len(merged))
+        # astype(bool) follows Python truthiness, as the old per-row `or` did
+        is_anomaly = merged['is_anomaly'].astype(bool).to_numpy() if 'is_anomaly' in merged else np.zeros(len(merged), dtype=bool)
+        alerting = (risk_score > 70) | is_anomaly
+        merged = merged[alerting]
+        risk_score, is_anomaly = risk_score[alerting], is_anomaly[alerting]
+
+        severity = np.select(
+            [risk_score >= 85, risk_score >= 70, is_anomaly],
+            ["Critical", "High", "Moderate"],
+            default="Low"
+        )
+        templates = {
+            "Critical": "Critical risk detected in {}. Immediate action required.",
+            "High": "High risk alert for {}. Monitor status closely.",
+            "Moderate": "Statistical anomaly detected in {} admissions data.",
+            "Low": "",
+        }
+        cities = merged['city'].astype(str).tolist()
+        return {
+            "location": cities,
+            "severity": severity.tolist(),
+            "message": [templates[s].format(city) for s, city in zip(severity.tolist(), cities)],
+            "timestamp": merged['date'].dt.strftime("%Y-%m-%d").tolist(),
+        }
+
+    def generate_alerts(self, snapshot=None):
+        return records(self.alert_columns(snapshot))
 
 alert_engine = AlertEngine()
@@ -1,63 +1,648 @@
 import pandas as pd
+import numpy as np
+import bisect
+import itertools
 import os
+import threading
 from datetime import datetime
+from utils.arrow_io import HAS_ARROW, ARROW_EXT, open_table, table_to_frame
+from utils.compact import compact_frame, frame_bytes
+
+# Data versions are unique across reloads, so a version never names two states
+_versions = itertools.count(1)
+
+
+class _DateIndex:
+    """Row positions of a frame grouped by date, oldest date first."""
+    def __init__(self, dates):
+        values = np.asarray(dates, dtype='datetime64[ns]')
+        valid = np.flatnonzero(~np.isnat(values))
+        # Stable sort keeps each date's rows in frame order
+        self.order = valid[np.argsort(values[valid], kind='stable')]
+        self.dates, self.starts = np.unique(values[self.order], return_index=True)
+        self.ends = np.append(self.starts[1:], len(self.order))
+
+    def rows(self, i):
+        """Positions of the rows on the i-th date (negative i counts from the latest)."""
+        return self.order[self.starts[i]:self.ends[i]]
+
+
+class _CityHistory:
+    """
+    One value per city per day, grouped by city with dates ascending, so the
+    days of a city between two dates are found by binary search on its slice.
+    Cities with several hospitals are combined per day with `agg`.
+    """
+    def __init__(self, frame, column, agg):
+        if {'city', 'date', column}.issubset(frame.columns):
+            daily = frame.dropna(subset=['city', 'date']).groupby(['city', 'date'], sort=True)[column].agg(agg)
+            cities = daily.index.get_level_values('city').to_numpy()
+            self.dates = daily.index.get_level_values('date').to_numpy('datetime64[ns]')
+            self.values = daily.to_numpy(np.float64)
+        else:
+            cities = np.empty(0, dtype=object)
+            self.dates = np.empty(0, dtype='datetime64[ns]')
+            self.values = np.empty(0)
+        starts = np.flatnonzero(np.append(True, cities[1:] != cities[:-1])) if len(cities) else np.empty(0, dtype=int)
+        ends = np.append(starts[1:], len(cities))
+        # city -> (start, end) of its days in dates/values
+        self.bounds = dict(zip(cities[starts].tolist(), zip(starts.tolist(), ends.tolist())))
+
+    def between(self, city, start=None, end=None):
+        """(dates, values) of `city` with start <= date <= end; either bound may be None."""
+        lo, hi = self.bounds[city]
+        dates = self.dates[lo:hi]
+        first = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, 'ns'), 'left'))
+        last = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, 'ns'), 'right'))
+        last = max(first, last)
+        return dates[first:last], self.values[lo + first:lo + last]
+
+
+def downsample(values, points):
+    """
+    Positions of at most `points` of `values`, in order: the values are cut
+    into `points` runs of near-equal length and each run keeps its peak, so
+    spikes survive the thinning and every kept point is a real observation.
+    """
+    n = len(values)
+    if points is None or n <= points:
+        return np.arange(n)
+    edges = np.linspace(0, n, points + 1).astype(int)
+    runs = np.repeat(np.arange(points), np.diff(edges))
+    # Within each run, highest value first (earliest on ties)
+    order = np.lexsort((-np.asarray(values), runs))
+    return order[edges[:-1]]
+
+
+def _risk_days(df):
+    if not {'city', 'date', 'riskScore', 'riskLevel'}.issubset(df.columns):
+        return None
+    level = df['riskLevel'].astype(object)
+    by_day = df.assign(critical=level == 'Critical', high=level == 'High').groupby('date', sort=True)
+    return pd.DataFrame({
+        'zones': by_day['city'].nunique(),
+        'critical': by_day['critical'].sum(),
+        'high': by_day['high'].sum(),
+        'risk_sum': by_day['riskScore'].sum(),
+        'risk_count': by_day['riskScore'].count(),
+    })
+
+
+def _anomaly_days(df):
+    if not {'date', 'is_anomaly'}.issubset(df.columns):
+        return None
+    return pd.DataFrame({'anomalies': (df['is_anomaly'] == True).groupby(df['date'], sort=True).sum()})
+
+
+def _prediction_days(df):
+    if not {'date', 'predicted_cases_48h'}.issubset(df.columns):
+        return None
+    return pd.DataFrame({'predicted': df.groupby('date', sort=True)['predicted_cases_48h'].sum()})
+
+
+# Per-day aggregates behind the dashboard summary: dataset -> (columns read, function)
+DAILY_AGGREGATES = {
+    "risk_scores": (['city', 'date', 'riskScore', 'riskLevel'], _risk_days),
+    "anomalies": (['date', 'is_anomaly'], _anomaly_days),
+    "predictions": (['date', 'predicted_cases_48h'], _prediction_days),
+}
+
+
+class _DailyRollup:
+    """
+    Per-day aggregates of one dataset ({field: value} per date, oldest
+    first). The lists are append-only and shared by the snapshots of a
+    simulation run, each rollup seeing days `start` to `n`: extending it
+    with a new day costs the aggregation of that day's rows, dropping the
+    oldest days just moves `start`, and older snapshots keep seeing the days
+    they had.
+    """
+    def __init__(self, dates=(), rows=(), positions=None, n=None, start=0):
+        self._dates = list(dates)
+        self._rows = list(rows)
+        self._positions = positions if positions is not None else {d: i for i, d in enumerate(self._dates)}
+        self.n = len(self._dates) if n is None else n
+        self.start = start
+
+    @classmethod
+    def from_days(cls, days):
+        """Rollup of a per-day frame as returned by the DAILY_AGGREGATES functions."""
+        if days is None:
+            return cls()
+        dates = days.index.to_numpy('datetime64[ns]').astype(np.int64).tolist()
+        return cls(dates, days.to_dict('records'))
+
+    def extended(self, days):
+        """
+        Rollup with the days of `days` appended, or None if they don't all
+        come after the last day (the rows changed an existing day).
+        """
+        if days is None:
+            return None
+        dates = days.index.to_numpy('datetime64[ns]').astype(np.int64).tolist()
+        if self.n > self.start and dates and dates[0] <= self._dates[self.n - 1]:
+            return None
+        if self.n == len(self._dates) and self.start <= len(self._dates) // 2:
+            base = self
+        else:
+            # Another rollup already extended this one, or most days were
+            # dropped: continue on a copy of just the visible days
+            base = _DailyRollup(self._dates[self.start:self.n], self._rows[self.start:self.n])
+        for date, row in zip(dates, days.to_dict('records')):
+            base._positions[date] = len(base._dates)
+            base._dates.append(date)
+            base._rows.append(row)
+        return _DailyRollup(base._dates, base._rows, base._positions, base.n + len(dates), base.start)
+
+    def dropped_before(self, date):
+        """Rollup without the days before `date`."""
+        first = np.datetime64(date, 'ns').astype(np.int64)
+        start = bisect.bisect_left(self._dates, first, self.start, self.n)
+        return _DailyRollup(self._dates, self._rows, self._positions, self.n, start)
+
+    def at(self, date=None):
+        """Aggregates of `date` (the latest day if None), or None if there is no such day."""
+        if date is None:
+            return self._rows[self.n - 1] if self.n > self.start else None
+        i = self._positions.get(int(np.datetime64(date, 'ns').astype(np.int64)))
+        return self._rows[i] if i is not None and self.start <= i < self.n else None
+
+
+class DataSnapshot(dict):
+    """
+    One immutable version of the served outputs: a dict of DataFrames keyed
+    by dataset. Datasets backed by a memory-mapped Arrow table are converted
+    to pandas on first access only.
+
+    Readers that combine datasets grab a snapshot once per request
+    (data_loader.snapshot()) and read everything from it; nothing in it
+    changes afterwards, so they need no locks. Writers never modify a
+    published snapshot: DataLoader.publish() derives a new one with the
+    replaced frames and a new version, sharing the untouched frames, tables
+    and indexes with the old one. Only caches of values derived from the
+    snapshot's own frames (materialized tables, date indexes, latest slices,
+    city histories, daily rollups) are filled in lazily, which any reader may
+    do.
+    """
+    def __init__(self, tables, frames=None):
+        super().__init__()
+        self.tables = tables
+        if frames:
+            dict.update(self, frames)
+        self.version = next(_versions)
+        # dataset -> _DateIndex, (dataset, columns) -> latest-date rows
+        self.date_index = {}
+        self.latest = {}
+        # (dataset, column) -> _CityHistory
+        self.history = {}
+        # dataset -> _DailyRollup
+        self.rollups = {}
+        # Distinct (city, lat, lng) of merged
+        self.geo = None
+
+    def __missing__(self, key):
+        if key not in self.tables:
+            raise KeyError(key)
+        df = table_to_frame(self.tables[key])
+        # Same rows as the table, so indexes built from it stay valid
+        dict.__setitem__(self, key, df)
+        return df
+
+    def __setitem__(self, key, df):
+        raise TypeError("DataSnapshot is read-only; use data_loader.publish() to change the data")
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def replace(self, frames, appended=None, dropped_before=None):
+        """
+        New snapshot with `frames` ({dataset: DataFrame}) swapped in, sharing
+        everything else. `appended` ({dataset: DataFrame}) may give, for some
+        of them, the rows that were added to the old frame to make the new
+        one, and `dropped_before` the date before which rows were removed
+        from it; their daily rollups are then updated for just those days
+        instead of being rebuilt from the full history. Rows appended to
+        merged extend its city coordinates the same way; coordinates only
+        seen on dropped days are kept until the next load.
+        """
+        tables = {k: t for k, t in self.tables.items() if k not in frames}
+        kept = {k: df for k, df in dict.items(self) if k not in frames}
+        snapshot = DataSnapshot(tables, {**kept, **frames})
+        snapshot.date_index = {k: v for k, v in self.date_index.items() if k not in frames}
+        snapshot.latest = {k: v for k, v in self.latest.items() if k[0] not in frames}
+        snapshot.history = {k: v for k, v in self.history.items() if k[0] not in frames}
+        snapshot.rollups = {k: v for k, v in self.rollups.items() if k not in frames}
+        if "merged" not in frames:
+            snapshot.geo = self.geo
+        elif self.geo is not None and "merged" in (appended or {}):
+            rows = appended["merged"]
+            if set(GEO_COLUMNS).issubset(rows.columns):
+                snapshot.geo = pd.concat([self.geo, rows[GEO_COLUMNS]]).drop_duplicates(ignore_index=True)
+        for key, rows in (appended or {}).items():
+            if key in self.rollups and key in frames:
+                columns, aggregate = DAILY_AGGREGATES[key]
+                rollup = self.rollups[key].extended(aggregate(rows[[c for c in columns if c in rows.columns]]))
+                if rollup is not None:
+                    if dropped_before is not None:
+                        rollup = rollup.dropped_before(dropped_before)
+                    snapshot.rollups[key] = rollup
+        return snapshot
+
+    def frame(self, key, columns=None):
+        """Returns `columns` of a dataset, reading only those from the Arrow table if not yet materialized."""
+        if dict.__contains__(self, key):
+            df = self[key]
+            if columns is None or df.empty:
+                return df
+            return df[[c for c in columns if c in df.columns]]
+        if key in self.tables:
+            return table_to_frame(self.tables[key], columns)
+        return pd.DataFrame()
+
+    def dates(self, key):
+        """_DateIndex of a dataset, or None if it has no date column."""
+        index = self.date_index.get(key)
+        if index is None:
+            dates = self.frame(key, ['date'])
+            index = _DateIndex(dates['date']) if 'date' in dates.columns else None
+            self.date_index[key] = index
+        return index
+
+    def latest_rows(self, key, columns):
+        """
+        Rows of the most recent date, materialized once per snapshot (and
+        carried over to the next one if the dataset didn't change), so each
+        call costs a dict lookup instead of a scan of the full history.
+        Callers share the returned frame and must not modify it.
+        """
+        cache_key = (key, tuple(columns))
+        latest = self.latest.get(cache_key)
+        if latest is None:
+            index = self.dates(key)
+            if index is None or len(index.dates) == 0:
+                latest = self.frame(key, columns).iloc[:0]
+            elif not dict.__contains__(self, key) and key in self.tables:
+                # Pull just the latest rows out of the memory-mapped table
+                rows = index.rows(-1)
+                latest = table_to_frame(self.tables[key].take(rows), columns)
+                latest.index = rows
+            else:
+                latest = self.frame(key, columns).iloc[index.rows(-1)]
+            self.latest[cache_key] = latest
+        return latest
+
+    def city_history(self, key, column, agg):
+        """_CityHistory of a dataset column, built once per snapshot."""
+        cache_key = (key, column)
+        history = self.history.get(cache_key)
+        if history is None:
+            history = _CityHistory(self.frame(key, ['city', 'date', column]), column, agg)
+            self.history[cache_key] = history
+        return history
+
+    def rollup(self, key):
+        """_DailyRollup of a DAILY_AGGREGATES dataset, built once per load and extended by ticks."""
+        rollup = self.rollups.get(key)
+        if rollup is None:
+            columns, aggregate = DAILY_AGGREGATES[key]
+            rollup = _DailyRollup.from_days(aggregate(self.frame(key, columns)))
+            self.rollups[key] = rollup
+        return rollup
+
+    def get_latest_risk_scores(self):
+        return self.latest_rows("risk_scores", LATEST_COLUMNS["risk_scores"])
+
+    def get_latest_predictions(self):
+        return self.latest_rows("predictions", LATEST_COLUMNS["predictions"])
+
+    def get_latest_anomalies(self):
+        return self.latest_rows("anomalies", LATEST_COLUMNS["anomalies"])
+
+    def _history_between(self, key, column, agg, city, start, end, points):
+        history = self.city_history(key, column, agg)
+        if city not in history.bounds:
+            return None
+        dates, values = history.between(city, start, end)
+        keep = downsample(values, points)
+        return dates[keep], values[keep]
+
+    def get_prediction_history(self, city, start=None, end=None, points=None):
+        """
+        (dates, predicted cases) of `city` from `start` to `end` inclusive,
+        summed over its hospitals and thinned to at most `points` days.
+        None if the city is unknown.
+        """
+        return self._history_between("predictions", "predicted_cases_48h", 'sum', city, start, end, points)
+
+    def get_risk_history(self, city, start=None, end=None, points=None):
+        """As get_prediction_history, for the risk score averaged over the city's hospitals."""
+        return self._history_between("risk_scores", "riskScore", 'mean', city, start, end, points)
+
+    def city_coordinates(self):
+        """
+        Distinct (city, lat, lng) rows of merged, built once per load and
+        extended by ticks (see replace). Empty if merged has no coordinates.
+        """
+        if self.geo is None:
+            merged_df = self.frame("merged", GEO_COLUMNS)
+            if merged_df.empty or not set(GEO_COLUMNS).issubset(merged_df.columns):
+                self.geo = pd.DataFrame(columns=GEO_COLUMNS)
+            else:
+                self.geo = merged_df.drop_duplicates(ignore_index=True)
+        return self.geo
+
+    def get_risk_zones(self):
+        """Latest risk score of each hospital with its city's coordinates, as drawn on the map."""
+        risk_df = self.get_latest_risk_scores()
+        geo_data = self.city_coordinates()
+        if risk_df.empty or geo_data.empty:
+            return pd.DataFrame()
+        return risk_df.merge(geo_data, on='city', how='inner')
+
+    def get_zones(self):
+        return self.get("zones", pd.DataFrame())
+
+    def get_merged(self, columns=None):
+        return self.frame("merged", columns)
+
+
+def summarize(snapshot, day=None):
+    """
+    DashboardSummary fields for a DataSnapshot, on `day` or the latest day
+    (None if `day` has no risk scores). Read from the snapshot's daily
+    rollups, so the cost doesn't grow with the number of cities or days.
+    """
+    risk = snapshot.rollup("risk_scores").at(day)
+    if risk is None:
+        if day is not None:
+            return None
+        return {
+            "totalZones": 0,
+            "criticalZones": 0,
+            "highZones": 0,
+            "avgRisk": 0.0,
+            "totalAnomalies": 0,
+            "totalPredictedCases": 0.0
+        }
+
+    anomalies = snapshot.rollup("anomalies").at(day)
+    preds = snapshot.rollup("predictions").at(day)
+    avg_risk = risk['risk_sum'] / risk['risk_count'] if risk['risk_count'] else 0.0
+
+    return {
+        "totalZones": int(risk['zones']),
+        "criticalZones": int(risk['critical']),
+        "highZones": int(risk['high']),
+        "avgRisk": round(float(avg_risk), 2),
+        "totalAnomalies": int(anomalies['anomalies']) if anomalies else 0,
+        "totalPredictedCases": round(float(preds['predicted']), 2) if preds else 0.0
+    }
+
+
+# Columns of the latest-day slices the API serves. These datasets are column
+# subsets of merged, row for row, so compact mode stores them as views of it.
+LATEST_COLUMNS = {
+    "risk_scores": ['city', 'date', 'riskScore', 'riskLevel'],
+    "predictions": ['city', 'date', 'predicted_cases_48h'],
+    "anomalies": ['city', 'date', 'is_anomaly', 'anomaly_score'],
+}
+
+
+# Columns of merged behind DataSnapshot.city_coordinates
+GEO_COLUMNS = ['city', 'lat', 'lng']
+
+
+def _same_rows(df, merged, columns):
+    """True if `df` is exactly `merged[columns]`, row for row."""
+    if len(df) != len(merged) or not set(columns).issubset(df.columns) or not set(columns).issubset(merged.columns):
+        return False
+    return all(df[c].reset_index(drop=True).equals(merged[c].reset_index(drop=True)) for c in columns)
+
 
 class DataLoader:
-    def __init__(self, output_dir="ml_outputs"):
+    """
+    Serves the pipeline outputs from `self.data`, the current DataSnapshot.
+    Reloads and simulation ticks never modify it: they build a new snapshot
+    on the side and publish it with a single reference swap, so a reader
+    holding a snapshot sees either all old or all new data.
+
+    The get_* methods read from the current snapshot; a request that reads
+    several datasets should call snapshot() once and use its get_* methods.
+
+    In compact mode (`compact=True`, or COMPACT_DATA=1 in the environment)
+    every dataset is materialized and compacted (utils/compact.py) when
+    loaded or published, and risk_scores, predictions and anomalies are
+    views of merged instead of copies; memory_report holds the bytes saved
+    as of the last load.
+    """
+    def __init__(self, output_dir="ml_outputs", compact=None):
         self.output_dir = output_dir
-        self.data = {}
+        if compact is None:
+            compact = os.getenv("COMPACT_DATA", "").lower() in ("1", "true", "yes")
+        self.compact = compact
+        # dataset -> {"bytes_before", "bytes_after", "bytes_saved"}, compact mode only
+        self.memory_report = {}
+        self.data = DataSnapshot({})
         self.last_loaded = None
+        # Held by writers from reading the current snapshot to publishing the next
+        self.write_lock = threading.RLock()
+        # Reload bookkeeping: runs started and finished, and per run the
+        # callers still to return from it and its error if it failed
+        self._reload_cond = threading.Condition()
+        self._reloading = False
+        self._reloads_started = 0
+        self._reloads_done = 0
+        self._reload_callers = {}
+        self._reload_errors = {}
         self.load_data()
 
-    def load_data(self):
-        print(f"Loading ML outputs from {self.output_dir}...")
+    @property
+    def version(self):
+        """Version of the current snapshot: changes on every load and every publish."""
+        return self.data.version
+
+    def snapshot(self):
+        """The current DataSnapshot; stays valid and unchanged however the data moves on."""
+        return self.data
+
+    def publish(self, frames, appended=None, dropped_before=None, views=None, compacted=False):
+        """
+        Replaces datasets with the frames in `frames` ({dataset: DataFrame})
+        as a new snapshot and returns it. Writers that derive the frames from
+        the current snapshot hold write_lock around both, so two writers
+        never build on the same version and lose each other's change.
+        Writers that only added rows, and possibly dropped the oldest days,
+        say so with `appended` and `dropped_before` (see DataSnapshot.replace)
+        to keep the daily rollups incremental.
+
+        For compact mode, `views` ({dataset: columns}) names the datasets
+        that are those columns of frames["merged"], and `compacted` says
+        merged is already compact; neither is then checked or compacted again.
+        """
+        with self.write_lock:
+            if self.compact:
+                frames = self._compacted(frames, views, compacted)
+            snapshot = self.data.replace(frames, appended, dropped_before)
+            self.data = snapshot
+        return snapshot
+
+    def _compacted(self, frames, views=None, compacted=False):
+        """
+        Compact-mode version of `frames`: merged compacted (unless
+        `compacted`), the datasets in `views` and the LATEST_COLUMNS datasets
+        that match it row for row replaced by views of it (they then cost no
+        memory of their own), any other frame compacted on its own. Records
+        the sizes of what it compacts in memory_report; frames that came
+        compact are left out, as measuring them costs a pass over the data.
+        """
+        merged = frames.get("merged")
+        views = views or {}
+        out = {}
+        if merged is not None:
+            out["merged"] = merged if compacted else compact_frame(merged)
+        for key, df in frames.items():
+            if key == "merged":
+                continue
+            columns = views.get(key) or LATEST_COLUMNS.get(key)
+            if merged is not None and columns and (key in views or _same_rows(df, merged, columns)):
+                out[key] = out["merged"][columns]
+                if compacted:
+                    continue
+                after = 0
+            else:
+                out[key] = compact_frame(df)
+                after = frame_bytes(out[key])
+            before = frame_bytes(df)
+            self.memory_report[key] = {"bytes_before": before, "bytes_after": after, "bytes_saved": before - after}
+        if merged is not None and not compacted:
+            before, after = frame_bytes(merged), frame_bytes(out["merged"])
+            self.memory_report["merged"] = {"bytes_before": before, "bytes_after": after, "bytes_saved": before - after}
+        return out
+
+    def _read_outputs(self):
+        """A new, fully indexed DataSnapshot of the files in output_dir."""
         files = {
-            "merged": "merged_features.csv",
-            "predictions": "predictions.csv",
-            "risk_scores": "riskScores.csv",
-            "anomalies": "anomalies.csv",
-            "zones": "zones.csv"
+            "merged": "merged_features",
+            "predictions": "predictions",
+            "risk_scores": "riskScores",
+            "anomalies": "anomalies",
+            "zones": "zones"
         }
-        
-        for key, filename in files.items():
-            path = os.path.join(self.output_dir, filename)
-            if os.path.exists(path):
-                df = pd.read_csv(path)
+
+        tables = {}
+        frames = {}
+        for key, name in files.items():
+            arrow_path = os.path.join(self.output_dir, name + ARROW_EXT)
+            csv_path = os.path.join(self.output_dir, name + ".csv")
+            if HAS_ARROW and os.path.exists(arrow_path):
+                # Typed columns, memory-mapped: nothing is parsed until a column is read
+                tables[key] = open_table(arrow_path)
+            elif os.path.exists(csv_path):
+                df = pd.read_csv(csv_path)
                 # Convert date column to datetime if exists
                 if 'date' in df.columns:
                     df['date'] = pd.to_datetime(df['date'])
-                self.data[key] = df
+                frames[key] = df
             else:
-                print(f"Warning: {path} not found.")
-                self.data[key] = pd.DataFrame()
-        
-        self.last_loaded = datetime.now()
+                print(f"Warning: {csv_path} not found.")
+                frames[key] = pd.DataFrame()
+
+        if self.compact:
+            # Compacting needs the data in memory, so the tables are read in full
+            frames.update({key: table_to_frame(table) for key, table in tables.items()})
+            tables = {}
+            frames = self._compacted(frames)
+            for key, sizes in self.memory_report.items():
+                print(f"Compact storage: {key} {sizes['bytes_before'] / 1024:.0f} KB -> "
+                      f"{sizes['bytes_after'] / 1024:.0f} KB ({sizes['bytes_saved'] / 1024:.0f} KB saved)")
+
+        data = DataSnapshot(tables, frames)
+        # Index now so the first polls after the swap don't pay for it
+        for key, columns in LATEST_COLUMNS.items():
+            data.latest_rows(key, columns)
+        for key in DAILY_AGGREGATES:
+            data.rollup(key)
+        data.city_coordinates()
+        return data
+
+    def load_data(self):
+        print(f"Loading ML outputs from {self.output_dir}...")
+        data = self._read_outputs()
+        # The swap: everything is read and indexed before readers can see it
+        with self.write_lock:
+            self.data = data
+            self.last_loaded = datetime.now()
         print("Data loaded successfully.")
 
+    def reload(self):
+        """
+        load_data for concurrent callers. One load runs at a time, and every
+        caller returns after a load that started after its call, so the files
+        as they were at call time are served. Callers arriving while a load
+        runs share the single load that follows it instead of each parsing
+        the outputs again. If that load fails, each of them raises its error,
+        however many loads have run since.
+        """
+        with self._reload_cond:
+            ticket = self._reloads_started + 1
+            self._reload_callers[ticket] = self._reload_callers.get(ticket, 0) + 1
+            try:
+                while self._reloads_done < ticket:
+                    if self._reloading:
+                        self._reload_cond.wait()
+                        continue
+                    self._reloading = True
+                    self._reloads_started += 1
+                    run = self._reloads_started
+                    error = None
+                    self._reload_cond.release()
+                    try:
+                        self.load_data()
+                    except Exception as e:
+                        error = e
+                    finally:
+                        self._reload_cond.acquire()
+                        self._reloading = False
+                        self._reloads_done = run
+                        if error is not None:
+                            self._reload_errors[run] = error
+                        self._reload_cond.notify_all()
+                error = self._reload_errors.get(ticket)
+            finally:
+                # The last caller of a run forgets its outcome
+                self._reload_callers[ticket] -= 1
+                if not self._reload_callers[ticket]:
+                    del self._reload_callers[ticket]
+                    self._reload_errors.pop(ticket, None)
+            if error is not None:
+                raise error
+
     def get_latest_risk_scores(self):
-        df = self.data.get("risk_scores")
-        if df.empty: return df
-        # Get the most recent date
-        latest_date = df['date'].max()
-        return df[df['date'] == latest_date]
+        return self.data.get_latest_risk_scores()
 
     def get_latest_predictions(self):
-        df = self.data.get("predictions")
-        if df.empty: return df
-        latest_date = df['date'].max()
-        return df[df['date'] == latest_date]
+        return self.data.get_latest_predictions()
 
     def get_latest_anomalies(self):
-        df = self.data.get("anomalies")
-        if df.empty: return df
-        latest_date = df['date'].max()
-        return df[df['date'] == latest_date]
+        return self.data.get_latest_anomalies()
+
+    def get_prediction_history(self, city, start=None, end=None, points=None):
+        return self.data.get_prediction_history(city, start, end, points)
+
+    def get_risk_history(self, city, start=None, end=None, points=None):
+        return self.data.get_risk_history(city, start, end, points)
+
+    def get_risk_zones(self):
+        return self.data.get_risk_zones()
 
     def get_zones(self):
-        return self.data.get("zones", pd.DataFrame())
+        return self.data.get_zones()
 
-    def get_merged(self):
-        return self.data.get("merged", pd.DataFrame())
+    def get_merged(self, columns=None):
+        return self.data.get_merged(columns)
 
 # Global singleton instance
 data_loader = DataLoader(output_dir=os.path.join(os.path.dirname(os.path.dirname(__file__)), "ml_outputs"))
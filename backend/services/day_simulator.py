@@ -0,0 +1,375 @@
+"""
+The simulated day model: the per-city outbreak lifecycles, the day-by-day
+feature updates and the model scoring that a tick, a fast-forward and an
+ensemble trajectory all run (DaySimulator), and the day state they build on
+(DayState).
+
+Nothing here reads the published data, so the ensemble's worker processes
+(services.ensemble_worker) can simulate without the simulation service.
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import random
+import hashlib
+import copy
+from datetime import timedelta
+from .history_ring import HistoryRing
+from models.artifacts import model_registry
+from models.risk_engine import classify_risk_levels
+
+# Features the scaler normalizes, and the subset the forecast model reads
+NORMALIZED_FEATURES = [
+    'rolling_cases_24h', 'rolling_cases_72h', 'delta_cases', 'case_growth_rate',
+    'water_contamination_index', 'humidity_index', 'rainfall_index', 'environmental_risk_index',
+    'bed_occupancy_rate'
+]
+FORECAST_FEATURES = ['rolling_cases_72h', 'water_contamination_index', 'humidity_index', 'rainfall_index', 'bed_occupancy_rate']
+
+
+class DaySimulator:
+    """
+    Simulates days after a DayState and scores them with the trained models
+    (read from `models_path`, backend/models by default, through
+    model_registry). Each city's lifecycle lives in city_states.
+    """
+    def __init__(self, models_path=None):
+        self.base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.models_path = models_path or os.path.join(self.base_path, 'models')
+        self.rf = None
+        self.iso_forest = None
+        self.scaler = None
+        self.risk_scaler = None
+
+        # Outbreak Lifecycle State Tracking (per-city deterministic RNG)
+        # state: { phase, step, duration, rng }
+        self.city_states = {}
+
+        # Phase order and next mapping
+        self.phases = ["baseline", "growth", "peak", "decay"]
+        self.phase_next = {p: self.phases[(i + 1) % len(self.phases)] for i, p in enumerate(self.phases)}
+
+        self._load_models()
+
+    def _load_models(self):
+        try:
+            # Same read-only copy the scenario route uses
+            models = model_registry.get(self.models_path, ['outbreak_rf', 'anomaly_iso', 'scaler', 'risk_scaler'])
+            self.rf = models['outbreak_rf']
+            self.iso_forest = models['anomaly_iso']
+            self.scaler = models['scaler']
+            self.risk_scaler = models['risk_scaler']
+            print("Simulation models loaded successfully.")
+        except Exception as e:
+            print(f"Error loading simulation models: {e}")
+
+    def _city_state(self, city):
+        # Initialize deterministic per-city RNG and state
+        if city not in self.city_states:
+            # Create stable seed from city name
+            digest = hashlib.md5(city.encode('utf-8')).digest()
+            seed = int.from_bytes(digest[:4], 'big')
+            rng = random.Random(seed)
+            # Start at a staggered phase and random step so cities differ
+            start_phase = rng.choice(self.phases)
+            start_step = rng.randint(0, rng.randint(0, 2))
+            duration = rng.randint(3, 6)
+            self.city_states[city] = {
+                "phase": start_phase,
+                "step": start_step,
+                "duration": duration,
+                "rng": rng
+            }
+        return self.city_states[city]
+
+    def _get_next_phase_value(self, city):
+        state = self._city_state(city)
+        rng = state.get("rng", random)
+
+        # Advance step and handle phase transition
+        state["step"] += 1
+        if state["step"] >= state.get("duration", 4):
+            # move to next phase and set a new phase-specific duration
+            state["phase"] = self.phase_next.get(state["phase"], "baseline")
+            state["step"] = 0
+            next_phase = state["phase"]
+            # Longer durations for growth/peak to allow sustained outbreaks
+            if next_phase == "baseline":
+                state["duration"] = rng.randint(2, 4)
+            elif next_phase == "growth":
+                state["duration"] = rng.randint(5, 8)
+            elif next_phase == "peak":
+                state["duration"] = rng.randint(6, 10)
+            elif next_phase == "decay":
+                state["duration"] = rng.randint(3, 6)
+
+        phase = state["phase"]
+        # Return admission delta based on current phase (deterministic via rng)
+        if phase == "baseline":
+            return rng.randint(0, 2)
+        if phase == "growth":
+            # stronger growth to produce more high-risk zones
+            return rng.randint(8, 18)
+        if phase == "peak":
+            # larger peaks to push some cities into Critical
+            return rng.randint(25, 45)
+        if phase == "decay":
+            return -rng.randint(8, 20)
+        return rng.randint(0, 2)
+
+    def _draw_day(self, cities):
+        """
+        Advances the lifecycle of the city of each row, in row order, and
+        draws its noise: (admission drift, phase, turbidity draw, rainfall
+        draw) arrays. Each city's draws come from its own RNG in the same
+        order as always, so the simulated series don't change.
+        """
+        n = len(cities)
+        drift = np.empty(n)
+        phases = np.empty(n, dtype=object)
+        turbidity = np.empty(n)
+        rainfall = np.empty(n)
+        for i, city in enumerate(cities):
+            drift[i] = self._get_next_phase_value(city)
+            state = self.city_states[city]
+            phases[i] = state["phase"]
+            rng = state.get('rng', random)
+            if phases[i] in ["growth", "peak"]:
+                # Larger turbidity jumps during outbreak growth/peak
+                turbidity[i] = rng.uniform(3.0, 10.0)
+                rainfall[i] = rng.uniform(0.1, 0.3)
+            else:
+                turbidity[i] = rng.uniform(0.1, 0.5)
+                rainfall[i] = rng.uniform(0.01, 0.05)
+        return drift, phases, turbidity, rainfall
+
+    def _simulate_days(self, state, days, pod):
+        """
+        Lifecycle, water, environment and rolling-stat updates for the
+        `days` days after state.day, one whole-array step per day. Returns
+        (block, city_phases, vip, dates): block holds the days' rows, oldest
+        first, with every other column carried over from the last day as a
+        tick copies it; city_phases and vip are per row of block.
+        """
+        last_day = state.day
+        rows = len(last_day)
+        cities = last_day['city'].astype(str).tolist()
+        admissions = last_day['admissions'].to_numpy()
+        # Counts stay int64 whatever the stored dtype: compact mode may hold them as int8, which drifts overflow
+        admissions_dtype = np.int64 if pd.api.types.is_integer_dtype(admissions.dtype) else np.float64
+        admissions = admissions.astype(admissions_dtype)
+        turbidity = last_day['turbidity_NTU'].to_numpy(np.float64)
+        rainfall = last_day['rainfall_index'].to_numpy(np.float64)
+        fecal = last_day['fecal_coliform_cfu_100ml'].to_numpy(np.float64)
+        ph = last_day['water_pH'].to_numpy(np.float64)
+        humidity_base = last_day['water_temp_C'].to_numpy(np.float64) / state.max_temp
+        rolling_columns = ['rolling_cases_72h', 'rolling_cases_24h', 'delta_cases', 'case_growth_rate']
+        carried = {c: last_day[c].to_numpy(np.float64, copy=True) for c in rolling_columns}
+
+        features = {c: [] for c in ['admissions', 'turbidity_NTU', 'rainfall_index', 'water_contamination_index',
+                                    'humidity_index', 'environmental_risk_index'] + rolling_columns}
+        city_phases, vip, dates = [], [], []
+        date = state.date
+        for _ in range(days):
+            date = date + timedelta(days=1)
+            # Follow Lifecycle
+            drift, phases, turbidity_step, rainfall_step = self._draw_day(cities)
+            outbreak = np.isin(phases, ["growth", "peak"])
+            admissions = np.maximum(0, admissions + drift).astype(admissions_dtype)
+            turbidity = np.where(outbreak, turbidity + turbidity_step, np.maximum(0.1, turbidity - turbidity_step))
+            rainfall = np.where(outbreak, np.minimum(1.0, rainfall + rainfall_step), np.maximum(0.0, rainfall - rainfall_step))
+            humidity = humidity_base
+            if pod is not None:
+                # Live pod readings replace the simulated humidity and rainfall
+                humidity, rainfall = np.full(rows, pod[0]), np.full(rows, pod[1])
+
+            # Rolling stats for each city's last row, from its last three admissions
+            rolling = state.push_admissions(admissions.astype(np.float64))
+            if rolling is not None:
+                positions, *values = rolling
+                for column, column_values in zip(rolling_columns, values):
+                    carried[column] = carried[column].copy()
+                    carried[column][positions] = column_values
+
+            features['admissions'].append(admissions)
+            features['turbidity_NTU'].append(turbidity)
+            features['rainfall_index'].append(rainfall)
+            features['water_contamination_index'].append((0.4 * turbidity) + (0.4 * fecal) + (0.2 * np.abs(7 - ph)))
+            features['humidity_index'].append(humidity)
+            features['environmental_risk_index'].append(humidity * 0.5 + rainfall * 0.5)
+            for column in rolling_columns:
+                features[column].append(carried[column])
+            # Boosts use the phase each city ended the day in
+            city_phases.append(np.array([self.city_states[city]['phase'] for city in cities], dtype=object))
+            vip.append(np.isin(cities, state.vip_cities(date)))
+            dates.append(date)
+
+        # The days start as copies of the last one
+        block = last_day.iloc[np.tile(np.arange(rows), days)].reset_index(drop=True)
+        block['date'] = pd.DatetimeIndex(dates).repeat(rows)
+        for column, parts in features.items():
+            block[column] = np.concatenate(parts)
+        return block, np.concatenate(city_phases), np.concatenate(vip), dates
+
+    def _score(self, frame, city_phases, vip, days):
+        """
+        Model inference, risk boosts and levels for the rows of `frame`,
+        `days` days of the same rows at once; `city_phases` and `vip` are
+        per row.
+        """
+        if self.rf and self.scaler:
+            norm_data = self.scaler.transform(frame[NORMALIZED_FEATURES])
+            df_norm_latest = pd.DataFrame(norm_data, columns=NORMALIZED_FEATURES, index=frame.index)
+            frame['predicted_cases_48h'] = self.rf.predict(df_norm_latest[FORECAST_FEATURES])
+            
+            if self.iso_forest:
+                ano_input = pd.DataFrame({
+                    'admissions': frame['admissions'],
+                    'water_contamination_index': df_norm_latest['water_contamination_index'],
+                    'case_growth_rate': df_norm_latest['case_growth_rate'],
+                })
+                frame['anomaly_val'] = self.iso_forest.predict(ano_input)
+                frame['is_anomaly'] = frame['anomaly_val'] == -1
+
+            frame['raw_risk_score'] = (
+                0.4 * frame['predicted_cases_48h'].to_numpy(np.float64) +
+                0.3 * (df_norm_latest['water_contamination_index'].to_numpy() * 100) +
+                0.2 * (df_norm_latest['humidity_index'].to_numpy() * 100) +
+                0.1 * (df_norm_latest['rainfall_index'].to_numpy() * 100)
+            )
+            
+        if self.risk_scaler:
+            frame['riskScore'] = self.risk_scaler.transform(frame[['raw_risk_score']]).ravel()
+            
+        # --- Deterministic boosting logic to ensure some persistent critical/high zones ---
+        try:
+            # Phase-based boost
+            boost = np.select([city_phases == 'peak', city_phases == 'growth'], [30.0, 15.0], 0.0)
+
+            # VIP city deterministic boost to ensure 2-3 critical zones
+            boost = boost + np.where(vip, 25.0, 0.0)
+
+            def boosted(base_score, rows):
+                new_score = np.minimum(100.0, np.nan_to_num(base_score, nan=0.0) + boost[rows])
+                # Ensure risk is at least 60 for intended targets
+                return np.where(vip[rows] & (new_score < 85), np.maximum(new_score, 88.0), new_score)
+
+            scores = frame['riskScore'].to_numpy(np.float64)
+            if self.risk_scaler:
+                new_score = boosted(scores, slice(None))
+            else:
+                # Without the risk model each day starts from the score the day before ended with
+                n = len(frame) // days
+                new_score = np.empty(len(frame))
+                score = scores[:n]
+                for day in range(days):
+                    rows = slice(day * n, (day + 1) * n)
+                    score = new_score[rows] = boosted(score, rows)
+
+            frame['riskScore'] = new_score
+
+        except Exception:
+            pass
+
+        frame['riskLevel'] = classify_risk_levels(frame['riskScore'].to_numpy(np.float64))
+        return frame
+
+
+class DayState:
+    """
+    What the next simulated day is built from, kept between ticks so a tick
+    never scans the history: the latest day's rows, the last three
+    admissions of each city (in row order, as the rolling stats read them),
+    the maximum water temperature and the cities' VIP order. Valid for the
+    data version (`version`) it was built from or last advanced to.
+
+    It also holds the history in a HistoryRing: the days it was built from
+    followed by the simulated days, together at most `retention_days` days.
+    """
+    def __init__(self, df, retention_days, spill_dir=None, version=0, compact=False):
+        self.version = version
+        self.retention_days = retention_days
+        self.ring = HistoryRing(retention_days, spill_dir, compact=compact)
+        # The ring holds days in date order; rows of the same day keep theirs
+        self.ring.extend(df.dropna(subset=['date']).sort_values('date', kind='stable'), spill=False)
+        self.date = pd.to_datetime(df['date']).max()
+        self.day = df[df['date'] == self.date]
+        self.max_temp = df['water_temp_C'].max() if ('water_temp_C' in df.columns and not df['water_temp_C'].empty) else 35
+
+        # Cities of the day's rows as codes, and each city's last three admissions, right-aligned (NaN if fewer)
+        self.row_city, self.cities = pd.factorize(self.day['city'].astype(str))
+        self.rows_per_city = np.bincount(self.row_city, minlength=len(self.cities))
+        self.recent = np.full((len(self.cities), 3), np.nan)
+        tail = df.loc[df.groupby('city', sort=False, observed=True).tail(3).index, ['city', 'admissions']]
+        codes = self.cities.get_indexer(tail['city'].astype(str))
+        values = tail['admissions'].to_numpy(np.float64)
+        for code in range(len(self.cities)):
+            last = values[codes == code]
+            if len(last):
+                self.recent[code, 3 - len(last):] = last
+
+        # Cities ordered by hash, for the rotating VIP window
+        city_hashes = [(c, int(hashlib.md5(c.encode('utf-8')).hexdigest(), 16)) for c in self.cities]
+        self.ordered = [c for c, _ in sorted(city_hashes, key=lambda x: x[1], reverse=True)]
+
+    def detached(self):
+        """A copy without the history, for simulating days that are not published."""
+        state = copy.copy(self)
+        state.ring = None
+        state.recent = self.recent.copy()
+        return state
+
+    def push_admissions(self, admissions):
+        """
+        Appends the new day's admissions (one per row of `day`) to each
+        city's recent admissions. Returns (rows, rolling 72h, 24h, delta,
+        growth rate) for the last row of each city with at least two
+        admissions so far, or None if there is none.
+        """
+        n_cities = len(self.cities)
+        width = 3 + self.rows_per_city.max(initial=0)
+        stream = np.full((n_cities, width), np.nan)
+        stream[:, :3] = self.recent
+        # Position of each row among its city's rows of the day
+        order = np.argsort(self.row_city, kind='stable')
+        starts = np.cumsum(self.rows_per_city) - self.rows_per_city
+        position = np.empty(len(order), dtype=int)
+        position[order] = np.arange(len(order)) - np.repeat(starts, self.rows_per_city)
+        stream[self.row_city, 3 + position] = admissions
+
+        last3 = stream[np.arange(n_cities)[:, None], self.rows_per_city[:, None] + np.arange(3)]
+        self.recent = last3
+        last_rows = np.full(n_cities, -1)
+        last_rows[self.row_city[order]] = order
+        valid = ~np.isnan(last3[:, 1]) & (last_rows >= 0)
+        if not valid.any():
+            return None
+        last3 = last3[valid]
+        previous, latest = last3[:, 1], last3[:, 2]
+        delta = latest - previous
+        return last_rows[valid], np.nanmean(last3, axis=1), latest, delta, delta / np.maximum(1, previous)
+
+    def vip_cities(self, date):
+        # Rotate selection window each day using the date to compute offset
+        num = len(self.ordered)
+        if not num:
+            return []
+        start = date.toordinal() % num
+        window = 3
+        return [self.ordered[(start + i) % num] for i in range(min(window, num))]
+
+    def append(self, block):
+        """
+        Adds simulated days (their rows in one frame, oldest first) to the
+        history and drops the days beyond the retention window, loaded ones
+        first. Returns the history as one frame and its first date.
+        """
+        self.ring.extend(block)
+        return self.ring.frame(), self.ring.first_date
+
+    def advance(self, merged, n, date, version):
+        """Moves on to the day just published: the last `n` rows of `merged`."""
+        self.day = merged.iloc[len(merged) - n:]
+        self.date = date
+        self.version = version
@@ -0,0 +1,109 @@
+"""
+Monte Carlo outlook for the live simulation.
+
+The simulation follows one trajectory: each city's outbreak lifecycle is
+driven by its own random.Random, seeded from the city name. An ensemble
+runs K trajectories from the current day instead. Every city keeps its
+current phase, step and duration, and each trajectory k reseeds the cities'
+RNGs from (seed + k, city). Each trajectory runs the same day loop and
+model scoring as a fast-forward (DaySimulator._simulate_days and _score)
+on a detached copy of the day state, so nothing is published.
+
+Trajectories run in a pool of worker processes, split into one chunk per
+worker, so the day state is pickled once per worker and the run scales
+with cores as long as there are at least as many trajectories as workers.
+Each worker returns per-city daily totals: predicted cases summed over the
+city's hospitals and the risk score averaged over them, as the history
+endpoints report them. The parent reduces these to PERCENTILES bands per
+city and day.
+
+The pool uses spawned processes: forking a server process whose other
+threads may hold locks is unsafe. It is created on first use and kept, so
+its start-up cost is paid once. Workers run services.ensemble_worker, which
+loads the models and nothing else: importing the simulation service would
+load all of ml_outputs again in each of them. The app lifespan closes it.
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import numpy as np
+from .simulation_service import simulation_service
+from .ensemble_worker import init_worker, run_trajectories
+
+PERCENTILES = (10, 50, 90)
+# Most trajectories and days one ensemble may run
+MAX_TRAJECTORIES = 1000
+MAX_DAYS = 365
+
+
+class EnsembleRunner:
+    def __init__(self, service, workers=None):
+        if workers is None:
+            workers = int(os.getenv("ENSEMBLE_WORKERS", 0)) or os.cpu_count() or 1
+        self.service = service
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_worker, initargs=(self.service.models_path,),
+                )
+            return self._pool
+
+    def run(self, days, trajectories, seed=0):
+        """
+        K = `trajectories` trajectories of `days` days from the current
+        simulated day, seeded seed, seed + 1, ... Returns the dates and, per
+        city, PERCENTILES bands of predicted cases and risk score per day.
+        """
+        if not 1 <= days <= MAX_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_DAYS}")
+        if not 1 <= trajectories <= MAX_TRAJECTORIES:
+            raise ValueError(f"trajectories must be between 1 and {MAX_TRAJECTORIES}")
+        start = self.service.forecast_start()
+        state = start["state"]
+        chunks = [chunk.tolist() for chunk in np.array_split(seed + np.arange(trajectories), self.workers) if len(chunk)]
+        pool = self._executor()
+        futures = [pool.submit(run_trajectories, start, chunk, days) for chunk in chunks]
+        results = [future.result() for future in futures]
+        predicted = np.concatenate([r[0] for r in results])
+        risk = np.concatenate([r[1] for r in results])
+
+        # (percentile, day, city)
+        bands = {
+            "predicted_cases_48h": np.percentile(predicted, PERCENTILES, axis=0),
+            "riskScore": np.percentile(risk, PERCENTILES, axis=0),
+        }
+        cities = {}
+        for i, city in enumerate(state.cities):
+            cities[str(city)] = {
+                name: {f"p{p}": np.round(values[j, :, i], 2).tolist() for j, p in enumerate(PERCENTILES)}
+                for name, values in bands.items()
+            }
+        dates = [state.date + timedelta(days=day + 1) for day in range(days)]
+        return {
+            "start_date": state.date.strftime('%Y-%m-%d'),
+            "days": days,
+            "trajectories": trajectories,
+            "seed": seed,
+            "workers": len(chunks),
+            "dates": [d.strftime('%Y-%m-%d') for d in dates],
+            "cities": cities,
+        }
+
+    def close(self):
+        """Shuts the worker pool down."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+ensemble_runner = EnsembleRunner(simulation_service)
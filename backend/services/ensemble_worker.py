@@ -0,0 +1,59 @@
+"""
+What the ensemble's worker processes run (see services.ensemble).
+
+A worker imports only this module and services.day_simulator, never the
+simulation service, whose import loads the published outputs. The pool's
+initializer, init_worker, loads the models once per worker through
+model_registry; run_trajectories then simulates on the day state it is
+sent.
+"""
+
+import hashlib
+import random
+import numpy as np
+from .day_simulator import DaySimulator
+
+# The worker process's own DaySimulator, set by init_worker
+_worker_simulator = None
+
+
+def init_worker(models_path=None):
+    """Pool initializer: loads the models the trajectories are scored with."""
+    global _worker_simulator
+    _worker_simulator = DaySimulator(models_path)
+
+
+def _city_seed(seed, city):
+    digest = hashlib.md5(f"{seed}:{city}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big')
+
+
+def run_trajectories(start, seeds, days):
+    """
+    Runs one trajectory per seed from `start` (SimulationService.forecast_start).
+    Returns (predicted cases, risk score) arrays of shape
+    (len(seeds), days, cities): per-city daily totals, cities in
+    start["state"].cities order.
+    """
+    if _worker_simulator is None:
+        init_worker()
+    simulator = _worker_simulator
+    state = start["state"]
+    n_cities = len(state.cities)
+    rows_per_city = np.maximum(state.rows_per_city, 1)
+    # (day, city) group of each row of a trajectory's block: days of state.day's rows, oldest first
+    groups = (np.arange(days)[:, None] * n_cities + state.row_city).ravel()
+    predicted = np.empty((len(seeds), days, n_cities), dtype=np.float32)
+    risk = np.empty((len(seeds), days, n_cities), dtype=np.float32)
+    for k, seed in enumerate(seeds):
+        simulator.city_states = {
+            city: {**lifecycle, "rng": random.Random(_city_seed(seed, city))}
+            for city, lifecycle in start["lifecycles"].items()
+        }
+        block, city_phases, vip, _ = simulator._simulate_days(state.detached(), days, start["pod"])
+        block = simulator._score(block, city_phases, vip, days)
+        for column, out, mean in (("predicted_cases_48h", predicted, False), ("riskScore", risk, True)):
+            values = np.nan_to_num(block[column].to_numpy(np.float64))
+            totals = np.bincount(groups, weights=values, minlength=days * n_cities).reshape(days, n_cities)
+            out[k] = totals / rows_per_city if mean else totals
+    return predicted, risk
@@ -0,0 +1,142 @@
+"""
+Viewport heatmap served as pre-aggregated grid tiles.
+
+At zoom level z the world is cut into 2**z x 2**z square lat/lng tiles of
+360 / 2**z degrees, each split into CELLS x CELLS cells. A tile holds one
+point per occupied cell: the centroid of the hospitals in it, their highest
+risk score and how many there are. A request for a bounding box is answered
+from the tiles covering it, so its payload is bounded by the number of cells
+on screen, not by the number of hospitals. A box that would need more than
+MAX_TILES_PER_REQUEST tiles at the requested zoom (a wide window, or no box
+at all) is served at the highest lower zoom where it fits, with coarser
+cells, rather than refused.
+
+Hospitals are indexed once per data version (sorted by latitude, so a
+tile's rows are one binary-searched band), and built tiles are kept in an
+LRU keyed by data version, zoom and tile: panning only builds the tiles that
+came into view, and a tick or reload simply stops hitting the old entries.
+"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Cells per tile side: with 256 px map tiles, one point per 16 px
+CELLS = 16
+MAX_ZOOM = 18
+# Tiles a single request may cover; larger boxes are served at a lower zoom
+MAX_TILES_PER_REQUEST = 64
+
+
+class _HeatIndex:
+    """Hospital coordinates and risk scores, sorted by latitude."""
+    def __init__(self, zones_df):
+        if zones_df.empty:
+            lat = lng = risk = np.empty(0)
+        else:
+            lat = zones_df['lat'].to_numpy(np.float64)
+            lng = zones_df['lng'].to_numpy(np.float64)
+            risk = zones_df['riskScore'].fillna(0).to_numpy(np.float64)
+            valid = ~(np.isnan(lat) | np.isnan(lng))
+            lat, lng, risk = lat[valid], lng[valid], risk[valid]
+        order = np.argsort(lat, kind='stable')
+        self.lat, self.lng, self.risk = lat[order], lng[order], risk[order]
+
+    def tile(self, zoom, tx, ty):
+        """(k, 4) array of [lat, lng, max risk, count] per occupied cell of a tile."""
+        size = 360.0 / 2 ** zoom
+        south, west = ty * size - 90.0, tx * size - 180.0
+        lo, hi = np.searchsorted(self.lat, [south, south + size])
+        lng = self.lng[lo:hi]
+        inside = (lng >= west) & (lng < west + size)
+        lat, lng, risk = self.lat[lo:hi][inside], lng[inside], self.risk[lo:hi][inside]
+        if not len(lat):
+            return np.empty((0, 4))
+        cell = size / CELLS
+        gx = np.clip(((lng - west) / cell).astype(int), 0, CELLS - 1)
+        gy = np.clip(((lat - south) / cell).astype(int), 0, CELLS - 1)
+        cells, inverse, counts = np.unique(gy * CELLS + gx, return_inverse=True, return_counts=True)
+        peak = np.full(len(cells), -np.inf)
+        np.maximum.at(peak, inverse, risk)
+        return np.column_stack([
+            np.bincount(inverse, lat) / counts,
+            np.bincount(inverse, lng) / counts,
+            peak,
+            counts,
+        ])
+
+
+def tile_range(zoom, west, south, east, north):
+    """(tx0, tx1, ty0, ty1), inclusive, of the tiles covering a bounding box."""
+    n = 2 ** zoom
+    size = 360.0 / n
+
+    def clamp(i):
+        return min(max(int(i), 0), n - 1)
+
+    return (clamp((west + 180.0) // size), clamp((east + 180.0) // size),
+            clamp((south + 90.0) // size), clamp((north + 90.0) // size))
+
+
+def fitting_zoom(zoom, west, south, east, north):
+    """The highest zoom up to `zoom` at which the box covers at most MAX_TILES_PER_REQUEST tiles."""
+    while zoom > 0:
+        tx0, tx1, ty0, ty1 = tile_range(zoom, west, south, east, north)
+        if (tx1 - tx0 + 1) * (ty1 - ty0 + 1) <= MAX_TILES_PER_REQUEST:
+            break
+        zoom -= 1
+    return zoom
+
+
+class HeatTiles:
+    def __init__(self, max_tiles=4096):
+        self.max_tiles = max_tiles
+        self._lock = threading.Lock()
+        # (version, _HeatIndex) of the latest data version asked for
+        self._index = None
+        # (version, zoom, tx, ty) -> tile array, least recently used first
+        self.tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _index_for(self, snapshot):
+        current = self._index
+        if current is not None and current[0] == snapshot.version:
+            return current[1]
+        index = _HeatIndex(snapshot.get_risk_zones())
+        with self._lock:
+            if self._index is None or self._index[0] < snapshot.version:
+                self._index = (snapshot.version, index)
+        return index
+
+    def _tile(self, snapshot, zoom, tx, ty):
+        key = (snapshot.version, zoom, tx, ty)
+        with self._lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+        tile = self._index_for(snapshot).tile(zoom, tx, ty)
+        with self._lock:
+            self.tiles[key] = tile
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+        return tile
+
+    def cells(self, snapshot, zoom, west, south, east, north):
+        """
+        [lat, lng, max risk, count] of the occupied cells inside the box at
+        `zoom`, as an (k, 4) array. The zoom is lowered to fitting_zoom() if
+        the box covers more than MAX_TILES_PER_REQUEST tiles.
+        """
+        zoom = fitting_zoom(zoom, west, south, east, north)
+        tx0, tx1, ty0, ty1 = tile_range(zoom, west, south, east, north)
+        tiles = [self._tile(snapshot, zoom, tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+        cells = np.concatenate(tiles) if tiles else np.empty((0, 4))
+        inside = (cells[:, 0] >= south) & (cells[:, 0] <= north) & (cells[:, 1] >= west) & (cells[:, 1] <= east)
+        return cells[inside]
+
+
+heat_tiles = HeatTiles()
@@ -0,0 +1,294 @@
+"""
+Bounded history for the live simulation.
+
+The served history is a sliding window of at most `capacity` days, oldest
+first. A HistoryRing keeps it in append-only column buffers: a tick writes
+its day's rows after the last ones held, and evicting days only moves the
+start of the window forward. frame() returns read-only views of the window,
+so publishing a tick costs the same however many days are held.
+
+Rows are never written over while they can still be part of a published
+frame: new rows go past the end of every earlier window, and when a buffer
+is full the window is copied to a new one (twice its size) and the old
+buffer is left to the snapshots still reading it. That copy happens about
+once per window's worth of appended rows, so its cost per tick is constant,
+and the buffers hold at most about twice the window.
+
+String columns are kept as a list of per-block arrays instead, concatenated
+when a frame is built; with pyarrow-backed strings that is zero-copy.
+
+With `compact`, columns are held the way compact mode (utils/compact.py)
+stores them, so the frames are published without being compacted again:
+float features as float32, and categorical columns as codes into
+categories that only ever grow (each frame gets the categories of its time,
+so older frames stay valid). Integers keep the type they were downcast to
+until a day brings a value it can't hold; the column then moves to a wider
+buffer.
+
+Days evicted from the window can be spilled to disk instead of dropped.
+Days passed with `spill=True` (the simulated ones) are written in batches
+of SPILL_BATCH_DAYS to `simulated_days_<start>.arrow`, a zstd-compressed
+Arrow IPC stream (utils.arrow_io.read_stream), or appended to
+`simulated_days_<start>.csv` without pyarrow.
+"""
+
+import os
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils.arrow_io import HAS_ARROW, ARROW_EXT, StreamWriter
+from utils.compact import FLOAT64_COLUMNS
+
+# Evicted days collected before each write to the spill file
+SPILL_BATCH_DAYS = 30
+
+
+def _code_dtype(categories):
+    """The codes dtype pandas gives a Categorical with `categories`, so frames can share the buffer."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if len(categories) < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _int_dtype(lo, hi):
+    """The smallest signed integer dtype holding lo to hi."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if np.iinfo(dtype).min <= lo and hi <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _widened(dtype):
+    """
+    The dtype a column is held with. Compact mode can hand over int8
+    counts or categoricals whose categories are only those of the first
+    day, so integers are widened to int64 and categoricals stored as their
+    plain values.
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _widened(dtype.categories.dtype)
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        return np.dtype(np.int64)
+    return dtype
+
+
+class HistoryRing:
+    def __init__(self, capacity, spill_dir=None, compact=False):
+        if capacity < 1:
+            raise ValueError("HistoryRing capacity must be at least 1 day")
+        self.capacity = capacity
+        self.spill_dir = spill_dir
+        self.compact = compact
+        self.spill_path = None
+        self._spill_writer = None
+        self._pending = []
+        self._pending_days = 0
+        self.spilled_days = 0
+        # Column name -> dtype it is held with, in column order; set by the first extend
+        self._dtypes = None
+        # numpy columns: name -> buffer, the window being rows [_start, _end)
+        self._buffers = {}
+        self._start = 0
+        self._end = 0
+        # Extension (string) columns: name -> deque of arrays covering the window
+        self._chunks = {}
+        # Categorical columns (compact only), held as codes: name -> CategoricalDtype
+        self._categories = {}
+        # (date, rows, spill) of each held day, oldest first
+        self._days = deque()
+
+    def __len__(self):
+        return len(self._days)
+
+    @property
+    def first_date(self):
+        return self._days[0][0] if self._days else None
+
+    def extend(self, block, spill=True):
+        """
+        Appends the days whose rows are in `block`, grouped by date and
+        oldest first, and evicts the days beyond `capacity`, oldest first.
+        With `spill`, these days go to the spill file (if spilling is on)
+        once evicted. Returns how many days were evicted.
+        """
+        dates = block['date'].to_numpy('datetime64[ns]')
+        if len(dates) > 1 and (dates[1:] < dates[:-1]).any():
+            raise ValueError("HistoryRing blocks must be ordered by date")
+        if self._dtypes is None:
+            self._dtypes = {}
+            for name, col in block.items():
+                if self.compact and isinstance(col.dtype, pd.CategoricalDtype):
+                    self._categories[name] = pd.CategoricalDtype(col.dtype.categories[:0])
+                    self._dtypes[name] = _code_dtype(col.dtype.categories[:0])
+                else:
+                    self._dtypes[name] = self._held(name, col.dtype)
+        missing = [name for name in self._dtypes if name not in block.columns]
+        if missing:
+            raise ValueError(f"HistoryRing block is missing columns {missing}")
+        for name in block.columns:
+            if name not in self._dtypes:
+                self._add_column(name, block[name])
+        self._append(block)
+
+        starts = np.flatnonzero(np.append(True, dates[1:] != dates[:-1])) if len(dates) else np.empty(0, dtype=int)
+        for date, rows in zip(dates[starts], np.diff(np.append(starts, len(dates)))):
+            self._days.append((pd.Timestamp(date), int(rows), spill))
+
+        evicted = max(0, len(self._days) - self.capacity)
+        if evicted:
+            days = [self._days.popleft() for _ in range(evicted)]
+            rows = sum(r for _, r, _ in days)
+            if self.spill_dir is not None:
+                # Loaded days come before simulated ones, so the spilled days are the last evicted
+                skipped = sum(r for _, r, s in days if not s)
+                if skipped < rows:
+                    spilled = self._rows(self._start + skipped, self._start + rows)
+                    # Compact types change as days come in; the spill file's must not
+                    spilled = spilled.astype({name: _widened(col.dtype) for name, col in spilled.items()})
+                    self._spill(spilled.copy(), sum(1 for _, _, s in days if s))
+            self._drop(rows)
+        return evicted
+
+    def _held(self, name, dtype):
+        """The dtype column `name`, given as `dtype`, is held with."""
+        if self.compact and isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            return dtype
+        dtype = _widened(dtype)
+        if self.compact and isinstance(dtype, np.dtype) and dtype.kind == 'f' and name not in FLOAT64_COLUMNS:
+            return np.dtype(np.float32)
+        return dtype
+
+    def _widen(self, name, dtype):
+        """Moves column `name` to a buffer of `dtype`; frames already out keep the narrower one."""
+        if dtype != self._dtypes[name]:
+            self._dtypes[name] = dtype
+            if name in self._buffers:
+                self._buffers[name] = self._buffers[name].astype(dtype)
+
+    def _append(self, block):
+        n = len(block)
+        size = len(next(iter(self._buffers.values()))) if self._buffers else 0
+        if self._end + n > size:
+            self._reallocate(max(2 * (self._end - self._start + n), 1))
+        for name, dtype in self._dtypes.items():
+            col = block[name]
+            if name in self._categories:
+                self._buffers[name][self._end:self._end + n] = self._codes(name, col)
+            elif name in self._buffers:
+                values = col.to_numpy()
+                if self.compact and dtype.kind in 'iu' and values.dtype.kind in 'iu' and len(values):
+                    lo, hi = int(values.min()), int(values.max())
+                    if lo < np.iinfo(dtype).min or hi > np.iinfo(dtype).max:
+                        # Compact integers: widened when a block holds a value out of their range
+                        self._widen(name, _int_dtype(min(lo, np.iinfo(dtype).min), max(hi, np.iinfo(dtype).max)))
+                self._buffers[name][self._end:self._end + n] = values
+            else:
+                self._chunks[name].append(col.array.astype(dtype) if col.dtype != dtype else col.array)
+        self._end += n
+
+    def _codes(self, name, col):
+        """Codes of `col`'s values in the categories of column `name`, adding the new values."""
+        values = col.to_numpy(object)
+        categories = self._categories[name].categories
+        codes = categories.get_indexer(values)
+        new = (codes == -1) & pd.notna(values)
+        if new.any():
+            categories = categories.append(pd.Index(pd.unique(values[new]), dtype=categories.dtype))
+            self._categories[name] = pd.CategoricalDtype(categories)
+            self._widen(name, _code_dtype(categories))
+            codes = categories.get_indexer(values)
+        return codes
+
+    def _reallocate(self, size):
+        """Moves the window to the start of new buffers of `size` rows; the old ones stay with their readers."""
+        held = self._end - self._start
+        for name, dtype in self._dtypes.items():
+            if isinstance(dtype, np.dtype):
+                buffer = np.empty(size, dtype=dtype)
+                if name in self._buffers:
+                    buffer[:held] = self._buffers[name][self._start:self._end]
+                self._buffers[name] = buffer
+            else:
+                self._chunks.setdefault(name, deque())
+        self._start, self._end = 0, held
+
+    def _add_column(self, name, col):
+        """A column first seen in a later block: missing (NaN) for the rows already held."""
+        held = self._end - self._start
+        filled = pd.concat([pd.Series(np.nan, index=range(held)), col.reset_index(drop=True)], ignore_index=True)
+        dtype = self._held(name, filled.dtype)
+        self._dtypes[name] = dtype
+        if isinstance(dtype, np.dtype):
+            size = len(next(iter(self._buffers.values()))) if self._buffers else self._end
+            buffer = np.empty(size, dtype=dtype)
+            buffer[self._start:self._end] = filled.to_numpy()[:held]
+            self._buffers[name] = buffer
+        else:
+            self._chunks[name] = deque([filled.array[:held].astype(dtype)])
+
+    def _drop(self, rows):
+        """Moves the start of the window `rows` rows forward."""
+        self._start += rows
+        for chunks in self._chunks.values():
+            left = rows
+            while left and left >= len(chunks[0]):
+                left -= len(chunks.popleft())
+            if left:
+                chunks[0] = chunks[0][left:]
+
+    def _column(self, name, lo, hi):
+        if name in self._buffers:
+            values = self._buffers[name][lo:hi]
+            # Published frames are views: nothing may write through them
+            values.flags.writeable = False
+            if name in self._categories:
+                return pd.Categorical.from_codes(values, dtype=self._categories[name], validate=False)
+            return values
+        chunks = self._chunks[name]
+        if not chunks:
+            return pd.array([], dtype=self._dtypes[name])
+        values = chunks[0] if len(chunks) == 1 else type(chunks[0])._concat_same_type(list(chunks))
+        return values[lo - self._start:hi - self._start]
+
+    def _rows(self, lo, hi):
+        return pd.DataFrame({name: self._column(name, lo, hi) for name in self._dtypes}, copy=False)
+
+    def frame(self):
+        """The held days as one DataFrame, oldest day first. Its columns are read-only views."""
+        if self._dtypes is None:
+            return pd.DataFrame()
+        return self._rows(self._start, self._end)
+
+    def _spill(self, rows, days):
+        self._pending.append(rows)
+        self._pending_days += days
+        if self._pending_days >= SPILL_BATCH_DAYS:
+            self.flush()
+
+    def flush(self):
+        """Writes the evicted days not yet on disk to the spill file."""
+        if not self._pending:
+            return
+        batch = pd.concat(self._pending, ignore_index=True)
+        if self.spill_path is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            name = f"simulated_days_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            self.spill_path = os.path.join(self.spill_dir, name + (ARROW_EXT if HAS_ARROW else '.csv'))
+        if HAS_ARROW:
+            if self._spill_writer is None:
+                self._spill_writer = StreamWriter(self.spill_path)
+            self._spill_writer.write(batch)
+        else:
+            batch.to_csv(self.spill_path, mode='a', header=not os.path.exists(self.spill_path), index=False)
+        self.spilled_days += self._pending_days
+        self._pending = []
+        self._pending_days = 0
+
+    def close(self):
+        """Flushes and closes the spill file."""
+        self.flush()
+        if self._spill_writer is not None:
+            self._spill_writer.close()
+            self._spill_writer = None
@@ -0,0 +1,208 @@
+"""
+Server-push channel for the live dashboard.
+
+Instead of every page re-fetching zones, predictions, alerts and the summary
+every 10 s, clients hold one Server-Sent Events stream. On connect they get a
+`snapshot` event with the full state; afterwards a `delta` event is sent only
+when something changed, carrying just the changes:
+
+    zones, predictions   {"length": n, "changed": [[position, fields], ...]}
+    alerts               {"removed": [position, ...], "added": [record, ...]}
+    summary, pod         the new value, when it differs
+
+Positions of zones and predictions refer to the rows of /map/zones and
+/prediction/48h, which keep their order from one simulated day to the next;
+`fields` holds only the values that changed (the whole record for new rows).
+Alerts are compared as a multiset, since identical alerts can repeat: the
+client drops the alerts at the `removed` positions of its list and appends
+the added ones.
+
+Changes are picked up in two ways: writers (simulate_tick, /system/reload)
+call `notify()` when they are done, and while anyone is connected a watcher
+polls the cheap `token()` (data version and sensor file mtime) once a second,
+which catches sensor readings and any other write.
+
+The state itself is built by `state()`, set by routes/live.py from the same
+helpers the REST endpoints use, so pushed records match the polled ones.
+Every event carries a sequence number; a client that falls too far behind has
+its backlog dropped and is sent a fresh snapshot instead.
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from starlette.concurrency import run_in_threadpool
+from utils.fast_json import dumps
+
+POSITIONAL = ('zones', 'predictions')
+MULTISET = ('alerts',)
+VALUES = ('summary', 'pod')
+
+# Sentinel queued when a subscriber overflowed and needs a new snapshot
+_RESYNC = object()
+
+
+def _positional_delta(old, new):
+    changed = []
+    for i, record in enumerate(new):
+        if i >= len(old):
+            changed.append([i, record])
+        elif old[i] != record:
+            changed.append([i, {k: v for k, v in record.items() if old[i].get(k) != v}])
+    if not changed and len(old) == len(new):
+        return None
+    return {"length": len(new), "changed": changed}
+
+
+def _multiset_delta(old, new):
+    """(delta, list as the client holds it after applying the delta)."""
+    old_counts = Counter(tuple(r.items()) for r in old)
+    added = []
+    for record in new:
+        key = tuple(record.items())
+        if old_counts[key]:
+            old_counts[key] -= 1
+        else:
+            added.append(record)
+    kept, removed = [], []
+    for i, record in enumerate(old):
+        key = tuple(record.items())
+        if old_counts[key]:
+            old_counts[key] -= 1
+            removed.append(i)
+        else:
+            kept.append(record)
+    if not added and not removed:
+        return None, old
+    return {"added": added, "removed": removed}, kept + added
+
+
+def diff(old, new):
+    """
+    Delta from state `old` to `new` (empty if nothing changed). Multiset
+    parts of `new` are reordered in place to match the client's copy, so the
+    next delta's positions refer to it.
+    """
+    delta = {}
+    for name in POSITIONAL:
+        part = _positional_delta(old[name], new[name])
+        if part is not None:
+            delta[name] = part
+    for name in MULTISET:
+        part, new[name] = _multiset_delta(old[name], new[name])
+        if part is not None:
+            delta[name] = part
+    for name in VALUES:
+        if old[name] != new[name]:
+            delta[name] = new[name]
+    return delta
+
+
+def _event(name, seq, payload):
+    return b"event: " + name.encode() + b"\nid: " + str(seq).encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+
+
+class LiveFeed:
+    def __init__(self, state=None, token=None, interval=1.0, keepalive=15.0, max_backlog=32):
+        self.state = state
+        self.token = token
+        self.interval = interval
+        self.keepalive = keepalive
+        self.max_backlog = max_backlog
+        # Guards the published state and the subscriber set; held while fanning out
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._state = None
+        self._token = None
+        self._seq = 0
+        self._watcher = None
+        self.events = 0
+
+    def notify(self):
+        """Called by writers once their change is complete: broadcasts the delta, if anyone listens."""
+        if self._subscribers and self.state is not None:
+            self._refresh()
+
+    def _refresh(self):
+        with self._lock:
+            if not self._subscribers:
+                # Nobody to diff for: the next subscriber starts from a fresh snapshot
+                self._state = None
+                return
+            self._update()
+
+    def _update(self):
+        """Rebuilds the state and queues its delta for every subscriber. Caller holds the lock."""
+        token = self.token() if self.token else None
+        state = self.state()
+        old, self._state, self._token = self._state, state, token
+        delta = diff(old, state) if old is not None else None
+        if not delta:
+            return
+        self._seq += 1
+        self.events += 1
+        message = (self._seq, _event('delta', self._seq, delta))
+        for loop, queue in list(self._subscribers):
+            loop.call_soon_threadsafe(self._offer, queue, message)
+
+    def _offer(self, queue, message):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_RESYNC)
+        else:
+            queue.put_nowait(message)
+
+    def _snapshot(self, subscriber=None):
+        """(seq, snapshot event) of the published state, registering `subscriber` atomically with it."""
+        with self._lock:
+            if self._state is None or (self.token and self.token() != self._token):
+                # Bring everyone else up to date first, so the snapshot is what later deltas build on
+                self._update()
+            if subscriber is not None:
+                self._subscribers.add(subscriber)
+            return self._seq, _event('snapshot', self._seq, self._state)
+
+    async def _watch(self):
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            if self.token is not None and self.token() != self._token:
+                await run_in_threadpool(self._refresh)
+        self._watcher = None
+
+    async def stream(self):
+        """SSE byte stream for one client: a snapshot, then deltas until it disconnects."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.max_backlog)
+        subscriber = (loop, queue)
+        try:
+            # Deltas queued from here on all have seq > the snapshot's
+            seen, snapshot = await run_in_threadpool(self._snapshot, subscriber)
+            yield snapshot
+            if self._watcher is None:
+                self._watcher = loop.create_task(self._watch())
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield b": keepalive\n\n"
+                    continue
+                if message is _RESYNC:
+                    seen, snapshot = await run_in_threadpool(self._snapshot)
+                    yield snapshot
+                    continue
+                seq, body = message
+                if seq > seen:
+                    seen = seq
+                    yield body
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+
+live_feed = LiveFeed()
@@ -0,0 +1,112 @@
+"""
+Response cache for the endpoints the dashboard polls.
+
+The frontend pages re-request the same handful of GET endpoints every few
+seconds, but their answers only change when the data does: on a reload or a
+simulation tick, both of which move `data_loader.version` on. This ASGI
+middleware keeps the serialized body of each cached path per data version,
+so a poll between two changes skips the handler entirely, and tags it with
+a strong ETag (a hash of the body) so clients that send If-None-Match get an
+empty 304 instead of the body.
+
+On a miss the route runs as usual, response_model validation included, and
+its 200 body is stored under the version read before the route ran: if the
+data changes meanwhile, the next request sees a newer version and recomputes.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ('version', 'etag', 'body', 'headers')
+
+    def __init__(self, version, etag, body, headers):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.headers = headers
+
+
+def _etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match, etag):
+    """If-None-Match uses weak comparison: W/ prefixes are ignored, * matches anything."""
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class ResponseCacheMiddleware:
+    """Serves GET requests for `paths` from a per-data-version cache of response bodies."""
+    def __init__(self, app, paths, version, max_entries=256):
+        self.app = app
+        self.paths = set(paths)
+        self.version = version
+        self.max_entries = max_entries
+        # (path, query string) -> _Entry, least recently used first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'GET' or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope['path'], scope.get('query_string', b''))
+        version = self.version()
+        entry = self.entries.get(key)
+        if entry is not None and entry.version == version:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = await self._render(scope, receive, send, version)
+            if entry is None:
+                return
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        request_headers = dict(scope['headers'])
+        if_none_match = request_headers.get(b'if-none-match')
+        if if_none_match is not None and _matches(if_none_match.decode('latin-1'), entry.etag):
+            await self._send(send, 304, self._validators(entry), b'')
+        else:
+            await self._send(send, 200, entry.headers + self._validators(entry), entry.body)
+
+    async def _render(self, scope, receive, send, version):
+        """Runs the route; returns its cache entry, or None after passing a non-200 answer straight through."""
+        messages = []
+
+        async def capture(message):
+            messages.append(message)
+
+        await self.app(scope, receive, capture)
+        start = messages[0]
+        if start['type'] != 'http.response.start' or start['status'] != 200:
+            for message in messages:
+                await send(message)
+            return None
+
+        body = b''.join(m.get('body', b'') for m in messages[1:] if m['type'] == 'http.response.body')
+        headers = [(k, v) for k, v in start.get('headers', []) if k.lower() not in (b'content-length', b'etag', b'cache-control')]
+        return _Entry(version, _etag(body), body, headers)
+
+    @staticmethod
+    def _validators(entry):
+        # no-cache: browsers may keep the body but must revalidate it with the ETag on every poll
+        return [(b'etag', entry.etag.encode('latin-1')), (b'cache-control', b'no-cache')]
+
+    @staticmethod
+    async def _send(send, status, headers, body):
+        if status != 304:
+            headers = headers + [(b'content-length', str(len(body)).encode('latin-1'))]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,178 @@
+"""
+Background clock for the live simulation.
+
+Without it the simulation only moves when a client posts /simulate-tick.
+The scheduler runs one asyncio task on the app's event loop that calls
+simulate_tick every `interval` seconds. The tick itself (pandas, model
+inference) runs on a worker thread, so the loop keeps serving requests and
+the live stream while it works. simulate_tick takes the data loader's write
+lock, so scheduled ticks and ticks posted by clients still run one at a time.
+
+Ticks are scheduled at a fixed rate: the next one is due `interval` after
+the last one was due, not after it finished. A tick that runs past its slot
+is counted as an overrun, and the schedule restarts from the time it ended,
+so a slow tick is never followed by a burst of catch-up ticks.
+
+The task is started and stopped by the app lifespan (main.py) and controlled
+through /demo/start, /demo/pause, /demo/resume and /demo/stop. /demo/status
+returns `stats()`, which includes the latency of recent ticks.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from .simulation_service import simulation_service
+
+# Seconds between ticks unless SIM_TICK_SECONDS says otherwise: the
+# dashboard's 10 s simulated day
+DEFAULT_TICK_SECONDS = 10.0
+# Recent tick latencies kept for stats()
+LATENCY_WINDOW = 500
+
+
+class SimulationScheduler:
+    def __init__(self, service, interval=None, days=1):
+        if interval is None:
+            interval = float(os.getenv("SIM_TICK_SECONDS", DEFAULT_TICK_SECONDS))
+        if interval <= 0:
+            raise ValueError("Tick interval must be positive")
+        self.service = service
+        self.interval = interval
+        # Days each tick advances (simulate_tick's fast-forward)
+        self.days = days
+        self.paused = False
+        self._task = None
+        self._stopping = False
+        # Set by the controls to cut a wait short
+        self._wake = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.ticks = 0
+        self.errors = 0
+        self.overruns = 0
+        self.last_error = None
+        self.last_tick = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    @property
+    def state(self):
+        if not self.running:
+            return "stopped"
+        return "paused" if self.paused else "running"
+
+    async def start(self, interval=None, days=None):
+        """
+        Starts ticking (resuming if paused) on the running event loop.
+        `interval` and `days` replace the current settings; on a running
+        scheduler they apply from the next tick.
+        """
+        if interval is not None:
+            if interval <= 0:
+                raise ValueError("Tick interval must be positive")
+            self.interval = interval
+        if days is not None:
+            self.days = days
+        self.paused = False
+        if self.running:
+            self._wake.set()
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def pause(self):
+        """Stops scheduling ticks, keeping the task; a tick already running finishes."""
+        self.paused = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def resume(self):
+        """Ticks again right away, then every interval."""
+        self.paused = False
+        if self._wake is not None:
+            self._wake.set()
+
+    async def stop(self):
+        """Stops the task, after the tick in progress (if any) has finished."""
+        if not self.running:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    async def _wait(self, timeout=None):
+        """Sleeps up to `timeout` seconds (forever if None), or until a control wakes the task."""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while not self._stopping:
+            if self.paused:
+                await self._wait()
+                due = loop.time()
+                continue
+            delay = due - loop.time()
+            if delay > 0:
+                await self._wait(delay)
+                continue
+            await self._tick()
+            due += self.interval
+            now = loop.time()
+            if due < now:
+                self.overruns += 1
+                due = now
+
+    async def _tick(self):
+        start = time.perf_counter()
+        try:
+            await run_in_threadpool(self.service.simulate_tick, self.days)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Scheduled simulation tick failed: {e}")
+            return
+        self.latencies.append(time.perf_counter() - start)
+        self.ticks += 1
+        self.last_tick = datetime.now()
+
+    def stats(self):
+        """State, settings and counters, with latency percentiles of the last LATENCY_WINDOW ticks in ms."""
+        stats = {
+            "state": self.state,
+            "interval_s": self.interval,
+            "days_per_tick": self.days,
+            "ticks": self.ticks,
+            "errors": self.errors,
+            "overruns": self.overruns,
+            "last_error": self.last_error,
+            "last_tick": self.last_tick.strftime("%Y-%m-%d %H:%M:%S") if self.last_tick else None,
+            "latency_ms": None,
+        }
+        if self.latencies:
+            ms = np.array(self.latencies) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stats["latency_ms"] = {
+                "samples": len(ms),
+                "last": round(float(ms[-1]), 1),
+                "mean": round(float(ms.mean()), 1),
+                "p50": round(float(p50), 1),
+                "p95": round(float(p95), 1),
+                "p99": round(float(p99), 1),
+                "max": round(float(ms.max()), 1),
+            }
+        return stats
+
+
+sim_scheduler = SimulationScheduler(simulation_service)
@@ -0,0 +1,66 @@
+"""
+soak_history.py
+---------------
+Runs the live simulation for many ticks and samples resident memory, to
+check that the bounded history keeps it flat: once the retention window is
+full, the served history stops growing and RSS levels off.
+
+A week of the dashboard's 10 s tick is 60,480 ticks; --ticks sets how many
+to run here. Pass --spill-dir to also write evicted days to disk.
+
+    python soak_history.py [--ticks 2000] [--retention 90] [--every 200] [--spill-dir /tmp/spill]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import resource
+import time
+
+# The service reads these when it is imported
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--ticks', type=int, default=2000)
+parser.add_argument('--retention', type=int, default=90)
+parser.add_argument('--every', type=int, default=200)
+parser.add_argument('--spill-dir', default=None)
+args = parser.parse_args()
+os.environ['SIM_RETENTION_DAYS'] = str(args.retention)
+if args.spill_dir:
+    os.environ['SIM_SPILL_DIR'] = args.spill_dir
+
+from services.data_loader import data_loader
+from services.simulation_service import simulation_service
+
+
+def rss_mb():
+    """Current resident set size; peak RSS where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    print(f"\n{'tick':>6} {'days':>5} {'rows':>7} {'RSS (MB)':>9} {'ms/tick':>8}")
+    start, last = time.perf_counter(), 0
+    for tick in range(1, args.ticks + 1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulation_service.simulate_tick()
+        if tick % args.every == 0 or tick == args.ticks:
+            elapsed = time.perf_counter() - start
+            gc.collect()
+            merged = data_loader.snapshot()['merged']
+            print(f"{tick:>6} {merged['date'].nunique():>5} {len(merged):>7} {rss_mb():>9.1f} "
+                  f"{elapsed * 1000 / (tick - last):>8.1f}")
+            start, last = time.perf_counter(), tick
+    simulation_service.close()
+    ring = simulation_service.day_state.ring
+    if ring.spill_path:
+        print(f"\nspilled {ring.spilled_days} days to {ring.spill_path} ({os.path.getsize(ring.spill_path) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+stage_cache.py
+--------------
+Content-hash cache for the ml_engine.py stage graph.
+
+Each stage gets a key hashed from everything its result depends on: the bytes
+of the source CSVs, the feature column lists and the model hyperparameters,
+plus the keys of the stages it consumes. After a run the keys are stored in
+ml_outputs/stage_cache.json next to the artifacts they describe; on the next
+run a stage whose key is unchanged reuses its stored artifact instead of
+being recomputed.
+
+Hashing a file reads it once. Its digest is remembered together with its size
+and mtime, so an untouched file is never read again just to be hashed.
+"""
+
+import hashlib
+import json
+import os
+
+CHUNK_BYTES = 1 << 20
+
+
+class StageCache:
+    def __init__(self, path):
+        self.path = path
+        # stage name -> key of the artifacts currently on disk
+        self.stages = {}
+        # file path -> {"size", "mtime_ns", "sha256"}
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                raw = json.load(f)
+            self.stages = raw.get("stages", {})
+            self.files = raw.get("files", {})
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"stages": self.stages, "files": self.files}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def file_digest(self, path):
+        """sha256 of a file's contents, reusing the stored digest while size and mtime are unchanged."""
+        st = os.stat(path)
+        known = self.files.get(path)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            return known["sha256"]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(CHUNK_BYTES), b''):
+                digest.update(block)
+        self.files[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def hit(self, stage, key):
+        return self.stages.get(stage) == key
+
+    def record(self, keys):
+        """Marks the artifacts of each stage in `keys` as current."""
+        self.stages.update(keys)
+
+    def invalidate(self):
+        """Forgets every stage key, e.g. after a run that rewrote artifacts outside the graph."""
+        self.stages = {}
+        if os.path.exists(self.path):
+            self.save()
+
+
+def stage_key(*parts):
+    """Stable hash of JSON-serializable parts (lists, dicts, strings, numbers, other keys)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
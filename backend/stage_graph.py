@@ -0,0 +1,101 @@
+"""
+stage_graph.py
+--------------
+Minimal dependency-graph runner for the ml_engine.py pipeline.
+
+Each Stage names the stages it depends on. A stage starts as soon as all of
+its dependencies have finished, so independent stages (e.g. the forecaster and
+the anomaly detector) overlap. Stages marked `process=True` run in a process
+pool and must use a picklable, module-level function; the rest run in the
+calling process, which keeps large frames out of inter-process pickling.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+
+class Stage:
+    def __init__(self, name, fn, deps=(), inputs=None, process=False):
+        """
+        fn:      callable run with the stage's arguments
+        deps:    names of stages that must finish first
+        inputs:  callable(results) -> tuple of arguments for fn; defaults to
+                 the results of `deps` in order. Runs in the calling process, so
+                 it can slice large results down before they are pickled.
+        process: run fn in the process pool instead of in the calling process
+        """
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.inputs = inputs or (lambda results: tuple(results[d] for d in self.deps))
+        self.process = process
+
+
+def cores_per_stage(concurrent, max_workers=None):
+    """
+    n_jobs for each of `concurrent` process stages running at once: the
+    cores split between the ones the pool (max_workers) runs side by side,
+    so they don't each start a thread per core.
+    """
+    cores = os.cpu_count() or 1
+    side_by_side = max(1, min(concurrent, max_workers or cores))
+    return max(1, cores // side_by_side)
+
+
+def run_stages(stages, max_workers=None):
+    """
+    Runs `stages` in dependency order, overlapping independent ones.
+    Returns (results, timings): results by stage name, and per-stage
+    (start, end) offsets in seconds from the start of the run.
+    """
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        missing = [d for d in s.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{s.name}' depends on unknown stages {missing}")
+
+    results, timings = {}, {}
+    pending = list(stages)
+    running = {}
+    t0 = time.perf_counter()
+    workers = max_workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            ready = [s for s in pending if all(d in results for d in s.deps)]
+            # Hand off every ready process stage before blocking on an inline one
+            ready.sort(key=lambda s: not s.process)
+            for stage in ready:
+                pending.remove(stage)
+                args = stage.inputs(results)
+                start = time.perf_counter() - t0
+                if stage.process:
+                    running[pool.submit(stage.fn, *args)] = (stage, start)
+                else:
+                    results[stage.name] = stage.fn(*args)
+                    timings[stage.name] = (start, time.perf_counter() - t0)
+                    break  # finished work may unblock more stages; re-scan
+
+            if running and not any(all(d in results for d in s.deps) for s in pending):
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, start = running.pop(future)
+                    results[stage.name] = future.result()
+                    timings[stage.name] = (start, time.perf_counter() - t0)
+            elif not running and pending and not ready:
+                raise ValueError(f"Stages {[s.name for s in pending]} have unsatisfiable dependencies")
+
+    return results, timings
+
+
+def report_timings(timings):
+    """Prints per-stage wall-clock time and the overlap gained by running stages concurrently."""
+    total = max(end for _, end in timings.values()) if timings else 0.0
+    serial = sum(end - start for start, end in timings.values())
+    print("\n--- STAGE TIMINGS ---")
+    for name, (start, end) in sorted(timings.items(), key=lambda kv: kv[1][0]):
+        print(f"{name:<12} {end - start:8.2f}s  (from {start:6.2f}s to {end:6.2f}s)")
+    print(f"{'wall clock':<12} {total:8.2f}s")
+    if total > 0:
+        print(f"{'sum of stages':<12} {serial:6.2f}s  ({serial / total:.2f}x overlap)")
@@ -0,0 +1,142 @@
+"""
+stress_snapshots.py
+-------------------
+Runs simulation ticks from several threads at once while reader threads
+serve the dashboard from data_loader snapshots, then checks that:
+
+  - every snapshot a reader grabbed was internally consistent: merged,
+    risk_scores, predictions and anomalies all end on the same day;
+  - no tick was lost or applied twice: the history grew by exactly one
+    day per tick, with no gaps or repeated dates;
+  - no reader raised.
+
+For comparison, one more reader fetches the same latest days through
+separate data_loader.get_* calls (no snapshot) and counts how often they
+straddle a tick. The last table is read throughput with 1..N reader threads
+while one thread keeps ticking.
+
+    python stress_snapshots.py [--ticks 40] [--tick-workers 4] [--readers 1 2 4 8] [--seconds 3]
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from services.data_loader import data_loader
+from services.alert_engine import alert_engine
+from services.simulation_service import simulation_service
+from routes.dashboard import summarize
+
+DATASETS = ['merged', 'risk_scores', 'predictions', 'anomalies']
+
+
+def read_snapshot():
+    """One dashboard read; returns whether the snapshot was consistent."""
+    snapshot = data_loader.snapshot()
+    last_days = {snapshot.dates(key).dates[-1] for key in DATASETS}
+    snapshot.get_risk_zones()
+    alert_engine.alert_columns(snapshot)
+    summarize(snapshot)
+    return len(last_days) == 1
+
+
+def read_separately():
+    """The same latest days through separate calls, each seeing whatever is current."""
+    days = {
+        data_loader.get_latest_risk_scores()['date'].max(),
+        data_loader.get_latest_predictions()['date'].max(),
+        data_loader.get_latest_anomalies()['date'].max(),
+    }
+    return len(days) == 1
+
+
+class Readers:
+    """Reader threads calling `read` until stopped, counting reads, inconsistent reads and errors."""
+    def __init__(self, read, n):
+        self.read = read
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.reads = self.mixed = 0
+        self.errors = []
+        self.threads = [threading.Thread(target=self._run) for _ in range(n)]
+
+    def _run(self):
+        while not self.stop.is_set():
+            try:
+                consistent = self.read()
+            except Exception as e:
+                with self.lock:
+                    self.errors.append(repr(e))
+                continue
+            with self.lock:
+                self.reads += 1
+                self.mixed += not consistent
+
+    def __enter__(self):
+        for t in self.threads:
+            t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        for t in self.threads:
+            t.join()
+
+
+def check_history(days_before, ticks):
+    dates = np.unique(data_loader.snapshot().dates('merged').dates)
+    new_days = dates[len(days_before):]
+    gaps = np.diff(dates.astype('datetime64[D]').astype(np.int64))
+    return len(new_days) == ticks and np.array_equal(dates[:len(days_before)], days_before) and bool((gaps == 1).all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ticks', type=int, default=40)
+    parser.add_argument('--tick-workers', type=int, default=4)
+    parser.add_argument('--readers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    days_before = np.unique(data_loader.snapshot().dates('merged').dates)
+    # simulate_tick prints a line per day
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with quiet, Readers(read_snapshot, 4) as snap_readers, Readers(read_separately, 1) as call_readers:
+        with ThreadPoolExecutor(args.tick_workers) as pool:
+            list(pool.map(lambda _: simulation_service.simulate_tick(), range(args.ticks)))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{args.ticks} ticks from {args.tick_workers} threads in {elapsed:.1f}s")
+    print(f"  history: {'ok' if check_history(days_before, args.ticks) else 'LOST OR REPEATED DAYS'}")
+    print(f"  snapshot reads: {snap_readers.reads}, inconsistent: {snap_readers.mixed}, errors: {len(snap_readers.errors)}")
+    print(f"  separate-call reads: {call_readers.reads}, straddling a tick: {call_readers.mixed}, errors: {len(call_readers.errors)}")
+    for error in (snap_readers.errors + call_readers.errors)[:5]:
+        print(f"    {error}")
+
+    print(f"\n{'readers':>8} {'reads/s':>9} {'ticks/s':>8} {'inconsistent':>13}")
+    for n in args.readers:
+        ticks = 0
+        stop = threading.Event()
+
+        def ticker():
+            nonlocal ticks
+            while not stop.is_set():
+                simulation_service.simulate_tick()
+                ticks += 1
+
+        tick_thread = threading.Thread(target=ticker)
+        with contextlib.redirect_stdout(io.StringIO()), Readers(read_snapshot, n) as readers:
+            tick_thread.start()
+            time.sleep(args.seconds)
+            stop.set()
+            tick_thread.join()
+        print(f"{n:>8} {readers.reads / args.seconds:>9.1f} {ticks / args.seconds:>8.1f} {readers.mixed:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import os
+import sys
+import pandas as pd
+import pytest
+
+# Tests import the backend modules as the app does (main.py adds backend to the path)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Pipeline:
+    """ml_engine runs on a slice of the bundled source CSVs, writing under a temporary directory."""
+    def __init__(self, root, monkeypatch):
+        import ml_engine
+        self.ml_engine = ml_engine
+        self.root = root
+        self.monkeypatch = monkeypatch
+        read = lambda path: pd.read_csv(path, dtype=str, keep_default_na=False)
+        self.sources = {'hospital': read(ml_engine.hospital_path), 'water': read(ml_engine.water_path)}
+        self.dates = sorted(self.sources['hospital']['date'].unique())
+        self.paths = {name: str(root / f'{name}.csv') for name in self.sources}
+
+    def write_sources(self, start, end, append=False):
+        """Writes (or appends) the source rows of the days dates[start:end], in file order."""
+        for name, df in self.sources.items():
+            rows = df[(df['date'] >= self.dates[start]) & (df['date'] < self.dates[end])]
+            rows.to_csv(self.paths[name], mode='a' if append else 'w', header=not append, index=False)
+
+    def use(self, name):
+        """Points ml_engine's outputs and models at <root>/<name>; returns that directory."""
+        target = self.root / name
+        for sub in ('ml_outputs', 'models'):
+            (target / sub).mkdir(parents=True, exist_ok=True)
+        output_path = str(target / 'ml_outputs')
+        self.monkeypatch.setattr(self.ml_engine, 'output_path', output_path)
+        self.monkeypatch.setattr(self.ml_engine, 'models_path', str(target / 'models'))
+        self.monkeypatch.setattr(self.ml_engine, 'feature_store_path', str(target / 'ml_outputs' / 'feature_store.json'))
+        self.monkeypatch.setattr(self.ml_engine, 'stage_cache_path', str(target / 'ml_outputs' / 'stage_cache.json'))
+        return target
+
+    def run(self, *args):
+        """ml_engine.main on the written sources with CSV outputs, silenced."""
+        argv = ['--hospital', self.paths['hospital'], '--water', self.paths['water'], '--output-format', 'csv', *args]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.ml_engine.main(argv)
+
+    def output(self, name):
+        return pd.read_csv(os.path.join(self.ml_engine.output_path, name + '.csv'))
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    return _Pipeline(tmp_path, monkeypatch)
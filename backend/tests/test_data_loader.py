@@ -0,0 +1,64 @@
+import threading
+import time
+import pytest
+from services.data_loader import data_loader
+
+
+class _LateWaker(threading.Condition):
+    """Condition whose waits, in the thread named `late`, return only once `go` is set."""
+    def __init__(self, late, go):
+        super().__init__()
+        self.late = late
+        self.go = go
+
+    def wait(self, timeout=None):
+        woken = super().wait(timeout)
+        if threading.current_thread().name == self.late and not self.go.is_set():
+            self.release()
+            self.go.wait()
+            self.acquire()
+        return woken
+
+
+def test_reload_error_reaches_callers_woken_after_later_runs(monkeypatch):
+    first_running, release_first, go = threading.Event(), threading.Event(), threading.Event()
+    loads = []
+
+    def load_data():
+        loads.append(threading.current_thread().name)
+        if len(loads) == 1:
+            first_running.set()
+            release_first.wait()
+        elif len(loads) == 2:
+            raise RuntimeError("second load failed")
+
+    monkeypatch.setattr(data_loader, 'load_data', load_data)
+    monkeypatch.setattr(data_loader, '_reload_cond', _LateWaker('late', go))
+    errors = {}
+
+    def call():
+        try:
+            data_loader.reload()
+        except RuntimeError as e:
+            errors[threading.current_thread().name] = e
+
+    first = threading.Thread(target=call, name='first')
+    first.start()
+    first_running.wait()
+    # Both arrive during the first load, so the second one is theirs; 'late' wakes only after a third
+    sharers = [threading.Thread(target=call, name=name) for name in ('late', 'runner')]
+    for t in sharers:
+        t.start()
+    while len(data_loader._reload_cond._waiters) < 2:
+        time.sleep(0.01)
+    release_first.set()
+    sharers[1].join()
+    data_loader.reload()
+    go.set()
+    first.join()
+    sharers[0].join()
+
+    assert len(loads) == 3
+    assert 'first' not in errors
+    assert str(errors['runner']) == str(errors['late']) == "second load failed"
+    assert not data_loader._reload_errors and not data_loader._reload_callers
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from models.artifacts import load_model, save_model
+from models.flat_forest import SKLEARN_MIN_ROWS, FlatForest
+
+
+def _forest():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(500, 4)), columns=['a', 'b', 'c', 'd'])
+    y = X['a'] * 2 + rng.normal(size=500)
+    return RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y), X
+
+
+def test_large_batches_go_to_the_saved_estimator(tmp_path):
+    rf, X = _forest()
+    save_model(str(tmp_path), 'forecaster', rf)
+    flat = load_model(str(tmp_path), 'forecaster')
+    assert isinstance(flat, FlatForest)
+
+    small = X.iloc[:17]
+    np.testing.assert_allclose(flat.predict(small), rf.predict(small))
+    assert flat._estimator is None
+
+    large = X.sample(SKLEARN_MIN_ROWS, replace=True, random_state=0)
+    np.testing.assert_array_equal(flat.predict(large), rf.predict(large))
+    assert isinstance(flat._estimator, RandomForestRegressor)
+
+
+def test_resaving_leaves_loaded_versions_in_place(tmp_path):
+    rf, X = _forest()
+    models_path = str(tmp_path)
+    save_model(models_path, 'forecaster', rf)
+    forest_dir = tmp_path / 'forecaster.forest'
+    first_version = (forest_dir / 'CURRENT').read_text()
+    first = load_model(models_path, 'forecaster')
+
+    save_model(models_path, 'forecaster', rf)
+    second_version = (forest_dir / 'CURRENT').read_text()
+    assert second_version != first_version
+    # The version a server still has mapped is kept through the next save
+    assert (forest_dir / first_version / 'left.npy').exists()
+    assert load_model(models_path, 'forecaster')._estimator is None
+
+    save_model(models_path, 'forecaster', rf)
+    assert sorted(p.name for p in forest_dir.iterdir()) == sorted(
+        ['CURRENT', second_version, (forest_dir / 'CURRENT').read_text()])
+    # Its estimator pruned, the first forest keeps predicting from its mapped arrays
+    large = X.sample(SKLEARN_MIN_ROWS, replace=True, random_state=0)
+    np.testing.assert_allclose(first.predict(large), rf.predict(large))
+    assert first._estimator is None
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services.data_loader import data_loader
+from services.heat_tiles import MAX_TILES_PER_REQUEST, tile_range
+from routes import map
+
+
+@pytest.fixture
+def client():
+    """The map router over 2000 synthetic hospitals spread over India."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    date = pd.Timestamp('2026-03-01')
+    names = [f"Hospital {i}" for i in range(n)]
+    risk = rng.uniform(0, 100, n)
+    data_loader.publish({
+        'merged': pd.DataFrame({
+            'city': names, 'date': date, 'lat': rng.uniform(8, 35, n), 'lng': rng.uniform(68, 97, n),
+        }),
+        'risk_scores': pd.DataFrame({
+            'city': names, 'date': date, 'riskScore': risk,
+            'riskLevel': np.where(risk >= 85, 'Critical', np.where(risk >= 70, 'High', 'Moderate')),
+        }),
+    })
+    app = FastAPI()
+    app.include_router(map.router, prefix="/map")
+    yield TestClient(app)
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_loader.load_data()
+
+
+def _window(zoom, width_px, height_px, lat=21.5, lng=82.5):
+    """bbox of a Web Mercator map window centered on (lat, lng), as Leaflet reports it."""
+    world_px = 256 * 2 ** zoom
+    y = (1 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2 * world_px
+
+    def latitude(py):
+        py = min(max(py, 0), world_px)
+        return float(np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py / world_px)))))
+
+    half_w = width_px / 2 * 360.0 / world_px
+    return (lng - half_w, latitude(y + height_px / 2), lng + half_w, latitude(y - height_px / 2))
+
+
+@pytest.mark.parametrize("bounds, zoom", [
+    # The Indian subcontinent
+    ((60, 5, 100, 40), 7),
+    # A 2560 x 1440 window
+    (_window(5, 2560, 1440), 5),
+    (_window(6, 2560, 1440), 6),
+    # No bbox: the whole map
+    (None, 4),
+    (None, 12),
+])
+def test_wide_viewports_are_served_at_a_lower_zoom(client, bounds, zoom):
+    params = {'zoom': zoom}
+    if bounds is not None:
+        params['bbox'] = ','.join(str(v) for v in bounds)
+    response = client.get('/map/heatmap', params=params)
+    assert response.status_code == 200
+    used = int(response.headers['X-Heatmap-Zoom'])
+    assert used < zoom
+    tx0, tx1, ty0, ty1 = tile_range(used, *(bounds or (-180, -90, 180, 90)))
+    assert (tx1 - tx0 + 1) * (ty1 - ty0 + 1) <= MAX_TILES_PER_REQUEST
+    # Every hospital is in view, each counted in exactly one cell
+    assert sum(count for _, _, _, count in response.json()) == 2000
+
+
+def test_narrow_viewport_keeps_its_zoom(client):
+    bbox = ','.join(str(v) for v in _window(6, 1280, 800))
+    response = client.get('/map/heatmap', params={'bbox': bbox, 'zoom': 6})
+    assert response.status_code == 200
+    assert response.headers['X-Heatmap-Zoom'] == '6'
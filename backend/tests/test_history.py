@@ -0,0 +1,71 @@
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services.data_loader import data_loader
+from routes import prediction, risk
+
+DAYS = pd.date_range('2026-01-01', periods=60)
+
+
+@pytest.fixture
+def data():
+    """Two cities of three hospitals each over DAYS, rows shuffled, served by the history routes."""
+    rng = np.random.default_rng(0)
+    rows = pd.DataFrame([(city, f"{city} {h}", day) for city in ('Pune', 'Agra') for h in range(3) for day in DAYS],
+                        columns=['city', 'hospital', 'date'])
+    rows['riskScore'] = rng.uniform(0, 60, len(rows))
+    rows['predicted_cases_48h'] = rng.uniform(0, 20, len(rows))
+    # One day stands out, so thinning must keep it
+    spike = (rows['city'] == 'Pune') & (rows['date'] == DAYS[41])
+    rows.loc[spike, 'riskScore'] = 99.0
+    rows = rows.sample(frac=1, random_state=0).reset_index(drop=True)
+    rows['riskLevel'] = 'Moderate'
+    data_loader.publish({
+        'risk_scores': rows[['city', 'date', 'riskScore', 'riskLevel']],
+        'predictions': rows[['city', 'date', 'predicted_cases_48h']],
+    })
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/prediction")
+    app.include_router(risk.router, prefix="/risk")
+    yield TestClient(app), rows
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_loader.load_data()
+
+
+def test_range_is_inclusive_and_aggregated_per_day(data):
+    client, rows = data
+    pune = rows[(rows['city'] == 'Pune') & rows['date'].between(DAYS[10], DAYS[19])].groupby('date')
+
+    response = client.get('/risk/history', params={'city': 'Pune', 'from': '2026-01-11', 'to': '2026-01-20'})
+    assert response.status_code == 200
+    history = response.json()
+    assert [p['date'] for p in history] == [d.strftime('%Y-%m-%d') for d in DAYS[10:20]]
+    np.testing.assert_allclose([p['riskScore'] for p in history], pune['riskScore'].mean())
+
+    response = client.get('/prediction/history', params={'city': 'Pune', 'from': '2026-01-11', 'to': '2026-01-20'})
+    np.testing.assert_allclose([p['predicted_cases_48h'] for p in response.json()], pune['predicted_cases_48h'].sum())
+
+    assert client.get('/risk/history', params={'city': 'Pune', 'from': '2026-03-05'}).json() == []
+    assert client.get('/risk/history', params={'city': 'Oslo'}).status_code == 404
+
+
+def test_points_thin_to_each_stretchs_peak(data):
+    client, rows = data
+    full = client.get('/risk/history', params={'city': 'Pune'}).json()
+    assert len(full) == len(DAYS)
+
+    thinned = client.get('/risk/history', params={'city': 'Pune', 'points': 7}).json()
+    assert len(thinned) == 7
+    dates = [p['date'] for p in thinned]
+    assert dates == sorted(dates)
+    # Every kept point is a real day, and the spike survives
+    by_date = {p['date']: p['riskScore'] for p in full}
+    assert all(by_date[p['date']] == p['riskScore'] for p in thinned)
+    assert DAYS[41].strftime('%Y-%m-%d') in dates
+
+    assert len(client.get('/risk/history', params={'city': 'Pune', 'points': 500}).json()) == len(DAYS)
+    assert client.get('/risk/history', params={'city': 'Pune', 'points': 0}).status_code == 422
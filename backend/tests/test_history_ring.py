@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from services.history_ring import HistoryRing
+
+
+def _day(date, admissions, levels):
+    return pd.DataFrame({
+        'date': pd.Timestamp(date),
+        'admissions': np.array(admissions, dtype=np.int8),
+        'riskLevel': pd.Categorical(levels),
+    })
+
+
+def test_compact_columns_are_widened():
+    ring = HistoryRing(3)
+    ring.extend(_day('2026-01-01', [10, 20], ['Low', 'Low']))
+    # Later days bring counts past int8 and a level the first day's categories don't have
+    day = pd.DataFrame({
+        'date': pd.Timestamp('2026-01-02'),
+        'admissions': np.array([300, 5], dtype=np.int64),
+        'riskLevel': ['Critical', 'Low'],
+    })
+    ring.extend(day)
+    frame = ring.frame()
+    assert frame['admissions'].tolist() == [10, 20, 300, 5]
+    assert frame['admissions'].dtype == np.int64
+    assert frame['riskLevel'].tolist() == ['Low', 'Low', 'Critical', 'Low']
+
+
+def test_compact_ring_keeps_compact_types_and_widens_on_demand():
+    ring = HistoryRing(3, compact=True)
+    ring.extend(pd.DataFrame({
+        'date': pd.Timestamp('2026-01-01'),
+        'admissions': np.array([10, 20], dtype=np.int8),
+        'riskLevel': pd.Categorical(['Low', 'Low']),
+        'turbidity_NTU': np.array([1.5, 2.5], dtype=np.float32),
+    }), spill=False)
+    first = ring.frame()
+    ring.extend(pd.DataFrame({
+        'date': pd.Timestamp('2026-01-02'),
+        'admissions': np.array([300, 5], dtype=np.int64),
+        'riskLevel': ['Critical', 'Low'],
+        'turbidity_NTU': [3.25, 4.0],
+    }))
+    frame = ring.frame()
+    assert frame['admissions'].tolist() == [10, 20, 300, 5]
+    assert frame['admissions'].dtype == np.int16
+    assert frame['riskLevel'].tolist() == ['Low', 'Low', 'Critical', 'Low']
+    assert isinstance(frame['riskLevel'].dtype, pd.CategoricalDtype)
+    assert frame['turbidity_NTU'].dtype == np.float32
+    # Frames already handed out are untouched by the widening
+    assert first['admissions'].dtype == np.int8
+    assert first['riskLevel'].tolist() == ['Low', 'Low']
@@ -0,0 +1,37 @@
+import numpy as np
+from models.artifacts import load_model
+
+# Engineered columns compared between runs, as the models see them before scaling
+FEATURES = ['admissions', 'lat', 'lng', 'rolling_cases_24h', 'rolling_cases_72h', 'delta_cases', 'case_growth_rate',
+            'water_contamination_index', 'humidity_index', 'rainfall_index', 'environmental_risk_index',
+            'bed_occupancy_rate']
+
+
+def _unscaled_new_rows(pipeline, since):
+    """merged_features rows dated `since` or later, by hospital and date, with the feature scaler undone."""
+    ml_engine = pipeline.ml_engine
+    merged = pipeline.output('merged_features')
+    merged = merged[merged['date'] >= since].sort_values(['hospital_id', 'date']).reset_index(drop=True)
+    scaler = load_model(ml_engine.models_path, 'scaler')
+    merged[ml_engine.features_to_normalize] = scaler.inverse_transform(merged[ml_engine.features_to_normalize])
+    return merged
+
+
+def test_incremental_run_engineers_the_same_features_as_a_full_run(pipeline):
+    # The appended days raise the water temperature maximum the humidity proxy is divided by
+    cut, end = 30, 40
+    pipeline.write_sources(0, cut)
+    pipeline.use('incremental')
+    pipeline.run()
+    pipeline.write_sources(cut, end, append=True)
+    pipeline.run('--incremental')
+    incremental = _unscaled_new_rows(pipeline, pipeline.dates[cut])
+
+    pipeline.use('full')
+    pipeline.run()
+    full = _unscaled_new_rows(pipeline, pipeline.dates[cut])
+
+    assert len(incremental) == len(full) == 30 * (end - cut)
+    assert (incremental['city'] == full['city']).all()
+    for column in FEATURES:
+        np.testing.assert_allclose(incremental[column], full[column], rtol=1e-9, atol=1e-9, err_msg=column)
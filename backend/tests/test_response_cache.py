@@ -0,0 +1,39 @@
+import contextlib
+import io
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services.data_loader import data_loader
+from services.response_cache import ResponseCacheMiddleware
+from services.simulation_service import simulation_service
+from routes import dashboard
+
+
+@pytest.fixture
+def client():
+    """The dashboard router behind the response cache, on the loaded outputs."""
+    app = FastAPI()
+    app.include_router(dashboard.router, prefix="/dashboard")
+    app.add_middleware(ResponseCacheMiddleware, paths=["/dashboard/summary"], version=lambda: data_loader.version)
+    yield TestClient(app)
+    simulation_service.city_states = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_loader.load_data()
+
+
+def test_matching_etag_gets_304_until_a_tick(client):
+    first = client.get('/dashboard/summary')
+    assert first.status_code == 200
+    etag = first.headers['etag']
+
+    cached = client.get('/dashboard/summary', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+    assert cached.headers['etag'] == etag
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation_service.simulate_tick()
+    ticked = client.get('/dashboard/summary', headers={'If-None-Match': etag})
+    assert ticked.status_code == 200
+    assert ticked.headers['etag'] != etag
+    assert ticked.json() != first.json()
@@ -0,0 +1,34 @@
+import contextlib
+import io
+import pytest
+from services.data_loader import data_loader
+from services.simulation_service import simulation_service
+
+
+@pytest.fixture
+def compact_data():
+    """Compact mode on the loaded outputs, with admissions small enough to be stored as int8."""
+    data_loader.compact = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_loader.load_data()
+    snapshot = data_loader.snapshot()
+    merged = snapshot['merged'].copy()
+    merged['admissions'] = (merged['admissions'] % 50).astype('int64')
+    data_loader.publish({**{key: snapshot[key] for key in snapshot}, 'merged': merged})
+    assert data_loader.snapshot()['merged']['admissions'].dtype == 'int8'
+    yield
+    data_loader.compact = False
+    simulation_service.city_states = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_loader.load_data()
+
+
+def test_compact_ticks_keep_admissions_non_negative(compact_data):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(15):
+            simulation_service.simulate_tick()
+    merged = data_loader.snapshot()['merged']
+    assert (merged['admissions'] >= 0).all()
+    simulated = merged[merged['date'] == merged['date'].max()]
+    # Outbreak peaks add 25-45 admissions a day, well past int8
+    assert simulated['admissions'].max() > 127
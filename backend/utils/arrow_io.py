@@ -0,0 +1,130 @@
+"""
+arrow_io.py
+-----------
+Columnar storage for ml_outputs using the Arrow IPC file format.
+
+Files are written uncompressed so they can be memory-mapped: opening one maps
+the file and reads only the schema and record batch offsets, and selecting
+columns touches only the pages those columns live on. Dates are stored as
+typed timestamps, so nothing is parsed on load.
+
+pyarrow is optional; without it HAS_ARROW is False and callers stay on CSV.
+"""
+
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    HAS_ARROW = True
+except ImportError:
+    pa = None
+    ipc = None
+    HAS_ARROW = False
+
+ARROW_EXT = '.arrow'
+
+
+def write_table(df, path):
+    """Writes `df` to `path` as an Arrow IPC file, atomically."""
+    _write(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+def open_table(path):
+    """Memory-maps an Arrow IPC file; column data is only paged in when read."""
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def append_table(df, path):
+    """
+    Appends the rows of `df` to an existing Arrow file, cast to its schema.
+    Existing rows are copied as raw buffers, never re-parsed.
+    """
+    with pa.OSFile(path, 'rb') as source:
+        old = ipc.open_file(source).read_all()
+    new = pa.Table.from_pandas(df[old.schema.names], schema=old.schema, preserve_index=False)
+    _write(pa.concat_tables([old, new]), path)
+
+
+def _write(table, path):
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+class TableWriter:
+    """
+    Streams DataFrames into one Arrow IPC file as successive record batches.
+    The first frame fixes the schema; the file appears at `path` on close().
+    """
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.sink = None
+        self.writer = None
+        self.schema = None
+
+    def write(self, df):
+        if self.writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.schema = table.schema
+            self.sink = pa.OSFile(self.tmp_path, 'wb')
+            self.writer = ipc.new_file(self.sink, self.schema)
+        else:
+            table = pa.Table.from_pandas(df[self.schema.names], schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.sink.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class StreamWriter:
+    """
+    Appends DataFrames to an Arrow IPC stream file as compressed record
+    batches. Unlike TableWriter the file is written in place and can be read
+    (read_stream) while it grows; the first frame fixes the schema.
+    """
+    def __init__(self, path, compression='zstd'):
+        self.path = path
+        self.options = ipc.IpcWriteOptions(compression=compression if pa.Codec.is_available(compression) else None)
+        self.sink = None
+        self.writer = None
+        self.schema = None
+
+    def write(self, df):
+        if self.writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.schema = table.schema
+            self.sink = pa.OSFile(self.path, 'wb')
+            self.writer = ipc.new_stream(self.sink, self.schema, options=self.options)
+        else:
+            table = pa.Table.from_pandas(df[self.schema.names], schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+        self.sink.flush()
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.sink.close()
+        self.writer = None
+
+
+def read_stream(path):
+    """Reads every record batch of an Arrow IPC stream file."""
+    with pa.OSFile(path, 'rb') as source:
+        return ipc.open_stream(source).read_all()
+
+
+def table_to_frame(table, columns=None):
+    """Converts a table (or just `columns` of it) to pandas."""
+    if columns is not None:
+        table = table.select([c for c in columns if c in table.column_names])
+    return table.to_pandas()
@@ -0,0 +1,48 @@
+"""
+compact.py
+----------
+Smaller in-memory frames for the API's compact storage mode.
+
+compact_frame() converts repetitive string columns (city, hospital_id,
+riskLevel, ...) to categoricals, downcasts integer columns to the smallest
+type that holds them and stores float features as float32. The columns the
+API serves stay float64, so responses for the loaded outputs are the same
+in both modes. The other features keep about 7 significant digits, more than
+the source measurements carry; days simulated from them can differ from the
+float64 run in the last digits of the risk score.
+
+frame_bytes() is the memory a frame holds, string payloads included.
+"""
+
+import pandas as pd
+
+# Served values and inputs of the served values: never downcast
+FLOAT64_COLUMNS = (
+    'lat', 'lng', 'riskScore', 'raw_risk_score', 'predicted_cases_48h', 'anomaly_score',
+)
+
+# A string column becomes categorical if it has at most this many distinct values per row
+MAX_CATEGORY_RATIO = 0.5
+
+
+def compact_frame(df, keep_float64=FLOAT64_COLUMNS):
+    """Returns a compacted copy of `df`; the values compare equal except for float32 rounding."""
+    columns = {}
+    for name, col in df.items():
+        dtype = col.dtype
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype) \
+                or isinstance(dtype, pd.CategoricalDtype):
+            columns[name] = col
+        elif pd.api.types.is_integer_dtype(dtype):
+            columns[name] = pd.to_numeric(col, downcast='integer')
+        elif pd.api.types.is_float_dtype(dtype):
+            columns[name] = col if name in keep_float64 else col.astype('float32')
+        elif pd.api.types.is_string_dtype(dtype) and len(col) and col.nunique() <= MAX_CATEGORY_RATIO * len(col):
+            columns[name] = col.astype('category')
+        else:
+            columns[name] = col
+    return pd.DataFrame(columns, index=df.index)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
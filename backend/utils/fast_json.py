@@ -0,0 +1,51 @@
+"""
+fast_json.py
+------------
+JSON responses built from DataFrame columns instead of row by row.
+
+Handlers pull each column out once as a plain list (`Series.tolist()` runs in
+C and yields Python floats/strs), zip them into records and hand the result
+to orjson, which encodes a list of dicts several times faster than the
+stdlib encoder behind FastAPI's default response. Returning the response
+directly also skips the per-item response_model validation: the columns are
+already converted to the schema's types, so it would only re-check them.
+
+orjson is optional; without it HAS_ORJSON is False and the stdlib encoder
+is used with the same settings as FastAPI's JSONResponse.
+"""
+
+import json
+from fastapi.responses import Response
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+
+def dumps(content):
+    """Encodes `content` to JSON bytes. NaN becomes null under orjson."""
+    if HAS_ORJSON:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def records(columns):
+    """{field: column} -> [{field: value, ...}, ...], one record per row."""
+    names = list(columns)
+    values = [c.tolist() if hasattr(c, 'tolist') else list(c) for c in columns.values()]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+def records_response(columns):
+    """Response whose body is `records(columns)`."""
+    return FastJSONResponse(records(columns))
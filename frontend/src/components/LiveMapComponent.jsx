@@ -1,8 +1,41 @@
-import React from 'react';
-import { MapContainer, TileLayer, CircleMarker, Popup } from 'react-leaflet';
+import React, { useState, useEffect, useCallback } from 'react';
+import { MapContainer, TileLayer, CircleMarker, Popup, useMap, useMapEvents } from 'react-leaflet';
 import 'leaflet/dist/leaflet.css';
+import { getHeatmapData } from '../services/api';
 
-const LiveMapComponent = ({ zones = [], heatmap = [], onMarkerClick }) => {
+// Heat points for the visible area only, aggregated by the backend into a grid
+// for the current zoom; refetched when the map moves or the zones change.
+const ViewportHeatmap = ({ zones }) => {
+    const map = useMap();
+    const [heatmap, setHeatmap] = useState([]);
+
+    const refresh = useCallback(() => {
+        // The backend serves zoom levels 0-18
+        const zoom = Math.min(18, Math.max(0, Math.round(map.getZoom())));
+        getHeatmapData(map.getBounds(), zoom)
+            .then(setHeatmap)
+            .catch((err) => console.error('Heatmap fetch failed:', err));
+    }, [map]);
+
+    useMapEvents({ moveend: refresh });
+    useEffect(() => { refresh(); }, [refresh, zones]);
+
+    return heatmap.map((point, idx) => (
+        <CircleMarker
+            key={`heat-${idx}`}
+            center={[point[0], point[1]]}
+            pathOptions={{
+                color: 'transparent',
+                fillColor: '#ef4444',
+                fillOpacity: 0.15,
+                weight: 0
+            }}
+            radius={25 + (point[2] / 5)}
+        />
+    ));
+};
+
+const LiveMapComponent = ({ zones = [], onMarkerClick }) => {
     const center = [20.5937, 78.9629]; // Center of India
 
     const getMarkerColor = (score) => {
@@ -41,19 +74,7 @@ const LiveMapComponent = ({ zones = [], heatmap = [], onMarkerClick }) => {
                 />
 
                 {/* Heatmap Simulation Layer */}
-                {heatmap.map((point, idx) => (
-                    <CircleMarker
-                        key={`heat-${idx}`}
-                        center={[point[0], point[1]]}
-                        pathOptions={{
-                            color: 'transparent',
-                            fillColor: '#ef4444',
-                            fillOpacity: 0.15,
-                            weight: 0
-                        }}
-                        radius={25 + (point[2] / 5)}
-                    />
-                ))}
+                <ViewportHeatmap zones={zones} />
 
                 {/* Zone Markers Layer */}
                 {zones.map((marker, idx) => (
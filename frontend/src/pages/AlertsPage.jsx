@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import AlertCard from '../components/AlertCard';
-import { getLiveAlerts, reloadBackend, simulateTick } from '../services/api';
+import { reloadBackend, simulateTickUnlessDemo, subscribeLive } from '../services/api';
 import { Filter, AlertCircle, ChevronDown } from 'lucide-react';
 import SimulationIndicator from '../components/SimulationIndicator';
 
@@ -14,7 +14,8 @@ const AlertsPage = () => {
     const severityMap = { Critical: 4, High: 3, Moderate: 2, Low: 1 };
 
     const sortAlerts = (alertList) => {
-        return alertList.sort((a, b) => {
+        // Sorts a copy: the list belongs to the live state and its order must be kept
+        return [...alertList].sort((a, b) => {
             const severityA = severityMap[a.severity] || 0;
             const severityB = severityMap[b.severity] || 0;
             if (severityB !== severityA) return severityB - severityA;
@@ -31,29 +32,27 @@ const AlertsPage = () => {
         return sortAlerts(filtered);
     };
 
-    const load = async () => {
-        try {
-            try {
-                await simulateTick();
-            } catch (simErr) {
-                console.error('Simulation tick failed:', simErr);
+    // Alerts are pushed over the live stream; the page only advances the demo clock
+    useEffect(() => {
+        const unsubscribe = subscribeLive(
+            (live) => {
+                setAlerts(live.alerts || []);
+                setError(null);
+                setLoading(false);
+            },
+            () => {
+                setError('Backend offline – retrying...');
+                setLoading(false);
             }
+        );
 
-            const data = await getLiveAlerts();
-            setAlerts(data || []);
-            setError(null);
-        } catch (err) {
-            console.error('Error fetching alerts:', err);
-            setError('Backend offline – retrying...');
-        } finally {
-            setLoading(false);
-        }
-    };
-
-    useEffect(() => {
-        load();
-        const interval = setInterval(load, 10000); // 10s for live updates
-        return () => clearInterval(interval);
+        const tick = () => simulateTickUnlessDemo().catch((simErr) => console.error('Simulation tick failed:', simErr));
+        tick();
+        const interval = setInterval(tick, 10000); // 10s simulated day
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     return (
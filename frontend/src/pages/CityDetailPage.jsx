@@ -7,7 +7,7 @@ import EnvironmentalPanel from '../components/EnvironmentalPanel';
 import CityMap from '../components/CityMap';
 import RiskExplanationPanel from '../components/RiskExplanationPanel';
 
-import { getPredictions48h, getMapZones, getDashboardSummary, reloadBackend, simulateTick } from '../services/api';
+import { reloadBackend, simulateTickUnlessDemo, subscribeLive } from '../services/api';
 
 const CityDetailPage = () => {
     const { name } = useParams();
@@ -21,42 +21,33 @@ const CityDetailPage = () => {
     });
     const [error, setError] = useState(null);
 
-    const loadData = async () => {
-        try {
-            try {
-                await simulateTick();
-            } catch (simErr) {
-                console.error('Simulation tick failed:', simErr);
-            }
-
-            const [preds, zones, summary] = await Promise.all([
-                getPredictions48h(),
-                getMapZones(),
-                getDashboardSummary()
-            ]);
-            // ... (rest of loadData)
-            const cityPred = preds.find(p => p.location === name);
-            const cityZone = zones.find(z => z.location === name);
+    // Data is pushed over the live stream; the page only advances the demo clock
+    useEffect(() => {
+        const unsubscribe = subscribeLive(
+            (live) => {
+                const cityPred = live.predictions.find(p => p.location === name);
+                const cityZone = live.zones.find(z => z.location === name);
 
-            setData({
-                risk: cityZone?.riskScore || 0,
-                cases: cityPred?.predicted_cases_48h || 0,
-                lat: cityZone?.lat || 0,
-                lng: cityZone?.lng || 0,
-                loading: false,
-                summary
-            });
-            setError(null);
-        } catch (err) {
-            console.error('Error loading city detail:', err);
-            setError('Backend offline – retrying...');
-        }
-    };
+                setData({
+                    risk: cityZone?.riskScore || 0,
+                    cases: cityPred?.predicted_cases_48h || 0,
+                    lat: cityZone?.lat || 0,
+                    lng: cityZone?.lng || 0,
+                    loading: false,
+                    summary: live.summary
+                });
+                setError(null);
+            },
+            () => setError('Backend offline – retrying...')
+        );
 
-    useEffect(() => {
-        loadData();
-        const interval = setInterval(loadData, 10000); // 10s for live updates
-        return () => clearInterval(interval);
+        const tick = () => simulateTickUnlessDemo().catch((simErr) => console.error('Simulation tick failed:', simErr));
+        tick();
+        const interval = setInterval(tick, 10000); // 10s simulated day
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, [name]);
 
     return (
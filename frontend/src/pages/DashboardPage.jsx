@@ -8,7 +8,7 @@ import GuidedDemo from '../components/GuidedDemo';
 import ArchitectureModal from '../components/ArchitectureModal';
 import SimulationIndicator from '../components/SimulationIndicator';
 import ExportButtons from '../components/ExportButtons';
-import { getDashboardSummary, getPredictions48h, getLiveAlerts, reloadBackend, getMapZones, simulateTick, getLivePodData } from '../services/api';
+import { reloadBackend, simulateTickUnlessDemo, subscribeLive } from '../services/api';
 
 const DashboardPage = () => {
     const [summary, setSummary] = useState(null);
@@ -20,54 +20,31 @@ const DashboardPage = () => {
     const [error, setError] = useState(null);
     const [isArchModalOpen, setIsArchModalOpen] = useState(false);
 
-    const loadData = async () => {
-        try {
-            try {
-                await simulateTick();
-            } catch (simErr) {
-                console.error('Simulation tick failed:', simErr);
-            }
-
-            const [summaryData, alertsData, predictionsData, zonesData, podDataRes] = await Promise.all([
-                getDashboardSummary(),
-                getLiveAlerts(),
-                getPredictions48h(),
-                getMapZones(),
-                getLivePodData()
-            ]);
-
-            setSummary(summaryData);
-            setAlerts(alertsData);
-            setPredictions(predictionsData);
-            setZones(zonesData || []);
-            setPodData(podDataRes || {});
-            setError(null);
-        } catch (err) {
-            console.error('Error loading dashboard data:', err);
-            setError('Backend offline – retrying...');
-        } finally {
-            setLoading(false);
-        }
-    };
-
-    // Full dashboard refresh every 10s
+    // Data is pushed over the live stream; the page only advances the demo clock
     useEffect(() => {
-        loadData();
-        const interval = setInterval(loadData, 10000);
-        return () => clearInterval(interval);
-    }, []);
-
-    // Dedicated pod data refresh every 5s (faster than full reload)
-    useEffect(() => {
-        const podInterval = setInterval(async () => {
-            try {
-                const freshPod = await getLivePodData();
-                setPodData(freshPod || {});
-            } catch (e) {
-                console.warn('Pod poll failed:', e);
+        const unsubscribe = subscribeLive(
+            (live) => {
+                setSummary(live.summary);
+                setAlerts(live.alerts);
+                setPredictions(live.predictions);
+                setZones(live.zones || []);
+                setPodData(live.pod || {});
+                setError(null);
+                setLoading(false);
+            },
+            () => {
+                setError('Backend offline – retrying...');
+                setLoading(false);
             }
-        }, 5000);
-        return () => clearInterval(podInterval);
+        );
+
+        const tick = () => simulateTickUnlessDemo().catch((simErr) => console.error('Simulation tick failed:', simErr));
+        tick();
+        const interval = setInterval(tick, 10000);
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     if (loading && !summary) {
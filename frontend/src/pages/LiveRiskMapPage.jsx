@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getMapZones, getDashboardSummary, getHeatmapData, reloadBackend, simulateTick, exportZonesCSV, getExportableData } from '../services/api';
+import { reloadBackend, simulateTickUnlessDemo, subscribeLive, exportZonesCSV, getExportableData } from '../services/api';
 import { Activity, Droplets, Thermometer, Radio, AlertCircle, Download, FileText, Loader } from 'lucide-react';
 import RiskExplanationPanel from '../components/RiskExplanationPanel';
 import LiveMapComponent from '../components/LiveMapComponent';
@@ -25,7 +25,6 @@ const LiveRiskMapPage = () => {
     
     const [zones, setZones] = useState([]);
     const [summary, setSummary] = useState(null);
-    const [heatmap, setHeatmap] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [selectedCity, setSelectedCity] = useState(null);
@@ -98,35 +97,28 @@ const LiveRiskMapPage = () => {
         }
     };
 
-    const loadData = async () => {
-        try {
-            try {
-                await simulateTick();
-            } catch (simErr) {
-                console.error('Simulation tick failed:', simErr);
-            }
-
-            const [zonesData, summaryData, heatmapData] = await Promise.all([
-                getMapZones(),
-                getDashboardSummary(),
-                getHeatmapData()
-            ]);
-            setZones(zonesData);
-            setSummary(summaryData);
-            setHeatmap(heatmapData);
-            setError(null);
-        } catch (err) {
-            console.error('Error loading map data:', err);
-            setError('Backend offline – retrying...');
-        } finally {
-            setLoading(false);
-        }
-    };
-
+    // Data is pushed over the live stream; the page only advances the demo clock
     useEffect(() => {
-        loadData();
-        const interval = setInterval(loadData, 10000);
-        return () => clearInterval(interval);
+        const unsubscribe = subscribeLive(
+            (live) => {
+                setZones(live.zones);
+                setSummary(live.summary);
+                setError(null);
+                setLoading(false);
+            },
+            () => {
+                setError('Backend offline – retrying...');
+                setLoading(false);
+            }
+        );
+
+        const tick = () => simulateTickUnlessDemo().catch((simErr) => console.error('Simulation tick failed:', simErr));
+        tick();
+        const interval = setInterval(tick, 10000);
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     return (
@@ -160,7 +152,6 @@ const LiveRiskMapPage = () => {
                 <div className="lg:w-[70%] h-full bg-slate-900 rounded-xl border border-slate-800 overflow-hidden shadow-lg relative">
                     <LiveMapComponent
                         zones={zones}
-                        heatmap={heatmap}
                         onMarkerClick={(m) => setSelectedCity(m.location)}
                     />
 
@@ -38,8 +38,8 @@ api.interceptors.response.use(
   }
 );
 
-export const getDashboardSummary = async () => {
-  const response = await api.get('/dashboard/summary');
+export const getDashboardSummary = async (date) => {
+  const response = await api.get('/dashboard/summary', { params: date ? { date } : {} });
   return response.data;
 };
 
@@ -53,8 +53,13 @@ export const getMapZones = async () => {
   return response.data;
 };
 
-export const getHeatmapData = async () => {
-  const response = await api.get('/map/heatmap');
+// Without arguments, every hospital's [lat, lng, riskScore]. With a Leaflet
+// LatLngBounds and zoom, one [lat, lng, riskScore, count] per grid cell in view.
+export const getHeatmapData = async (bounds, zoom) => {
+  const params = bounds
+    ? { bbox: [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()].join(','), zoom }
+    : {};
+  const response = await api.get('/map/heatmap', { params });
   return response.data;
 };
 
@@ -63,6 +68,59 @@ export const getPredictions48h = async () => {
   return response.data;
 };
 
+export const getPredictionHistory = async (city, params = {}) => {
+  const response = await api.get('/prediction/history', { params: { city, ...params } });
+  return response.data;
+};
+
+export const getRiskHistory = async (city, params = {}) => {
+  const response = await api.get('/risk/history', { params: { city, ...params } });
+  return response.data;
+};
+
+// Live updates pushed by the backend (Server-Sent Events): one snapshot of
+// { zones, predictions, alerts, summary, pod } on connect, then deltas with
+// just what changed. See backend/services/live_feed.py for the format.
+export const applyLiveDelta = (state, delta) => {
+  const next = { ...state };
+  ['zones', 'predictions'].forEach((key) => {
+    if (!delta[key]) return;
+    const rows = next[key].slice(0, delta[key].length);
+    delta[key].changed.forEach(([i, fields]) => {
+      rows[i] = { ...rows[i], ...fields };
+    });
+    next[key] = rows;
+  });
+  if (delta.alerts) {
+    const removed = new Set(delta.alerts.removed);
+    next.alerts = next.alerts.filter((_, i) => !removed.has(i)).concat(delta.alerts.added);
+  }
+  if (delta.summary) next.summary = delta.summary;
+  if (delta.pod) next.pod = delta.pod;
+  return next;
+};
+
+// Calls onState with the full live state after every change; returns an unsubscribe function.
+// EventSource reconnects on its own and the server starts each connection with a snapshot.
+export const subscribeLive = (onState, onError) => {
+  const source = new EventSource(`${API_BASE_URL}/live/stream`);
+  let state = null;
+  source.addEventListener('snapshot', (event) => {
+    state = JSON.parse(event.data);
+    onState(state);
+  });
+  source.addEventListener('delta', (event) => {
+    if (!state) return;
+    state = applyLiveDelta(state, JSON.parse(event.data));
+    onState(state);
+  });
+  source.onerror = (err) => {
+    console.error('Live stream error:', err);
+    if (onError) onError(err);
+  };
+  return () => source.close();
+};
+
 export const getLiveAlerts = async () => {
   const response = await api.get('/alerts/live');
   return response.data;
@@ -94,8 +152,8 @@ export const getExportableData = async () => {
 };
 
 // Demo Endpoints
-export const startDemo = async () => {
-  const response = await api.post('/demo/start');
+export const startDemo = async (interval, days) => {
+  const response = await api.post('/demo/start', null, { params: { interval, days } });
   return response.data;
 };
 
@@ -104,6 +162,21 @@ export const stopDemo = async () => {
   return response.data;
 };
 
+export const pauseDemo = async () => {
+  const response = await api.post('/demo/pause');
+  return response.data;
+};
+
+export const resumeDemo = async () => {
+  const response = await api.post('/demo/resume');
+  return response.data;
+};
+
+export const getDemoStatus = async () => {
+  const response = await api.get('/demo/status');
+  return response.data;
+};
+
 export const getRiskExplanation = async (location) => {
   const response = await api.get(`/demo/explanation/${location}`);
   return response.data;
@@ -114,8 +187,20 @@ export const getCorrelations = async () => {
   return response.data;
 };
 
-export const simulateTick = async () => {
-  const response = await api.post('/simulate-tick');
+export const simulateTick = async (days = 1) => {
+  const response = await api.post('/simulate-tick', null, { params: days > 1 ? { days } : {} });
+  return response.data;
+};
+
+// The pages' periodic tick: skipped while the demo scheduler is already advancing the simulation
+export const simulateTickUnlessDemo = async () => {
+  const status = await getDemoStatus();
+  if (status.state === 'running') return null;
+  return simulateTick();
+};
+
+export const runEnsemble = async (days = 30, trajectories = 32, seed = 0) => {
+  const response = await api.post('/scenario/ensemble', null, { params: { days, trajectories, seed } });
   return response.data;
 };
 